@@ -0,0 +1,278 @@
+"""
+Offline latency and throughput benchmarks for the AI layer.
+
+Drives OllamaManager, GemmaManager and ModelSelector against the local stub
+server at several concurrency levels and prints the results as JSON, so runs
+before and after a change can be compared on a machine without models or
+network access.
+
+Usage (from the project root):
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --targets ollama --scenarios baseline,errors \\
+        --concurrency 1,8 --requests 64 --output results.json
+"""
+import os
+import sys
+import json
+import math
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+# Allow running as a script as well as with -m
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from benchmarks.stub_ollama import StubOllamaServer, StubProfile
+from core.ai.ollama_manager import OllamaManager
+from core.ai.gemma_manager import GemmaManager
+from core.ai.model_selector import ModelSelector
+from core.ai.request_scheduler import get_scheduler
+from core.ai.streaming import collect_stream
+from core.utils.endpoint_health import get_health_monitor
+from core.utils.http_transport import configure_transport
+
+logger = logging.getLogger(__name__)
+
+# Stub server behaviour per scenario (overrides of StubProfile)
+SCENARIOS = {
+    'baseline': {},
+    'slow_prefill': {'ttft': 0.5},
+    'errors': {'error_rate': 0.2},
+    'stalls': {'stall_rate': 0.1, 'stall_seconds': 1.0},
+    'reasoning': {'think_tokens': 48},
+}
+
+TARGETS = ('ollama', 'gemma', 'selector')
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    """Nearest-rank p50/p95/p99 plus mean and max, in milliseconds"""
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def rank(fraction: float) -> float:
+        index = min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))
+        return values[index] * 1000
+
+    return {
+        'p50': round(rank(0.50), 2),
+        'p95': round(rank(0.95), 2),
+        'p99': round(rank(0.99), 2),
+        'mean': round(sum(values) / len(values) * 1000, 2),
+        'max': round(values[-1] * 1000, 2),
+    }
+
+
+def _model_management(cache_dir: str) -> Dict[str, Any]:
+    """Model management settings that keep runs independent of each other"""
+    return {
+        'auto_start_ollama': False,
+        'preload_models': False,
+        'cache_dir': cache_dir,
+        'response_cache': {'enabled': False},
+        'compaction': {'enabled': False},
+        'health': {'background_probe': False},
+        'retry': {'deadline': 30},
+    }
+
+
+def _model_config(base_url: str, provider: str, model: str, cache_dir: str) -> Dict[str, Any]:
+    return {
+        'provider': provider,
+        'base_url': base_url,
+        'model': model,
+        'context_length': 2048,
+        'max_tokens': 256,
+        'temperature': 0.7,
+        'timeout': 10,
+        'model_management': _model_management(cache_dir),
+    }
+
+
+def build_client(target: str, base_url: str, cache_dir: str):
+    """Create one client for a benchmark target"""
+    if target == 'ollama':
+        return OllamaManager(_model_config(base_url, 'ollama', 'bench-model', cache_dir), None)
+    if target == 'gemma':
+        return GemmaManager(_model_config(base_url, 'gemma', 'bench-model', cache_dir), None)
+    if target == 'selector':
+        return ModelSelector({
+            'model_management': _model_management(cache_dir),
+            'model_selection': {'hedging': True, 'first_token_budget': 1.0, 'auto_select': False},
+            'primary': _model_config(base_url, 'ollama', 'bench-model', cache_dir),
+            'fallback': _model_config(base_url, 'ollama', 'bench-fallback', cache_dir),
+        }, None)
+    raise ValueError(f"Unknown benchmark target: {target}")
+
+
+def _reset(client) -> None:
+    """Start each request from an empty conversation so prompts stay comparable"""
+    managers = [client.primary_model, client.fallback_model] if isinstance(client, ModelSelector) else [client]
+    for manager in managers:
+        if manager:
+            manager.clear_conversation()
+
+
+def run_case(target: str, scenario: str, concurrency: int, requests: int,
+             parallel: int, cache_dir: str) -> Dict[str, Any]:
+    """
+    Run one target/scenario/concurrency combination against a fresh stub server.
+
+    Args:
+        target: 'ollama', 'gemma' or 'selector'
+        scenario: Key of SCENARIOS
+        concurrency: Number of concurrent clients
+        requests: Total requests, split across the clients
+        parallel: Concurrent generations the stub server allows
+        cache_dir: Scratch cache directory
+
+    Returns:
+        Dict[str, Any]: Machine-readable results
+    """
+    profile = StubProfile(seed=1234, parallel=parallel, **SCENARIOS[scenario])
+    results = []
+    lock = threading.Lock()
+
+    with StubOllamaServer(profile, models=['bench-model', 'bench-fallback']) as server:
+        clients = [build_client(target, server.base_url, cache_dir) for _ in range(concurrency)]
+
+        def worker(index: int) -> None:
+            client = clients[index]
+            for number in range(index, requests, concurrency):
+                _reset(client)
+                first_token = []
+                start = time.perf_counter()
+
+                def on_token(token, first_token=first_token, start=start):
+                    if not first_token:
+                        first_token.append(time.perf_counter() - start)
+
+                prompt = f"Benchmark question {number}: explain the number {number}."
+                response = collect_stream(client.generate_response_stream(prompt), on_token)
+                latency = time.perf_counter() - start
+                metrics = getattr(response, 'metrics', None)
+                with lock:
+                    results.append({
+                        'success': bool(response and response.success),
+                        'latency': latency,
+                        'ttft': first_token[0] if first_token else None,
+                        'retries': metrics.retries if metrics else 0,
+                        'tokens': metrics.generated_tokens if metrics else 0,
+                        'error': None if response and response.success else getattr(response, 'error', None),
+                    })
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        server_stats = server.get_stats()
+
+    succeeded = [result for result in results if result['success']]
+    latencies = [result['latency'] for result in succeeded]
+    mean_latency = sum(latencies) / len(latencies) if latencies else 0.0
+    errors: Dict[str, int] = {}
+    for result in results:
+        if not result['success']:
+            errors[result['error'] or 'unknown'] = errors.get(result['error'] or 'unknown', 0) + 1
+
+    return {
+        'target': target,
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'requests': len(results),
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(succeeded) / elapsed, 3) if elapsed else 0.0,
+        'tokens_per_second': round(sum(result['tokens'] for result in succeeded) / elapsed, 1) if elapsed else 0.0,
+        'latency_ms': _percentiles(latencies),
+        'ttft_ms': _percentiles([result['ttft'] for result in succeeded if result['ttft'] is not None]),
+        # Client-side latency not spent inside the server: transport, scheduling, parsing
+        'overhead_ms': round((mean_latency - server_stats['mean_service_time']) * 1000, 2) if latencies else None,
+        'retries': {
+            'total': sum(result['retries'] for result in results),
+            'requests_retried': sum(1 for result in results if result['retries']),
+            'server_requests': server_stats['requests'],
+        },
+        'server': server_stats,
+    }
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark the AI layer against a local stub Ollama server')
+    parser.add_argument('--targets', default=','.join(TARGETS),
+                        help=f"Comma-separated targets ({', '.join(TARGETS)})")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"Comma-separated scenarios ({', '.join(SCENARIOS)})")
+    parser.add_argument('--concurrency', default='1,4,8',
+                        help='Comma-separated numbers of concurrent clients')
+    parser.add_argument('--requests', type=int, default=32,
+                        help='Requests per target/scenario/concurrency combination')
+    parser.add_argument('--parallel', type=int, default=4,
+                        help='Concurrent generations the stub allows (OLLAMA_NUM_PARALLEL)')
+    parser.add_argument('--output', help='Write results to this file instead of stdout')
+    parser.add_argument('--verbose', action='store_true', help='Show application logging')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_arguments(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    targets = [target for target in args.targets.split(',') if target]
+    scenarios = [scenario for scenario in args.scenarios.split(',') if scenario]
+    levels = [int(level) for level in args.concurrency.split(',') if level]
+    for scenario in scenarios:
+        if scenario not in SCENARIOS:
+            print(f"Unknown scenario: {scenario}", file=sys.stderr)
+            return 2
+
+    # Process-wide singletons are configured once, before any manager creates them
+    max_concurrency = max(levels)
+    configure_transport({'pool_connections': 4, 'pool_maxsize': max_concurrency * 2})
+    get_scheduler({'parallel_slots': args.parallel})
+    get_health_monitor({'background_probe': False})
+
+    report = {
+        'created': time.time(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'settings': {'requests': args.requests, 'parallel': args.parallel},
+        'results': [],
+    }
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for target in targets:
+            for scenario in scenarios:
+                for concurrency in levels:
+                    print(f"Running {target}/{scenario} at concurrency {concurrency}...", file=sys.stderr)
+                    report['results'].append(
+                        run_case(target, scenario, concurrency, args.requests, args.parallel, cache_dir)
+                    )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
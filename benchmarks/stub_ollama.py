@@ -0,0 +1,250 @@
+"""
+Local stand-in for the Ollama HTTP API, used by the benchmark suite.
+
+Speaks enough of /api/chat, /api/generate, /api/tags and /api/ps for the AI
+managers, with configurable time to first token, throughput, injected errors
+and mid-stream stalls. Needs nothing beyond the standard library.
+"""
+import sys
+import json
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_NS_PER_SECOND = 1e9
+
+
+@dataclass
+class StubProfile:
+    """How the stub server behaves."""
+    ttft: float = 0.05              # Seconds of prompt processing before the first token
+    tokens_per_second: float = 200.0
+    tokens: int = 32                # Answer length when num_predict does not cap it
+    think_tokens: int = 0           # Reasoning tokens sent in a <think> block first
+    error_rate: float = 0.0         # Share of requests answered with error_status
+    error_status: int = 500
+    stall_rate: float = 0.0         # Share of streams that pause halfway through
+    stall_seconds: float = 2.0
+    parallel: int = 4               # Concurrent generations, like OLLAMA_NUM_PARALLEL
+    seed: Optional[int] = None
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping idle keep-alive connections is expected
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        stub = self.server.stub
+        if self.path == '/':
+            data = b'Ollama is running'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif self.path == '/api/tags':
+            self._send_json(200, {'models': [{'name': name, 'size': 1_000_000_000} for name in stub.models]})
+        elif self.path == '/api/ps':
+            expires_at = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(time.time() + 300))
+            self._send_json(200, {'models': [{'name': name, 'model': name, 'expires_at': expires_at}
+                                             for name in stub.running]})
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if self.path not in ('/api/chat', '/api/generate'):
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        received = time.perf_counter()
+        stub._count('requests')
+        stub._log_request(self.path, request)
+        if stub._chance(stub.profile.error_rate):
+            stub._count('errors_injected')
+            self._send_json(stub.profile.error_status, {'error': 'injected failure'})
+            return
+
+        with stub._slots:
+            completed = self._generate(request, self.path == '/api/chat', received)
+        stub._record_service(time.perf_counter() - received, completed)
+
+    def _generate(self, request: Dict[str, Any], chat: bool, received: float) -> bool:
+        """Produce a response; returns False if the client went away"""
+        stub = self.server.stub
+        profile = stub.profile
+        num_predict = request.get('options', {}).get('num_predict', -1)
+        tokens = [f"thought{i} " for i in range(profile.think_tokens)]
+        if tokens:
+            tokens = ['<think>'] + tokens + ['</think>\n\n']
+        tokens += [f"word{i} " for i in range(profile.tokens)]
+        # Like Ollama, num_predict <= 0 means no limit
+        if num_predict and num_predict > 0:
+            tokens = tokens[:num_predict]
+        stall_at = len(tokens) // 2 if stub._chance(profile.stall_rate) else None
+
+        def chunk(text: str, done: bool = False) -> Dict[str, Any]:
+            body = {'model': request.get('model'), 'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                    'done': done}
+            if chat:
+                body['message'] = {'role': 'assistant', 'content': text}
+            else:
+                body['response'] = text
+            if done:
+                eval_seconds = len(tokens) / profile.tokens_per_second
+                body.update(
+                    total_duration=int((time.perf_counter() - received) * _NS_PER_SECOND),
+                    load_duration=0,
+                    prompt_eval_count=len(json.dumps(request.get('messages') or request.get('prompt', ''))) // 4,
+                    prompt_eval_duration=int(profile.ttft * _NS_PER_SECOND),
+                    eval_count=len(tokens),
+                    eval_duration=int(eval_seconds * _NS_PER_SECOND),
+                )
+                if not chat:
+                    body['context'] = list(range(16))
+            return body
+
+        time.sleep(profile.ttft)
+        if not request.get('stream', True):
+            time.sleep(len(tokens) / profile.tokens_per_second)
+            self._send_json(200, chunk(''.join(tokens), done=True))
+            return True
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for index, token in enumerate(tokens):
+                if index == stall_at:
+                    stub._count('stalls')
+                    time.sleep(profile.stall_seconds)
+                self._write_chunk(chunk(token))
+                time.sleep(1 / profile.tokens_per_second)
+            self._write_chunk(chunk('', done=True))
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+            return True
+        except (BrokenPipeError, ConnectionResetError):
+            stub._count('aborted')
+            self.close_connection = True
+            return False
+
+    def _write_chunk(self, body: Dict[str, Any]) -> None:
+        data = (json.dumps(body) + '\n').encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+
+class StubOllamaServer:
+    """A threaded Ollama stand-in listening on localhost."""
+
+    def __init__(self, profile: Optional[StubProfile] = None, models: Optional[List[str]] = None,
+                 host: str = '127.0.0.1', port: int = 0):
+        """
+        Initialize the server (call start() to begin serving).
+
+        Args:
+            profile: Behaviour of the server
+            models: Model names reported by /api/tags; /api/ps reports those in
+                `running` (none at first)
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free one
+        """
+        self.profile = profile or StubProfile()
+        self.models = models or ['bench-model']
+        self.running: List[str] = []
+        self._random = random.Random(self.profile.seed)
+        self._slots = threading.Semaphore(max(1, self.profile.parallel))
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.stub = self
+        self._thread = None
+        self.reset_stats()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StubOllamaServer':
+        """Serve requests on a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="StubOllama")
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'StubOllamaServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def _chance(self, rate: float) -> bool:
+        with self._lock:
+            return self._random.random() < rate
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _log_request(self, path: str, request: Dict[str, Any]) -> None:
+        with self._lock:
+            self._requests.append((path, request))
+
+    def received_requests(self) -> List[tuple]:
+        """Return (path, body) of every POST received since the last reset"""
+        with self._lock:
+            return list(self._requests)
+
+    def _record_service(self, seconds: float, completed: bool) -> None:
+        with self._lock:
+            if completed:
+                self._service_times.append(seconds)
+
+    def reset_stats(self) -> None:
+        """Clear the request counters"""
+        with self._lock:
+            self._stats = {'requests': 0, 'errors_injected': 0, 'stalls': 0, 'aborted': 0}
+            self._service_times: List[float] = []
+            self._requests: List[tuple] = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return request counters and server-side time per completed request"""
+        with self._lock:
+            stats = dict(self._stats)
+            times = list(self._service_times)
+        stats['completed'] = len(times)
+        stats['mean_service_time'] = sum(times) / len(times) if times else 0.0
+        stats['profile'] = asdict(self.profile)
+        return stats
@@ -1,23 +1,40 @@
 import os
 import json
+import time
 import requests
 import logging
+import threading
 import subprocess
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Generator, Iterable, Tuple
 from dataclasses import dataclass
-from core.automation.app_launcher import AppLauncher
-from core.automation.reminder import Reminder
-from core.automation.system_ctrl import SystemController
-from core.automation.web_actions import WebActions
+from core.automation.services import get_automation_services
+from core.utils.http_transport import get_transport
+from core.utils.endpoint_health import get_health_monitor
+from core.utils.retry_policy import RetryPolicy
+from core.utils.cancellation import CancellationToken, CANCELLED_ERROR
+from .streaming import ThinkFilter, collect_stream, iter_ndjson
+from .response_cache import ResponseCache, get_response_cache
+from .model_residency import get_residency_manager
+from .telemetry import GenerationMetrics, get_telemetry
+from .context_builder import ContextBuilder
+from .history_compactor import HistoryCompactor
+from .request_scheduler import Priority, get_scheduler
+from .session_store import ConversationSession, SessionStore, DEFAULT_SESSION
+from .endpoint_pool import EndpointPool, endpoint_urls
+from .batch import BatchResult, BatchStats, run_batch
 
 logger = logging.getLogger(__name__)
 
+# Serializes auto-starting the Ollama service across managers
+_service_start_lock = threading.Lock()
+
 @dataclass
 class AIResponse:
     success: bool
     content: str
     error: Optional[str] = None
+    metrics: Optional[GenerationMetrics] = None
 
 class BaseAIManager:
     """Base class for AI model managers to reduce code duplication."""
@@ -30,7 +47,9 @@ class BaseAIManager:
             config: Dictionary containing AI configuration
             reminder_callback: Callback function for reminders
         """
-        self.base_url = config.get('base_url', 'http://localhost:11434')
+        # One endpoint or a list of them; the first is preferred and used for service management
+        self.base_urls = endpoint_urls(config.get('base_url'))
+        self.base_url = self.base_urls[0]
         self.model_name = config.get('model', 'default-model')
         self.context_length = config.get('context_length', 4096)
         self.max_tokens = config.get('max_tokens', 512)
@@ -42,8 +61,8 @@ class BaseAIManager:
         # Load system prompt
         self.system_prompt = self._load_system_prompt(config)
         
-        # Conversation history
-        self.conversation_history = []
+        # Conversation state per client session, with older turns folded into a rolling summary
+        self.sessions = SessionStore(config.get('model_management', {}).get('sessions', {}), self._create_session)
         
         # Initialize automation components
         self._initialize_automation_components(reminder_callback)
@@ -58,10 +77,58 @@ class BaseAIManager:
         self.retry_attempts = model_mgmt.get('retry_attempts', 3)  # Increased from 2
         self.memory_optimization = model_mgmt.get('memory_optimization', True)  # Default to True
         self.conversation_history_limit = model_mgmt.get('conversation_history_limit', 10)  # Reduced from 20
+        self.context_builder = ContextBuilder(model_mgmt.get('context', {}))
         
         # Extract timeout from config with a more conservative default
         self.request_timeout = config.get('timeout', 45)  # Increased from 30
         
+        # Backoff, overall deadline and option degradation for retried requests
+        retry_config = dict(model_mgmt.get('retry', {}))
+        retry_config.setdefault('max_attempts', self.retry_attempts)
+        self.retry_policy = RetryPolicy(retry_config)
+        
+        # Shared cache of responses to repeated prompts
+        self.response_cache = get_response_cache(
+            model_mgmt.get('response_cache', {}),
+            model_mgmt.get('cache_dir')
+        )
+        
+        # How long Ollama keeps the model loaded after each request
+        self.keep_alive = config.get('keep_alive', model_mgmt.get('keep_alive', '30m'))
+        self.residency = get_residency_manager(model_mgmt)
+        
+        # Background summarization of older turns, one compactor per session
+        self.compaction_config = model_mgmt.get('compaction', {})
+        
+        # Shared priority queue in front of each model's parallel slots
+        self.scheduler = get_scheduler(model_mgmt.get('scheduler', {}))
+        
+        # Reasoning models' <think> segments are kept out of answers; a cap forces the answer early
+        self.max_reasoning_tokens = model_mgmt.get('reasoning', {}).get('max_tokens')
+        
+        # Speculative prefill of the prompt while the user is still typing
+        prefill_config = model_mgmt.get('prefill', {})
+        self.prefill_enabled = prefill_config.get('enabled', False)
+        self.prefill_debounce_ms = prefill_config.get('debounce_ms', 800)
+        self.prefill_min_chars = prefill_config.get('min_chars', 3)
+        self._prefill_input: Optional[str] = None
+        self._prefill_running = False
+        self._prefill_lock = threading.Lock()
+        
+        # Bulk generation of independent prompts
+        batch_config = model_mgmt.get('batch', {})
+        self.batch_concurrency = batch_config.get('max_concurrency', 4)
+        self.batch_max_preemptions = batch_config.get('max_preemptions', 3)
+        
+        # Cached endpoint health; an open circuit makes requests fail fast
+        self.health = get_health_monitor(model_mgmt.get('health', {}))
+        self.service_start_timeout = model_mgmt.get('service_start_timeout', 30)
+        
+        # Spread requests over the model's endpoints, keeping each session on one
+        self.endpoints = EndpointPool(self.base_urls, self.health, self.scheduler,
+                                      model_mgmt.get('load_balancing', {}))
+        self._register_backend()
+        
         # Set default model parameters if not already set
         if not hasattr(self, 'max_tokens'):
             self.max_tokens = model_mgmt.get('max_tokens', 512)  # Conservative default
@@ -72,6 +139,35 @@ class BaseAIManager:
                     f"history_limit={self.conversation_history_limit}, timeout={self.request_timeout}")
     
 
+    def _register_backend(self) -> None:
+        """Have the residency manager and health monitor track this model's endpoints"""
+        for base_url in self.base_urls:
+            self.residency.register(base_url, self.model_name, self.keep_alive)
+            self.health.watch(base_url)
+
+    def _create_session(self, session_id: str) -> ConversationSession:
+        """Create the state for a new conversation session"""
+        compactor = HistoryCompactor(self.compaction_config, self.base_url, self.model_name, self.keep_alive)
+        return ConversationSession(session_id, compactor=compactor)
+
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        """History of the default session"""
+        return self.sessions.get(DEFAULT_SESSION).history
+
+    @conversation_history.setter
+    def conversation_history(self, history: List[Dict[str, str]]) -> None:
+        self.sessions.get(DEFAULT_SESSION).history = history
+
+    @property
+    def conversation_summary(self) -> str:
+        """Rolling summary of the default session"""
+        return self.sessions.get(DEFAULT_SESSION).summary
+
+    @conversation_summary.setter
+    def conversation_summary(self, summary: str) -> None:
+        self.sessions.get(DEFAULT_SESSION).summary = summary
+
     def _load_system_prompt(self, config: Dict[str, Any]) -> str:
         """Load system prompt from template file."""
         prompt_template_path = os.path.join(
@@ -89,82 +185,89 @@ class BaseAIManager:
             return "You are a helpful AI desktop assistant."
 
     def _initialize_automation_components(self, reminder_callback):
-        """Initialize automation components with proper error handling"""
-        # App Launcher
-        try:
-            self.app_launcher = AppLauncher()
-            logger.info("App launcher initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize app launcher: {e}")
-            self.app_launcher = None
-        
-        # Reminder System
-        try:
-            self.reminder = Reminder(reminder_callback)
-            logger.info("Reminder system initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize reminder system: {e}")
-            self.reminder = None
-        
-        # System Controller
-        try:
-            self.system_ctrl = SystemController()
-            logger.info("System controller initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize system controller: {e}")
-            self.system_ctrl = None
-        
-        # Web Actions
-        try:
-            self.web_actions = WebActions()
-            logger.info("Web actions initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize web actions: {e}")
-            self.web_actions = None
+        """Attach to the shared automation components, building them on first use"""
+        # One set of components per process; later managers reuse it
+        self.automation = get_automation_services()
+        self.automation.add_reminder_callback(reminder_callback)
+        self.automation.start()
+
+    @property
+    def app_launcher(self):
+        return self.automation.app_launcher
+
+    @property
+    def reminder(self):
+        return self.automation.reminder
+
+    @property
+    def system_ctrl(self):
+        return self.automation.system_ctrl
+
+    @property
+    def web_actions(self):
+        return self.automation.web_actions
 
     def _check_service_status(self) -> bool:
         """Enhanced service check with auto-start capability"""
-        try:
-            response = requests.get(f"{self.base_url}/", timeout=5)
-            return response.status_code == 200
-        except Exception as e:
-            logger.error(f"Service unreachable: {e}")
-            # Auto-start is now handled in __init__
-            return False
+        # Managers sharing an endpoint reuse the monitor's cached result
+        healthy = [base_url for base_url in self.base_urls if self.health.check(base_url)]
+        if not healthy and self.auto_start_ollama:
+            if self._start_ollama_service():
+                healthy = [self.base_url]
+        if not healthy:
+            logger.error(f"Service unreachable: {', '.join(self.base_urls)}")
+        elif len(healthy) < len(self.base_urls):
+            logger.warning(f"{len(healthy)} of {len(self.base_urls)} endpoints reachable for {self.model_name}")
+        return bool(healthy)
             
     def _start_ollama_service(self) -> bool:
-        """Attempt to start the Ollama service if not running"""
-        logger.info("Attempting to start Ollama service...")
-        try:
-            # Different start commands based on OS
-            if os.name == 'nt':  # Windows
-                # Start Ollama in background
-                subprocess.Popen(
-                    ['start', '/B', 'ollama', 'serve'],
-                    shell=True,
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
-            else:  # Unix-like
-                subprocess.Popen(
-                    ['ollama', 'serve', '&'],
-                    shell=True,
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL
-                )
-                
-            # Give it a moment to start
-            import time
-            time.sleep(5)
-            
-            logger.info("Ollama service start initiated")
-            return True
-        except FileNotFoundError:
-            logger.error("Ollama command not found. Please ensure Ollama is installed correctly.")
-            return False
-        except Exception as e:
-            logger.error(f"Failed to start Ollama service: {e}")
-            return False
+        """Attempt to start the Ollama service if not running, waiting until it answers"""
+        # Managers created together start the service once
+        with _service_start_lock:
+            if self.health.probe(self.base_url):
+                return True
+            logger.info("Attempting to start Ollama service...")
+            try:
+                # Different start commands based on OS
+                if os.name == 'nt':  # Windows
+                    # Start Ollama in background
+                    subprocess.Popen(
+                        ['ollama', 'serve'],
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL,
+                        creationflags=subprocess.CREATE_NO_WINDOW
+                    )
+                else:  # Unix-like
+                    subprocess.Popen(
+                        ['ollama', 'serve'],
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.DEVNULL,
+                        start_new_session=True
+                    )
+            except FileNotFoundError:
+                logger.error("Ollama command not found. Please ensure Ollama is installed correctly.")
+                return False
+            except Exception as e:
+                logger.error(f"Failed to start Ollama service: {e}")
+                return False
+            return self._wait_for_service()
+
+    def _wait_for_service(self) -> bool:
+        """Poll the endpoint until it answers or service_start_timeout passes"""
+        start = time.monotonic()
+        delay = 0.1
+        while time.monotonic() - start < self.service_start_timeout:
+            try:
+                if get_transport().get(f"{self.base_url}/", timeout=1).status_code == 200:
+                    self.health.record_success(self.base_url)
+                    logger.info(f"Ollama service ready after {time.monotonic() - start:.1f}s")
+                    return True
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+        logger.error(f"Ollama service did not start within {self.service_start_timeout}s")
+        return False
 
     def _pull_model(self) -> bool:
         """Pull the specified model from repository with robust error handling."""
@@ -199,6 +302,10 @@ class BaseAIManager:
             logger.error(f"Error pulling model: {e}")
             return False
 
+    def prepare_for_use(self) -> None:
+        """Start loading the model in the background ahead of an expected request"""
+        self.residency.ensure_warm_async(self.endpoints.select(DEFAULT_SESSION), self.model_name)
+
     def validate_user_input(self, user_input: str) -> bool:
         """Validate user input for security and sanity."""
         if not user_input or not user_input.strip():
@@ -208,12 +315,18 @@ class BaseAIManager:
             return False
         return True
 
-    def generate_response(self, user_input: str) -> AIResponse:
+    def generate_response(self, user_input: str,
+                          cancel_token: Optional[CancellationToken] = None,
+                          priority: Priority = Priority.CHAT,
+                          session_id: str = DEFAULT_SESSION) -> AIResponse:
         """
         Generate a response using the AI model with proper error handling.
         
         Args:
             user_input: The user's message
+            cancel_token: Optional token to abort the generation
+            priority: Scheduling class of the request
+            session_id: Conversation the message belongs to
             
         Returns:
             AIResponse: Response object with success status and content
@@ -231,7 +344,83 @@ class BaseAIManager:
             return AIResponse(success=True, content=automation_response)
         
         # If not an automation command, proceed with AI response
-        return self._get_ai_response(user_input)
+        return self._get_ai_response(user_input, cancel_token, priority, session_id)
+
+    def generate_response_stream(self, user_input: str,
+                                 cancel_token: Optional[CancellationToken] = None,
+                                 automation: bool = True,
+                                 priority: Priority = Priority.CHAT,
+                                 session_id: str = DEFAULT_SESSION) -> Generator[str, None, AIResponse]:
+        """
+        Generate a response, yielding content tokens as the model produces them.
+        
+        Automation command results are yielded as a single chunk.
+        
+        Args:
+            user_input: The user's message
+            cancel_token: Optional token to abort the generation
+            automation: Whether to handle automation commands; callers that
+                already ran run_automation_command pass False
+            priority: Scheduling class of the request
+            session_id: Conversation the message belongs to
+            
+        Returns:
+            AIResponse: Final response object, delivered as the generator's
+            return value (use collect_stream to retrieve it)
+        """
+        if not self.validate_user_input(user_input):
+            return AIResponse(
+                success=False, 
+                content="", 
+                error="Invalid input provided"
+            )
+        
+        automation_response = self._process_automation_commands(user_input) if automation else None
+        if automation_response:
+            yield automation_response
+            return AIResponse(success=True, content=automation_response)
+        
+        return (yield from self._stream_ai_response(user_input, cancel_token, priority, session_id))
+
+    def generate_batch(self, prompts: Iterable[str], max_concurrency: Optional[int] = None,
+                       priority: Priority = Priority.BACKGROUND,
+                       cancel_token: Optional[CancellationToken] = None) -> Generator[BatchResult, None, BatchStats]:
+        """
+        Answer many independent prompts, yielding each result as it finishes.
+        
+        Every prompt runs in its own transient session, so the batch neither
+        reads nor changes any conversation, and results arrive in completion
+        order (BatchResult.index gives the input position).
+        
+        Args:
+            prompts: Prompts to answer; consumed lazily
+            max_concurrency: Prompts in flight at once; defaults to
+                model_management.batch.max_concurrency
+            priority: Scheduling class; background work yields its slot to
+                foreground requests and is requeued
+            cancel_token: Optional token that aborts the remaining prompts
+            
+        Returns:
+            BatchStats: Prompts/s, tokens/s and failure counts, delivered as
+            the generator's return value
+        """
+        limit = max(1, max_concurrency or self.batch_concurrency)
+        return run_batch(self, prompts, limit, priority, cancel_token, self.batch_max_preemptions)
+
+    def run_automation_command(self, user_input: str) -> Optional[str]:
+        """
+        Execute the input as an automation command if it is one.
+        
+        Args:
+            user_input: The user's message
+            
+        Returns:
+            Optional[str]: The command's result, or None if the input is not
+            an automation command
+        """
+        if not self.validate_user_input(user_input):
+            return None
+        return self._process_automation_commands(user_input)
 
     def _process_automation_commands(self, user_input: str) -> Optional[str]:
         """Process automation commands and return response if handled"""
@@ -572,14 +761,528 @@ class BaseAIManager:
             logger.error(f"Error with quick answer: {e}")
             return f"Quick answer failed: {str(e)}"
 
-    def _get_ai_response(self, user_input: str) -> AIResponse:
-        """Get AI response - to be implemented by subclasses"""
-        raise NotImplementedError("Subclasses must implement _get_ai_response")
+    def _get_ai_response(self, user_input: str,
+                         cancel_token: Optional[CancellationToken] = None,
+                         priority: Priority = Priority.CHAT,
+                         session_id: str = DEFAULT_SESSION) -> AIResponse:
+        """Get the complete AI response by draining the token stream"""
+        return collect_stream(self._stream_ai_response(user_input, cancel_token, priority, session_id))
+
+    def _stream_ai_response(self, user_input: str,
+                            cancel_token: Optional[CancellationToken] = None,
+                            priority: Priority = Priority.CHAT,
+                            session_id: str = DEFAULT_SESSION) -> Generator[str, None, AIResponse]:
+        """
+        Stream a response from the model's Ollama endpoints.
+        
+        Repeated prompts are answered from the response cache. Other requests
+        wait for a scheduler slot, are retried with degraded options or failed
+        over to another endpoint within the retry policy's deadline, and relay
+        answer tokens with reasoning held back. Providers supply the request
+        (_build_request), the text of each streamed chunk (_chunk_text) and the
+        session update for the answer (_record_answer).
+        """
+        session = self.sessions.get(session_id)
+        metrics = self._start_metrics()
+        streaming = False
+        slot = None
+        base_url = self.endpoints.select(session_id)
+        try:
+            context_window = self._prepare_context_window(session, user_input)
+            endpoint, payload = self._build_request(context_window, user_input, session)
+            
+            # Repeated prompts are answered from the response cache
+            cache_key = self._response_cache_key(context_window, payload["options"])
+            cached = self._lookup_cached_response(cache_key, session)
+            if cached is not None:
+                self._note_token(metrics)
+                yield cached
+                return AIResponse(success=True, content=cached, metrics=self._finish_metrics(metrics, cached=True))
+            
+            if not self.health.allow_request(base_url):
+                return self._unavailable_response(base_url)
+            
+            # Foreground requests go ahead of queued and running background work
+            slot = self._acquire_slot(base_url, priority, cancel_token)
+            if slot is None:
+                return self._cancelled_response(user_input, session)
+            
+            logger.info(f"Sending request to {base_url} with model: {self.model_name}")
+            
+            # Make the API call with retry logic, bounded by the policy's deadline
+            retry = self.retry_policy.start(cancel_token)
+            failed_over = False
+            for attempt in retry:
+                if cancel_token and cancel_token.cancelled:
+                    return self._cancelled_response(user_input, session)
+                metrics.retries = attempt
+                response = None
+                try:
+                    # Adjust parameters for retry; a fresh endpoint gets the original ones
+                    if attempt > 0 and not failed_over:
+                        payload["options"] = self.retry_policy.degrade_options(payload["options"], self.temperature)
+                        logger.info(f"Retrying with parameters: num_predict={payload['options']['num_predict']}, temperature={payload['options']['temperature']}")
+                    failed_over = False
+                    
+                    response = get_transport().post(
+                        f"{base_url}{endpoint}",
+                        json=payload,
+                        stream=True,
+                        timeout=retry.timeout(self.request_timeout),
+                        cancel_token=cancel_token
+                    )
+                    if response.status_code != 200:
+                        logger.error(f"API Error: {response.status_code} - {response.text}")
+                    response.raise_for_status()
+                    break
+                    
+                except Exception as e:
+                    # An unread error response holds a pooled connection and its cancel guard
+                    if response is not None:
+                        response.close()
+                    self._record_endpoint_failure(e, base_url)
+                    # Another endpoint takes over right away
+                    next_url = self._failover_endpoint(e, base_url, session) if retry.can_failover() else None
+                    if next_url:
+                        slot.release()
+                        base_url = next_url
+                        slot = self._acquire_slot(base_url, priority, cancel_token)
+                        if slot is None:
+                            return self._cancelled_response(user_input, session)
+                        failed_over = True
+                        continue
+                    # Stop retrying once the endpoint's circuit opens
+                    if not self.health.is_available(base_url) or not retry.should_retry(e):
+                        raise
+            
+            # Relay answer tokens as the model produces them; <think> reasoning is held back
+            streaming = True
+            truncated = False
+            tokens = []
+            done_chunk = None
+            think = self._think_filter()
+            while response is not None:
+                with response:
+                    for chunk in iter_ndjson(response):
+                        if cancel_token and cancel_token.cancelled:
+                            break
+                        if retry.expired:
+                            logger.warning(f"Response truncated at the {self.retry_policy.deadline}s request deadline")
+                            truncated = True
+                            break
+                        token = think.feed(self._chunk_text(chunk))
+                        if token:
+                            self._note_token(metrics)
+                            tokens.append(token)
+                            yield token
+                        if think.capped:
+                            break
+                        if chunk.get('done'):
+                            metrics.update_from_ollama(chunk)
+                            done_chunk = chunk
+                response = None
+                if think.capped and not truncated and not (cancel_token and cancel_token.cancelled):
+                    metrics.reasoning_capped = True
+                    response = self._force_answer(base_url, endpoint, payload, think, retry, cancel_token)
+            if cancel_token and cancel_token.cancelled:
+                return self._cancelled_response(user_input, session)
+            token = think.flush()
+            if token:
+                self._note_token(metrics)
+                tokens.append(token)
+                yield token
+            metrics.reasoning_tokens = think.reasoning_tokens
+            self.health.record_success(base_url)
+            
+            ai_message = self._record_answer(session, context_window, ''.join(tokens), done_chunk, truncated)
+            if ai_message is None:
+                logger.warning(f"Empty response from model: {self.model_name}")
+                return AIResponse(success=False, content="", error="Empty response from model")
+            self._schedule_compaction(session)
+            
+            # Only cache answers generated with the requested options
+            if cache_key and attempt == 0 and ai_message and not truncated:
+                self.response_cache.put(cache_key, ai_message)
+            
+            return AIResponse(success=True, content=ai_message, metrics=self._finish_metrics(metrics))
+            
+        except Exception as e:
+            # Cancellation aborts the socket, which surfaces as a transport error
+            if cancel_token and cancel_token.cancelled:
+                return self._cancelled_response(user_input, session)
+            # Request failures were already counted by the retry loop
+            if streaming:
+                self._record_endpoint_failure(e, base_url)
+            return self._error_response(e)
+        finally:
+            if slot:
+                slot.release()
+
+    def _build_request(self, context_window: List[Dict[str, str]], user_input: str,
+                       session: ConversationSession) -> Tuple[str, Dict[str, Any]]:
+        """Return the API path and streaming payload for a request - to be implemented by subclasses"""
+        raise NotImplementedError("Subclasses must implement _build_request")
+
+    def _chunk_text(self, chunk: Dict[str, Any]) -> str:
+        """Return the answer text of one streamed chunk - to be implemented by subclasses"""
+        raise NotImplementedError("Subclasses must implement _chunk_text")
+
+    def _record_answer(self, session: ConversationSession, context_window: List[Dict[str, str]],
+                       content: str, done_chunk: Optional[Dict[str, Any]], truncated: bool) -> Optional[str]:
+        """
+        Add a streamed answer to the session's history.
+        
+        Args:
+            session: Conversation the answer belongs to
+            context_window: Messages the request was built from
+            content: The answer's text
+            done_chunk: The final chunk of the stream, if one arrived
+            truncated: Whether the answer was cut short
+            
+        Returns:
+            Optional[str]: The answer as recorded, or None if the model gave no answer
+        """
+        if not content.strip():
+            return None
+        session.history.append({"role": "assistant", "content": content})
+        return content
+
+    def _error_response(self, error: Exception) -> AIResponse:
+        """Map a request failure to a user-facing AIResponse"""
+        if isinstance(error, requests.exceptions.HTTPError):
+            logger.error(f"HTTP error: {error}")
+            return AIResponse(
+                success=False,
+                content="I encountered an error connecting to the AI service. Please check if Ollama is running correctly.",
+                error=f"HTTP error: {error.response.status_code if error.response is not None else 'unknown'}"
+            )
+        if isinstance(error, requests.exceptions.Timeout):
+            logger.error(f"Request to {self.model_name} timed out")
+            return AIResponse(
+                success=False,
+                content="The AI model is taking too long to respond. It might be overloaded or still loading. Please try again in a moment.",
+                error="Request timed out"
+            )
+        if isinstance(error, requests.exceptions.ConnectionError):
+            logger.error("Failed to connect to Ollama")
+            return AIResponse(
+                success=False,
+                content="I can't connect to the AI service. Please make sure Ollama is running.",
+                error="Connection failed"
+            )
+        if isinstance(error, json.JSONDecodeError):
+            logger.error(f"Failed to decode JSON response: {error}")
+            return AIResponse(
+                success=False,
+                content="I received an invalid response from the AI service. This might be a temporary issue.",
+                error="Invalid response format"
+            )
+        logger.error(f"Error generating response: {error}")
+        return AIResponse(
+            success=False,
+            content="Sorry, I encountered an unexpected error. Please try again.",
+            error=f"Unexpected error: {str(error)}"
+        )
+
+    def _continuation_request(self, payload: Dict[str, Any], reasoning: str) -> Dict[str, Any]:
+        """Return a payload that resumes after closed reasoning - to be implemented by subclasses"""
+        raise NotImplementedError("Subclasses must implement _continuation_request")
+
+    def _think_filter(self) -> ThinkFilter:
+        """Create the filter that separates reasoning from answer tokens"""
+        return ThinkFilter(self.max_reasoning_tokens)
+
+    def _force_answer(self, base_url: str, endpoint: str, payload: Dict[str, Any], think: ThinkFilter,
+                      retry, cancel_token: Optional[CancellationToken]) -> requests.Response:
+        """
+        Close a reasoning segment that hit its cap and request the answer.
+        
+        The model is given its reasoning so far followed by </think>, so it
+        continues with the answer instead of thinking further.
+        
+        Args:
+            base_url: Endpoint that served the original request
+            endpoint: API path of the original request
+            payload: Original request payload
+            think: Filter whose reasoning segment was capped
+            retry: Retry state of the request, bounding the timeout
+            cancel_token: Optional token that aborts the request
+            
+        Returns:
+            requests.Response: The streaming continuation response
+        """
+        logger.info(f"Reasoning capped at {think.reasoning_tokens} tokens, requesting the answer")
+        response = get_transport().post(
+            f"{base_url}{endpoint}",
+            json=self._continuation_request(payload, think.force_answer()),
+            stream=True,
+            timeout=retry.timeout(self.request_timeout),
+            cancel_token=cancel_token
+        )
+        if not response.ok:
+            response.close()
+        response.raise_for_status()
+        return response
+
+    def _prepare_context_window(self, session: ConversationSession, user_input: str) -> List[Dict[str, str]]:
+        """Record the user turn, trim history and return the messages to send"""
+        self.residency.note_activity()
+        
+        # Pick up a summary finished in the background since the last turn
+        session.history, session.summary = session.compactor.apply(session.history, session.summary)
+        
+        # Add user input to conversation history
+        session.history.append({"role": "user", "content": user_input})
+        
+        # Keep conversation history manageable before making the request
+        if len(session.history) > self.conversation_history_limit:
+            session.history = session.history[-self.conversation_history_limit:]
+        
+        return self._build_context_window(session, session.history)
+
+    def _build_context_window(self, session: ConversationSession,
+                              history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Select the messages to send for a history ending in the user turn"""
+        # Apply memory optimization if enabled
+        context_window = history
+        summary_message = self._summary_message(session)
+        if self.memory_optimization:
+            # Send only the newest turns that fit num_ctx alongside the system prompt, summary and reply
+            reserved_prompt = self.system_prompt + (summary_message['content'] if summary_message else "")
+            context_window = self.context_builder.build(
+                history, self.context_length, self.max_tokens, reserved_prompt
+            )
+        if summary_message:
+            context_window = [summary_message] + context_window
+        return context_window
+
+    def _summary_message(self, session: ConversationSession) -> Optional[Dict[str, str]]:
+        """The rolling summary as a context message, if there is one"""
+        if not session.summary:
+            return None
+        return {"role": "system", "content": f"Summary of the earlier conversation: {session.summary}"}
+
+    def _schedule_compaction(self, session: ConversationSession) -> None:
+        """Summarize older turns in the background once history grows past the trigger"""
+        session.compactor.schedule(session.history, session.summary)
+
+    def prefill_async(self, partial_input: str, session_id: str = DEFAULT_SESSION) -> bool:
+        """
+        Prefill the prompt for text the user is still typing, in the background.
+        
+        Calls made while a prefill is running are coalesced: only the latest
+        text is prefilled next.
+        
+        Args:
+            partial_input: Current contents of the input box
+            session_id: Conversation the input belongs to
+            
+        Returns:
+            bool: True if a prefill was started or queued
+        """
+        if not self.prefill_enabled or len(partial_input.strip()) < self.prefill_min_chars:
+            return False
+        with self._prefill_lock:
+            self._prefill_input = (partial_input, session_id)
+            if self._prefill_running:
+                return True
+            self._prefill_running = True
+        threading.Thread(target=self._run_prefills, daemon=True, name="PromptPrefill").start()
+        return True
+
+    def _run_prefills(self) -> None:
+        """Prefill queued input until none is left (background thread)"""
+        while True:
+            with self._prefill_lock:
+                queued, self._prefill_input = self._prefill_input, None
+                if queued is None:
+                    self._prefill_running = False
+                    return
+            try:
+                self.prefill(*queued)
+            except Exception as e:
+                logger.debug(f"Prompt prefill failed: {e}")
+
+    def prefill(self, partial_input: str, session_id: str = DEFAULT_SESSION) -> bool:
+        """
+        Have Ollama process the prompt the next request will send, without answering.
+        
+        The system prompt, summary and history are evaluated into the model's
+        KV cache, so the real request only has to process what changed in the
+        user turn.
+        
+        Args:
+            partial_input: Text of the user turn so far
+            session_id: Conversation the input belongs to
+            
+        Returns:
+            bool: True if a prefill request was sent
+        """
+        session = self.sessions.get(session_id)
+        history = session.history + [{"role": "user", "content": partial_input}]
+        context_window = self._build_context_window(session, history[-self.conversation_history_limit:])
+        endpoint, payload = self._build_request(context_window, partial_input, session)
+        
+        # Identical prompts are already in the cache; the session's endpoint is the one to warm
+        prefill_key = json.dumps(payload, sort_keys=True)
+        base_url = self.endpoints.select(session_id)
+        if prefill_key == session.last_prefill or not self.health.is_available(base_url):
+            return False
+        
+        # Speculative work: a foreground request preempts it like any background request
+        cancel_token = CancellationToken()
+        slot = self.scheduler.acquire((base_url, self.model_name), Priority.BACKGROUND, cancel_token)
+        if slot is None:
+            return False
+        try:
+            self._run_prefill(base_url, endpoint, payload, session, cancel_token)
+        except Exception:
+            # Preemption aborts the request mid-flight
+            if not cancel_token.cancelled:
+                raise
+        finally:
+            slot.release()
+        if cancel_token.cancelled:
+            return False
+        
+        session.last_prefill = prefill_key
+        return True
+
+    def _run_prefill(self, base_url: str, endpoint: str, payload: Dict[str, Any],
+                     session: ConversationSession, cancel_token: CancellationToken) -> None:
+        """Evaluate a request's prompt without answering it (scheduler slot held)"""
+        # Same options as the real request (a different num_ctx would reload the model),
+        # but only one token is generated
+        payload = dict(payload, stream=False)
+        payload["options"] = dict(payload["options"], num_predict=1)
+        response = get_transport().post(
+            f"{base_url}{endpoint}", json=payload, timeout=self.request_timeout, cancel_token=cancel_token
+        )
+        response.raise_for_status()
+        result = response.json()
+        logger.debug(f"Prefilled {result.get('prompt_eval_count', 0)} prompt tokens in "
+                     f"{result.get('prompt_eval_duration', 0) / 1e9:.2f}s")
+
+    def _response_cache_key(self, context_window: List[Dict[str, str]],
+                            options: Dict[str, Any]) -> Optional[str]:
+        """Build the response cache key, or None if this request must not be cached"""
+        if self.response_cache.should_bypass(options.get('temperature', self.temperature)):
+            return None
+        # Providers format prompts differently, so entries are not shared between them
+        model = f"{type(self).__name__}:{self.model_name}"
+        return ResponseCache.make_key(model, self.system_prompt, context_window, options)
+
+    def _lookup_cached_response(self, cache_key: Optional[str],
+                                session: ConversationSession) -> Optional[str]:
+        """Return a cached response and record it in history, if one exists"""
+        if cache_key is None:
+            return None
+        content = self.response_cache.get(cache_key)
+        if content is not None:
+            session.history.append({"role": "assistant", "content": content})
+            logger.info(f"Serving cached response for model: {self.model_name}")
+        return content
+
+    def _start_metrics(self) -> GenerationMetrics:
+        """Begin timing a generation"""
+        return GenerationMetrics(model=self.model_name, started=time.perf_counter())
+
+    def _note_token(self, metrics: GenerationMetrics) -> None:
+        """Record the time to first token"""
+        if metrics.ttft is None:
+            metrics.ttft = time.perf_counter() - metrics.started
+
+    def _finish_metrics(self, metrics: GenerationMetrics, cached: bool = False) -> GenerationMetrics:
+        """Complete a generation's metrics and add them to the telemetry window"""
+        metrics.total_time = time.perf_counter() - metrics.started
+        metrics.cached = cached
+        # Cache hits are counted by the response cache and would skew model latency
+        if not cached:
+            get_telemetry().record(metrics)
+        return metrics
+
+    @staticmethod
+    def _is_endpoint_error(error: Exception) -> bool:
+        """Whether a failure is the endpoint's fault: a transport failure or a server error"""
+        if isinstance(error, requests.exceptions.HTTPError):
+            return error.response is None or error.response.status_code >= 500
+        return isinstance(error, requests.exceptions.RequestException)
+
+    def _record_endpoint_failure(self, error: Exception, base_url: str) -> None:
+        """Count transport failures and server errors against the endpoint's circuit"""
+        if self._is_endpoint_error(error):
+            self.health.record_failure(base_url)
+
+    def _failover_endpoint(self, error: Exception, base_url: str,
+                           session: ConversationSession) -> Optional[str]:
+        """Another endpoint to retry a request on after an endpoint failure, if there is one"""
+        if len(self.endpoints) < 2 or not self._is_endpoint_error(error):
+            return None
+        return self.endpoints.failover(base_url, session.session_id)
+
+    def _unavailable_response(self, base_url: str) -> AIResponse:
+        """Fail fast while the endpoint's circuit is open"""
+        logger.warning(f"Skipping request to {base_url}: service marked unavailable")
+        return AIResponse(
+            success=False,
+            content="I can't connect to the AI service. Please make sure Ollama is running.",
+            error="Service unavailable"
+        )
+
+    def _acquire_slot(self, base_url: str, priority: Priority, cancel_token: Optional[CancellationToken]):
+        """Wait for this model's turn on an endpoint; None if cancelled while queued"""
+        return self.scheduler.acquire((base_url, self.model_name), priority, cancel_token)
+
+    def _cancelled_response(self, user_input: str, session: ConversationSession) -> AIResponse:
+        """Drop the unanswered user turn and report the cancellation"""
+        if session.history and session.history[-1] == {"role": "user", "content": user_input}:
+            session.history.pop()
+        logger.info(f"Generation cancelled for model: {self.model_name}")
+        return AIResponse(success=False, content="", error=CANCELLED_ERROR)
+
+    def clear_conversation(self, session_id: str = DEFAULT_SESSION) -> None:
+        """Clear a session's conversation history."""
+        session = self.sessions.peek(session_id)
+        if session:
+            session.clear()
+        logger.debug(f"Cleared conversation history for session {session_id}")
+
+    def record_turn(self, user_input: str, content: str, session_id: str = DEFAULT_SESSION) -> None:
+        """
+        Add an exchange another model answered to a session's history.
+        
+        Keeps the conversation whole when a selector sends turns of one
+        session to different models.
+        
+        Args:
+            user_input: The user's message
+            content: The answer given by the other model
+            session_id: Conversation the exchange belongs to
+        """
+        session = self.sessions.get(session_id)
+        user_message = {"role": "user", "content": user_input}
+        # A failed or cancelled attempt on this model may have left the turn unanswered
+        if session.history and session.history[-1] == user_message:
+            session.history.pop()
+        session.history.extend([user_message, {"role": "assistant", "content": content}])
+        if len(session.history) > self.conversation_history_limit:
+            session.history = session.history[-self.conversation_history_limit:]
+        # Saved provider context no longer matches the history
+        session.invalidate_context()
+
+    def end_session(self, session_id: str) -> None:
+        """Discard a session's state once its client has gone"""
+        self.endpoints.forget(session_id)
+        if self.sessions.drop(session_id):
+            logger.debug(f"Ended conversation session {session_id}")
+
+    def get_session_stats(self) -> Dict[str, Any]:
+        """Return the number of live sessions and eviction counters"""
+        return self.sessions.get_stats()
 
-    def clear_conversation(self) -> None:
-        """Clear the conversation history."""
-        self.conversation_history = []
-        logger.debug("Cleared conversation history")
+    def get_endpoint_stats(self) -> Dict[str, Any]:
+        """Return each endpoint's load and health and the balancing counters"""
+        return self.endpoints.get_stats()
 
     def get_installed_apps(self) -> List[str]:
         """Return a list of installed applications."""
@@ -589,18 +1292,13 @@ class BaseAIManager:
 
     def get_automation_status(self) -> Dict[str, bool]:
         """Get status of all automation components"""
-        return {
-            "app_launcher": self.app_launcher is not None,
-            "reminder": self.reminder is not None,
-            "system_ctrl": self.system_ctrl is not None,
-            "web_actions": self.web_actions is not None
-        }
+        return self.automation.get_status()
             
     def exit_application(self) -> str:
             """Safely exit the application with cleanup"""
             try:
-                # Clean up any resources
-                if self.reminder:
+                # Clean up any resources; components never used are not built just to exit
+                if self.reminder.loaded:
                     # Save any pending reminders
                     self.reminder.save_reminders()
                     
@@ -0,0 +1,166 @@
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generator, Iterable, Optional
+
+from core.utils.cancellation import CancellationToken, CANCELLED_ERROR
+from .request_scheduler import Priority
+from .streaming import collect_stream
+from .telemetry import GenerationMetrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one prompt of a batch."""
+    index: int
+    prompt: str
+    success: bool
+    content: str
+    error: Optional[str] = None
+    metrics: Optional[GenerationMetrics] = None
+    # Seconds from the prompt's first attempt to its result
+    latency: float = 0.0
+    # Times a foreground request took the prompt's slot and it was requeued
+    preemptions: int = 0
+
+
+@dataclass
+class BatchStats:
+    """Aggregate throughput of a batch."""
+    prompts: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    generated_tokens: int = 0
+    elapsed: float = 0.0
+    prompts_per_second: float = 0.0
+    tokens_per_second: float = 0.0
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, result: BatchResult) -> None:
+        """Count a finished prompt"""
+        self.prompts += 1
+        if result.success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+            error = result.error or 'unknown'
+            self.errors[error] = self.errors.get(error, 0) + 1
+        if result.metrics:
+            self.generated_tokens += result.metrics.generated_tokens
+
+    def finish(self, elapsed: float) -> 'BatchStats':
+        """Compute the rates over the batch's wall-clock time"""
+        self.elapsed = elapsed
+        if elapsed > 0:
+            self.prompts_per_second = self.succeeded / elapsed
+            self.tokens_per_second = self.generated_tokens / elapsed
+        return self
+
+
+def run_batch(manager: Any, prompts: Iterable[str], max_concurrency: int,
+              priority: Priority = Priority.BACKGROUND,
+              cancel_token: Optional[CancellationToken] = None,
+              max_preemptions: int = 3) -> Generator[BatchResult, None, BatchStats]:
+    """
+    Generate responses to independent prompts, yielding each result as it finishes.
+
+    Prompts are read from the iterable lazily, so at most max_concurrency
+    are in flight. Each one runs in its own transient session, without
+    automation commands and without touching any conversation. Requests
+    still queue for the manager's scheduler slots. A background prompt
+    preempted by a foreground request is requeued up to max_preemptions
+    times.
+
+    Args:
+        manager: BaseAIManager generating the responses
+        prompts: Prompts to answer
+        max_concurrency: Prompts in flight at once
+        priority: Scheduling class of the requests
+        cancel_token: Optional token that aborts the remaining prompts
+        max_preemptions: Requeues allowed per prompt before it is reported
+            as cancelled
+
+    Returns:
+        BatchStats: Aggregate throughput, delivered as the generator's
+        return value
+    """
+    events = queue.Queue()
+    pending = iter(enumerate(prompts))
+    tokens: Dict[int, CancellationToken] = {}
+    unregisters: Dict[int, Callable[[], None]] = {}
+    stats = BatchStats()
+    started = time.perf_counter()
+    in_flight = 0
+    exhausted = False
+
+    def launch(index: int, prompt: str, preemptions: int = 0, first_started: Optional[float] = None) -> None:
+        child_token = CancellationToken()
+        if cancel_token:
+            unregisters[index] = cancel_token.register(child_token.cancel)
+        tokens[index] = child_token
+        threading.Thread(
+            target=_run_prompt,
+            args=(manager, index, prompt, child_token, priority, events, preemptions,
+                  first_started or time.perf_counter()),
+            daemon=True,
+            name="BatchPrompt"
+        ).start()
+
+    try:
+        while True:
+            while not exhausted and in_flight < max_concurrency and not (cancel_token and cancel_token.cancelled):
+                item = next(pending, None)
+                if item is None:
+                    exhausted = True
+                    break
+                launch(*item)
+                in_flight += 1
+            if in_flight == 0:
+                break
+
+            result, first_started = events.get()
+            tokens.pop(result.index, None)
+            unregisters.pop(result.index, lambda: None)()
+            preempted = result.error == CANCELLED_ERROR and not (cancel_token and cancel_token.cancelled)
+            if preempted and result.preemptions < max_preemptions:
+                logger.debug(f"Batch prompt {result.index} was preempted, requeueing")
+                launch(result.index, result.prompt, result.preemptions + 1, first_started)
+                continue
+            in_flight -= 1
+            stats.add(result)
+            yield result
+    finally:
+        # The consumer stopped early; abort the prompts still running
+        for child_token in list(tokens.values()):
+            child_token.cancel()
+        for unregister in list(unregisters.values()):
+            unregister()
+
+    stats.finish(time.perf_counter() - started)
+    logger.info(f"Batch of {stats.prompts} prompts on {manager.model_name} finished in {stats.elapsed:.1f}s: "
+                f"{stats.prompts_per_second:.2f} prompts/s, {stats.tokens_per_second:.1f} tokens/s, "
+                f"{stats.failed} failed")
+    return stats
+
+
+def _run_prompt(manager: Any, index: int, prompt: str, cancel_token: CancellationToken,
+                priority: Priority, events: queue.Queue, preemptions: int, first_started: float) -> None:
+    """Answer one prompt in a transient session and post the result (worker thread)"""
+    session = manager.sessions.create_transient()
+    try:
+        response = collect_stream(manager.generate_response_stream(
+            prompt, cancel_token, automation=False, priority=priority, session_id=session.session_id
+        ))
+        result = BatchResult(index, prompt, response.success, response.content, response.error,
+                             response.metrics, preemptions=preemptions)
+    except Exception as e:
+        logger.error(f"Batch prompt {index} failed: {e}")
+        result = BatchResult(index, prompt, False, "", str(e), preemptions=preemptions)
+    finally:
+        manager.end_session(session.session_id)
+    result.latency = time.perf_counter() - first_started
+    events.put((result, first_started))
@@ -0,0 +1,102 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ContextBuilder:
+    """Packs the newest conversation turns into the model's context budget."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the context builder.
+
+        Args:
+            config: Dictionary containing context configuration
+        """
+        config = config or {}
+        self.context_share = config.get('context_share', 0.85)
+        self.chars_per_token = config.get('chars_per_token', 4.0)
+        # Role markers and separators the model sees around each message
+        self.message_overhead = config.get('message_overhead', 4)
+        self.cache_size = config.get('estimate_cache_size', 2048)
+
+        self._estimates: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def estimate(self, text: str) -> int:
+        """
+        Estimate the token count of a piece of text, caching the result.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            int: Approximate number of tokens
+        """
+        with self._lock:
+            tokens = self._estimates.get(text)
+            if tokens is not None:
+                self._estimates.move_to_end(text)
+                return tokens
+
+        tokens = int(len(text) / self.chars_per_token) + 1
+        with self._lock:
+            self._estimates[text] = tokens
+            if len(self._estimates) > self.cache_size:
+                self._estimates.popitem(last=False)
+        return tokens
+
+    def message_tokens(self, message: Dict[str, str]) -> int:
+        """Estimated tokens for a chat message, including role overhead"""
+        return self.estimate(message.get('content', '')) + self.message_overhead
+
+    def budget(self, context_length: int, max_tokens: int, system_prompt: str) -> int:
+        """
+        Tokens available for conversation history.
+
+        Args:
+            context_length: Model context size (num_ctx)
+            max_tokens: Tokens reserved for the response
+            system_prompt: System prompt, which is always sent
+
+        Returns:
+            int: History budget in tokens
+        """
+        limit = min(int(context_length * self.context_share), context_length - max_tokens)
+        return limit - self.estimate(system_prompt) - self.message_overhead
+
+    def build(self, history: List[Dict[str, str]], context_length: int, max_tokens: int,
+              system_prompt: str) -> List[Dict[str, str]]:
+        """
+        Select the newest messages that fit the budget, in chronological order.
+
+        The latest message is always included, even if it exceeds the budget
+        on its own.
+
+        Args:
+            history: Conversation history, oldest first
+            context_length: Model context size (num_ctx)
+            max_tokens: Tokens reserved for the response
+            system_prompt: System prompt, which is always sent
+
+        Returns:
+            List[Dict[str, str]]: Messages to send
+        """
+        remaining = self.budget(context_length, max_tokens, system_prompt)
+        selected = []
+        for message in reversed(history):
+            tokens = self.message_tokens(message)
+            if selected and tokens > remaining:
+                break
+            selected.append(message)
+            remaining -= tokens
+
+        if remaining < 0:
+            logger.warning(f"Latest message exceeds the context budget by ~{-remaining} tokens")
+        if len(selected) < len(history):
+            logger.debug(f"Context window holds {len(selected)} of {len(history)} messages")
+        selected.reverse()
+        return selected
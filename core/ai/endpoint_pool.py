@@ -0,0 +1,144 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Union
+
+from .request_scheduler import RequestScheduler
+from core.utils.endpoint_health import EndpointHealthMonitor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'http://localhost:11434'
+
+
+def endpoint_urls(base_url: Union[str, List[str], None]) -> List[str]:
+    """Normalize a base_url setting (one URL or a list of them) to a list"""
+    if not base_url:
+        return [DEFAULT_BASE_URL]
+    if isinstance(base_url, str):
+        return [base_url.rstrip('/')]
+    return [url.rstrip('/') for url in base_url]
+
+
+class EndpointPool:
+    """Chooses which of a model's Ollama endpoints serves each request."""
+
+    def __init__(self, urls: List[str], health: EndpointHealthMonitor, scheduler: RequestScheduler,
+                 config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            urls: Endpoints serving the model, in order of preference
+            health: Monitor whose circuits decide which endpoints are usable
+            scheduler: Scheduler whose queues measure each endpoint's load
+            config: Dictionary containing load balancing configuration
+        """
+        config = config or {}
+        self.urls = list(urls)
+        self.health = health
+        self.scheduler = scheduler
+        # A session leaves its endpoint (and the KV cache there) only for a clearly lighter one
+        self.sticky_max_imbalance = config.get('sticky_max_imbalance', 2)
+        self.max_sticky_sessions = config.get('max_sticky_sessions', 1024)
+
+        self._sticky: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'selected': {url: 0 for url in self.urls}, 'rebalanced': 0, 'failovers': 0}
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def _load(self, url: str) -> int:
+        return self.scheduler.outstanding(url)
+
+    def _least_loaded(self, candidates: List[str]) -> str:
+        """Endpoint with the fewest outstanding requests; ties go to the earlier one"""
+        return min(candidates, key=lambda url: (self._load(url), self.urls.index(url)))
+
+    def select(self, session_id: Optional[str] = None, exclude: Iterable[str] = ()) -> str:
+        """
+        Pick the endpoint for a request.
+
+        A session keeps using the endpoint that served it before, so the
+        server's cached prompt prefix is reused, unless that endpoint is down
+        or has sticky_max_imbalance more outstanding requests than the least
+        loaded one.
+
+        Args:
+            session_id: Conversation the request belongs to; None for
+                requests with no conversation state
+            exclude: Endpoints that must not be chosen
+
+        Returns:
+            str: Endpoint URL; the preferred one if none is usable, so the
+            caller's circuit check reports the outage
+        """
+        if len(self.urls) == 1:
+            return self.urls[0]
+        excluded = set(exclude)
+        candidates = [url for url in self.urls if url not in excluded and self.health.is_available(url)]
+        if not candidates:
+            return next((url for url in self.urls if url not in excluded), self.urls[0])
+
+        chosen = self._least_loaded(candidates)
+        with self._lock:
+            sticky = self._sticky.get(session_id) if session_id is not None else None
+            if sticky in candidates and sticky != chosen:
+                if self._load(sticky) - self._load(chosen) <= self.sticky_max_imbalance:
+                    chosen = sticky
+                else:
+                    self.stats['rebalanced'] += 1
+                    logger.debug(f"Moving session {session_id} from {sticky} to less loaded {chosen}")
+            if session_id is not None:
+                self._sticky[session_id] = chosen
+                self._sticky.move_to_end(session_id)
+                while len(self._sticky) > self.max_sticky_sessions:
+                    self._sticky.popitem(last=False)
+            self.stats['selected'][chosen] += 1
+        return chosen
+
+    def failover(self, failed_url: str, session_id: Optional[str] = None) -> Optional[str]:
+        """
+        Pick another endpoint after a request to one failed.
+
+        Args:
+            failed_url: Endpoint the request failed on
+            session_id: Conversation the request belongs to; it is moved to
+                the new endpoint
+
+        Returns:
+            Optional[str]: A usable endpoint other than the failed one, or None
+        """
+        candidates = [url for url in self.urls if url != failed_url and self.health.is_available(url)]
+        if not candidates:
+            return None
+        url = self.select(session_id, exclude=[failed_url])
+        with self._lock:
+            self.stats['failovers'] += 1
+        logger.warning(f"Request to {failed_url} failed, failing over to {url}")
+        return url
+
+    def forget(self, session_id: str) -> None:
+        """Drop a session's endpoint binding"""
+        with self._lock:
+            self._sticky.pop(session_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return each endpoint's load and circuit state plus selection counters"""
+        with self._lock:
+            selected = dict(self.stats['selected'])
+            sessions = {url: 0 for url in self.urls}
+            for url in self._sticky.values():
+                sessions[url] += 1
+            counters = {'rebalanced': self.stats['rebalanced'], 'failovers': self.stats['failovers']}
+        endpoints = {
+            url: {
+                'outstanding': self._load(url),
+                'available': self.health.is_available(url),
+                'selected': selected[url],
+                'sessions': sessions[url],
+            }
+            for url in self.urls
+        }
+        return dict(counters, endpoints=endpoints)
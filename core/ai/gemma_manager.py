@@ -1,9 +1,10 @@
 import os
-import json
-import requests
 import logging
-from typing import Dict, Any
-from .base_ai_manager import BaseAIManager, AIResponse
+from typing import Dict, Any, List, Optional, Tuple
+from .base_ai_manager import BaseAIManager
+from .request_scheduler import Priority
+from .session_store import ConversationSession, DEFAULT_SESSION
+from core.utils.cancellation import CancellationToken, CANCELLED_ERROR
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +26,9 @@ class GemmaManager(BaseAIManager):
         
         super().__init__(config, reminder_callback)
         
+        # Continue from Ollama's `context` token state, kept per session, from the last turn
+        self.reuse_context = config.get('reuse_context', True)
+        
         # Check if Ollama is running and if the Gemma model is available
         self._check_service_status()
 
@@ -40,23 +44,16 @@ class GemmaManager(BaseAIManager):
         
         return resolved_name
 
-    def _get_ai_response(self, user_input: str) -> AIResponse:
-        """Generate a response from the Gemma model with optimized performance."""
-        try:
-            # Add user input to conversation history
-            self.conversation_history.append({"role": "user", "content": user_input})
-            
-            # Keep conversation history manageable before making the request
-            if hasattr(self, 'conversation_history_limit'):
-                if len(self.conversation_history) > self.conversation_history_limit:
-                    self.conversation_history = self.conversation_history[-self.conversation_history_limit:]
-            
-            # Apply memory optimization if enabled
-            context_window = self.conversation_history
-            if hasattr(self, 'memory_optimization') and self.memory_optimization:
-                # Use only the most recent conversations to reduce memory usage
-                context_window = self.conversation_history[-min(5, len(self.conversation_history)):]
-            
+    def _build_request(self, context_window: List[Dict[str, str]], user_input: str,
+                       session: ConversationSession) -> Tuple[str, Dict[str, Any]]:
+        """Prepare the generate API request, continuing from the saved context when possible"""
+        # Continue from the previous turn's context when it still matches the history,
+        # so only the new message is prefilled
+        prompt_context = self._reusable_context(context_window, session)
+        if prompt_context is not None:
+            full_prompt = f"\nUser: {user_input}\nAssistant: "
+            logger.debug(f"Reusing {len(prompt_context)} context tokens")
+        else:
             # Prepare the prompt - optimize for token efficiency
             full_prompt = f"{self.system_prompt}\n\n"
             
@@ -68,115 +65,92 @@ class GemmaManager(BaseAIManager):
                     full_prompt += f"{role.capitalize()}: {content}\n"
             
             full_prompt += f"Assistant: "
-            
-            # Optimize request parameters
-            data = {
-                "prompt": full_prompt,
-                "model": self._resolve_model_name(self.model_name),
-                "stream": False,
-                "options": {
-                    "temperature": self.temperature,
-                    "num_predict": self.max_tokens,
-                    "num_ctx": self.context_length
-                }
+        
+        # Optimize request parameters
+        data = {
+            "prompt": full_prompt,
+            "model": self._resolve_model_name(self.model_name),
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": self.temperature,
+                "num_predict": self.max_tokens,
+                "num_ctx": self.context_length
             }
-            
-            # Implement retry logic
-            retry_attempts = getattr(self, 'retry_attempts', 2)
-            for attempt in range(retry_attempts):
-                try:
-                    # Adjust parameters for retry
-                    if attempt > 0:
-                        logger.warning(f"Retry attempt {attempt} with reduced parameters")
-                        data["options"]["num_predict"] = min(data["options"]["num_predict"], 256)
-                        data["options"]["temperature"] = max(0.1, self.temperature - 0.2)
-                    
-                    # Set timeout based on attempt
-                    timeout = getattr(self, 'request_timeout', 30) * (1 + attempt * 0.5)
-                    
-                    response = requests.post(
-                        f"{self.base_url}/api/generate", 
-                        json=data, 
-                        stream=False,
-                        timeout=timeout
-                    )
-                    response.raise_for_status()
-                    
-                    # If successful, break out of retry loop
-                    break
-                        
-                except (requests.exceptions.Timeout, requests.exceptions.HTTPError):
-                    if attempt == retry_attempts - 1:  # Last attempt
-                        raise
-                    logger.warning("Request failed, will retry with reduced parameters")
-                    continue
-            
-            response_data = response.json()
-            model_response = response_data.get('response', '').strip()
-            
-            if model_response:
-                # Update conversation history efficiently
-                self.conversation_history.append({"role": "assistant", "content": model_response})
-                
-                return AIResponse(success=True, content=model_response)
-            else:
-                logger.warning("Empty response from Gemma model")
-                return AIResponse(
-                    success=False, 
-                    content="", 
-                    error="Empty response from model"
-                )
-    
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP error: {e}")
-            return AIResponse(
-                success=False, 
-                content="I encountered an error connecting to the AI service. Please check if Ollama is running correctly.",
-                error=f"HTTP error: {e.response.status_code if hasattr(e, 'response') else 'unknown'}"
-            )
-        except requests.exceptions.Timeout:
-            logger.error("Request to Gemma model timed out")
-            return AIResponse(
-                success=False, 
-                content="The AI model is taking too long to respond. It might be overloaded or still loading. Please try again in a moment.",
-                error="Request timed out"
-            )
-        except requests.exceptions.ConnectionError:
-            logger.error("Failed to connect to Ollama for Gemma")
-            return AIResponse(
-                success=False, 
-                content="I can't connect to the AI service. Please make sure Ollama is running.",
-                error="Connection failed"
-            )
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to decode JSON response: {e}")
-            return AIResponse(
-                success=False, 
-                content="I received an invalid response from the AI service. This might be a temporary issue.",
-                error="Invalid response format"
-            )
-        except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            return AIResponse(
-                success=False, 
-                content="Sorry, I encountered an unexpected error. Please try again.",
-                error=f"Unexpected error: {str(e)}"
-            )
+        }
+        if prompt_context is not None:
+            data["context"] = prompt_context
+        return "/api/generate", data
+
+    def _continuation_request(self, payload: Dict[str, Any], reasoning: str) -> Dict[str, Any]:
+        """Continue the transcript after the closed reasoning"""
+        return dict(payload, prompt=f"{payload['prompt']}<think>{reasoning}</think>\n\n")
+
+    def _chunk_text(self, chunk: Dict[str, Any]) -> str:
+        """Generate chunks carry the answer in response"""
+        return chunk.get('response', '')
+
+    def _record_answer(self, session: ConversationSession, context_window: List[Dict[str, str]],
+                       content: str, done_chunk: Optional[Dict[str, Any]], truncated: bool) -> Optional[str]:
+        """Record the answer with the encoded context of the turn, so the next one can continue it"""
+        # Leading whitespace of the answer is dropped
+        content = content.strip()
+        if not content:
+            return None
+        assistant_message = {"role": "assistant", "content": content}
+        next_context = done_chunk.get('context') if done_chunk else None
+        if next_context and not truncated:
+            session.prompt_context = next_context
+            session.prompt_context_messages = list(context_window) + [assistant_message]
+        else:
+            session.invalidate_context()
+        session.history.append(assistant_message)
+        return content
+
+    def _reusable_context(self, context_window: List[Dict[str, str]],
+                          session: ConversationSession) -> Optional[List[int]]:
+        """
+        Return the saved context if the window only adds the new user turn to it.
+        
+        Trimmed or cleared history no longer matches the encoded messages, and a
+        context that would overflow num_ctx is not reused; both fall back to a
+        full prompt. The session is only read: prefills build requests
+        concurrently with the foreground turn, which replaces the saved
+        context when it completes.
+        """
+        prompt_context, messages = session.prompt_context, session.prompt_context_messages
+        if not self.reuse_context or prompt_context is None:
+            return None
+        if context_window[:-1] != messages:
+            return None
+        new_tokens = self.context_builder.message_tokens(context_window[-1])
+        if len(prompt_context) + new_tokens + self.max_tokens > self.context_length:
+            logger.debug("Saved context would overflow num_ctx, sending the full prompt")
+            return None
+        return prompt_context
 
-    def generate_response(self, user_input: str) -> str:
+    def generate_response(self, user_input: str,
+                          cancel_token: Optional[CancellationToken] = None,
+                          priority: Priority = Priority.CHAT,
+                          session_id: str = DEFAULT_SESSION) -> str:
         """
         Generate a response using Gemma with fallback error handling.
         
         Args:
             user_input: The user's message
+            cancel_token: Optional token to abort the generation
+            priority: Scheduling class of the request
+            session_id: Conversation the message belongs to
             
         Returns:
             str: The AI response or error message
         """
-        ai_response = super().generate_response(user_input)
+        ai_response = super().generate_response(user_input, cancel_token, priority, session_id)
         
         if ai_response.success:
             return ai_response.content
+        elif ai_response.error == CANCELLED_ERROR:
+            return f"{CANCELLED_ERROR}."
         else:
             error_msg = ai_response.error or "Unknown error occurred"
             return f"Sorry, I encountered an error: {error_msg}"
\ No newline at end of file
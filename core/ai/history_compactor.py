@@ -0,0 +1,155 @@
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from core.utils.http_transport import get_transport
+from core.utils.endpoint_health import get_health_monitor
+from core.utils.cancellation import CancellationToken
+from .request_scheduler import Priority, get_scheduler
+from .streaming import strip_reasoning
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_INSTRUCTIONS = (
+    "Summarize the conversation below in a few sentences so it can be continued later. "
+    "Keep names, facts, preferences, decisions and open tasks; leave out greetings and filler."
+)
+
+
+class HistoryCompactor:
+    """Folds older conversation turns into a rolling summary in the background."""
+
+    def __init__(self, config: Dict[str, Any], base_url: str, default_model: str, keep_alive: str):
+        """
+        Initialize the compactor.
+
+        Args:
+            config: Dictionary containing compaction configuration
+            base_url: Ollama endpoint used for summarization
+            default_model: Model used when no summary model is configured
+            keep_alive: keep_alive sent with summarization requests
+        """
+        self.enabled = config.get('enabled', True)
+        self.trigger_messages = config.get('trigger_messages', 8)
+        self.keep_recent = config.get('keep_recent', 4)
+        self.model = config.get('model') or default_model
+        self.max_summary_tokens = config.get('max_summary_tokens', 200)
+        self.timeout = config.get('timeout', 60)
+        self.base_url = base_url
+        self.keep_alive = keep_alive
+
+        # (summary, summarized messages) waiting to be applied by the foreground
+        self._pending: Optional[Tuple[str, List[Dict[str, str]]]] = None
+        self._running = False
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def schedule(self, history: List[Dict[str, str]], summary: str) -> bool:
+        """
+        Start summarizing older turns if the history has grown past the trigger.
+
+        Args:
+            history: Current conversation history
+            summary: Current rolling summary
+
+        Returns:
+            bool: True if a background summarization was started
+        """
+        if not self.enabled or len(history) <= self.trigger_messages:
+            return False
+        with self._lock:
+            if self._running or self._pending is not None:
+                return False
+            self._running = True
+            epoch = self._epoch
+
+        old_messages = list(history[:-self.keep_recent] if self.keep_recent else history)
+        threading.Thread(
+            target=self._summarize, args=(old_messages, summary, epoch),
+            daemon=True, name="HistoryCompactor"
+        ).start()
+        return True
+
+    def apply(self, history: List[Dict[str, str]],
+              summary: str) -> Tuple[List[Dict[str, str]], str]:
+        """
+        Apply a finished summary, removing the turns it covers.
+
+        Called from the foreground before building a request, so history is
+        never modified concurrently.
+
+        Args:
+            history: Current conversation history
+            summary: Current rolling summary
+
+        Returns:
+            Tuple[List[Dict[str, str]], str]: Compacted history and summary
+        """
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is None:
+            return history, summary
+
+        new_summary, summarized = pending
+        # Turns already dropped by the history limit are simply no longer present
+        summarized_ids = {id(message) for message in summarized}
+        compacted = [message for message in history if id(message) not in summarized_ids]
+        logger.info(f"Compacted {len(history) - len(compacted)} messages into the conversation summary")
+        return compacted, new_summary
+
+    def reset(self) -> None:
+        """Discard pending and in-flight summaries, e.g. when the conversation is cleared"""
+        with self._lock:
+            self._epoch += 1
+            self._pending = None
+
+    def _summarize(self, messages: List[Dict[str, str]], summary: str, epoch: int) -> None:
+        """Summarize messages into the rolling summary (background thread)"""
+        # Waits behind, and is cancelled for, foreground requests
+        cancel_token = CancellationToken()
+        slot = None
+        try:
+            if not get_health_monitor().is_available(self.base_url):
+                return
+            slot = get_scheduler().acquire((self.base_url, self.model), Priority.BACKGROUND, cancel_token)
+            transcript = "\n".join(
+                f"{message.get('role', 'user').capitalize()}: {message.get('content', '')}"
+                for message in messages
+            )
+            prompt = f"{SUMMARY_INSTRUCTIONS}\n\n"
+            if summary:
+                prompt += f"Earlier summary: {summary}\n\n"
+            prompt += f"{transcript}\n\nSummary:"
+
+            response = get_transport().post(
+                f"{self.base_url}/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "stream": False,
+                    "keep_alive": self.keep_alive,
+                    "options": {"temperature": 0.2, "num_predict": self.max_summary_tokens}
+                },
+                timeout=self.timeout,
+                cancel_token=cancel_token
+            )
+            response.raise_for_status()
+            # Reasoning models wrap their thoughts in <think> tags
+            new_summary = strip_reasoning(response.json().get('response', ''))
+            if not new_summary:
+                return
+
+            with self._lock:
+                if epoch == self._epoch:
+                    self._pending = (new_summary, messages)
+            logger.debug(f"Summarized {len(messages)} messages with {self.model}")
+        except Exception as e:
+            if cancel_token.cancelled:
+                logger.debug("Conversation compaction preempted by a foreground request")
+            else:
+                logger.warning(f"Conversation compaction failed: {e}")
+        finally:
+            if slot:
+                slot.release()
+            with self._lock:
+                self._running = False
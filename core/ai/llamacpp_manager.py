@@ -0,0 +1,380 @@
+import os
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Generator, List, Optional, Tuple
+from .base_ai_manager import BaseAIManager, AIResponse
+from .history_compactor import HistoryCompactor
+from .request_scheduler import Priority
+from .session_store import ConversationSession, DEFAULT_SESSION
+from core.utils.cancellation import CancellationToken, CANCELLED_ERROR
+
+logger = logging.getLogger(__name__)
+
+
+class LlamaCppManager(BaseAIManager):
+    """
+    Runs GGUF models in-process through the llama.cpp bindings.
+
+    Requests skip the Ollama daemon and its HTTP/JSON round trip: weights are
+    memory-mapped into this process, tokens come straight from the sampler,
+    and each session's KV cache is kept so follow-up turns only evaluate
+    what is new.
+    """
+
+    def __init__(self, config: Dict[str, Any], reminder_callback):
+        """
+        Initialize the llama.cpp manager (the model loads on first use).
+
+        Args:
+            config: Dictionary containing llama.cpp configuration
+            reminder_callback: Callback function for reminders
+        """
+        self.model_path = config.get('model_path', '')
+        config = dict(config)
+        config.setdefault('model', os.path.splitext(os.path.basename(self.model_path))[0] or 'llamacpp')
+        # Identifies the backend to the scheduler and in logs; nothing is requested from it
+        config['base_url'] = f"llamacpp://{self.model_path}"
+
+        # Threads for generation (one per physical core suits CPU inference) and for prompt batches
+        cpu_count = os.cpu_count() or 2
+        self.n_threads = config.get('n_threads') or max(1, cpu_count // 2)
+        self.n_threads_batch = config.get('n_threads_batch') or cpu_count
+        self.n_batch = config.get('n_batch', 512)
+        self.use_mmap = config.get('use_mmap', True)
+        self.use_mlock = config.get('use_mlock', False)
+        self.n_gpu_layers = config.get('n_gpu_layers', 0)
+        # KV caches of idle sessions kept in memory; older ones are re-evaluated when resumed
+        self.max_saved_states = config.get('max_saved_states', 4)
+
+        self.llm = None
+        self.load_time = 0.0
+        self.load_error: Optional[str] = None
+        self._formatter = None
+        self._load_lock = threading.Lock()
+        # One context evaluates one sequence at a time; completions run on a worker
+        # thread, so the lock is never held while a consumer reads the stream
+        self._llm_lock = threading.Lock()
+        self._resident: Optional[ConversationSession] = None
+        self._saved_states: "OrderedDict[str, ConversationSession]" = OrderedDict()
+
+        super().__init__(config, reminder_callback)
+
+        if self._check_service_status() and self.preload_models:
+            self.prepare_for_use()
+
+    def _register_backend(self) -> None:
+        # In-process: no endpoint for the residency manager or health monitor to poll
+        pass
+
+    def _create_session(self, session_id: str) -> ConversationSession:
+        """Create a session; history summaries need an Ollama endpoint, so compaction is off"""
+        compactor = HistoryCompactor(dict(self.compaction_config, enabled=False), self.base_url,
+                                     self.model_name, self.keep_alive)
+        return ConversationSession(session_id, compactor=compactor)
+
+    def _check_service_status(self) -> bool:
+        """Check that the bindings are installed and the model file exists, without loading it"""
+        if not os.path.isfile(self.model_path):
+            logger.error(f"GGUF model not found: {self.model_path}")
+            return False
+        try:
+            import llama_cpp  # noqa: F401
+        except ImportError:
+            logger.error("llama-cpp-python is not installed; install it to use the llamacpp provider")
+            return False
+        return True
+
+    def _ensure_loaded(self) -> bool:
+        """Load the model on first use; returns False if it cannot be loaded"""
+        if self.llm is not None:
+            return True
+        with self._load_lock:
+            if self.llm is not None:
+                return True
+            if self.load_error:
+                return False
+            start = time.perf_counter()
+            try:
+                from llama_cpp import Llama
+                from llama_cpp.llama_chat_format import Jinja2ChatFormatter
+                llm = Llama(
+                    model_path=self.model_path,
+                    n_ctx=self.context_length,
+                    n_threads=self.n_threads,
+                    n_threads_batch=self.n_threads_batch,
+                    n_batch=self.n_batch,
+                    n_gpu_layers=self.n_gpu_layers,
+                    use_mmap=self.use_mmap,
+                    use_mlock=self.use_mlock,
+                    verbose=False
+                )
+                # Format prompts with the chat template shipped in the GGUF file
+                template = llm.metadata.get('tokenizer.chat_template')
+                if template:
+                    def token_text(token_id: int) -> str:
+                        if token_id == -1:
+                            return ""
+                        return llm.detokenize([token_id], special=True).decode('utf-8', errors='ignore')
+                    self._formatter = Jinja2ChatFormatter(
+                        template=template,
+                        eos_token=token_text(llm.token_eos()),
+                        bos_token=token_text(llm.token_bos()),
+                        stop_token_ids=[llm.token_eos()]
+                    )
+            except Exception as e:
+                self.load_error = str(e)
+                logger.error(f"Failed to load {self.model_path}: {e}")
+                return False
+            self.load_time = time.perf_counter() - start
+            self.llm = llm
+            logger.info(f"Loaded {self.model_name} in-process in {self.load_time:.1f}s "
+                        f"({self.n_threads} threads, mmap={'on' if self.use_mmap else 'off'})")
+            return True
+
+    def prepare_for_use(self) -> None:
+        """Load the model in the background ahead of an expected request"""
+        if self.llm is None:
+            threading.Thread(target=self._ensure_loaded, daemon=True, name="LlamaCppLoad").start()
+
+    def _activate(self, session: ConversationSession) -> None:
+        """Swap the session's KV cache into the context (llm lock held)"""
+        if self._resident is session:
+            return
+        resident = self._resident
+        # Keep the outgoing session's cache unless the session has since been dropped
+        if resident is not None and self.max_saved_states > 0 and \
+                self.sessions.peek(resident.session_id) is resident:
+            resident.kv_state = self.llm.save_state()
+            self._saved_states[resident.session_id] = resident
+            self._saved_states.move_to_end(resident.session_id)
+            while len(self._saved_states) > self.max_saved_states:
+                _, oldest = self._saved_states.popitem(last=False)
+                oldest.kv_state = None
+        self._saved_states.pop(session.session_id, None)
+        # Without a saved cache the current one is kept: the system prompt prefix is shared
+        if session.kv_state is not None:
+            self.llm.load_state(session.kv_state)
+            session.kv_state = None
+        self._resident = session
+
+    def _build_request(self, context_window: List[Dict[str, str]], user_input: str,
+                       session: ConversationSession) -> Tuple[str, Dict[str, Any]]:
+        """Format the prompt with the model's chat template"""
+        self._ensure_loaded()
+        messages = [{"role": "system", "content": self.system_prompt}] + context_window
+        if self._formatter is not None:
+            formatted = self._formatter(messages=messages)
+            prompt, stop, add_bos = formatted.prompt, formatted.stop, not formatted.added_special
+        else:
+            prompt = "".join(f"{msg['role'].capitalize()}: {msg['content']}\n" for msg in messages) + "Assistant: "
+            stop, add_bos = ["\nUser:"], True
+        payload = {
+            "prompt": prompt,
+            "stop": stop,
+            "add_bos": add_bos,
+            "options": {
+                "temperature": self.temperature,
+                "max_tokens": self.max_tokens,
+                "num_ctx": self.context_length
+            }
+        }
+        return "completion", payload
+
+    def _continuation_request(self, payload: Dict[str, Any], reasoning: str) -> Dict[str, Any]:
+        """Continue the transcript after the closed reasoning"""
+        return dict(payload, prompt=f"{payload['prompt']}<think>{reasoning}</think>\n\n")
+
+    def _completion(self, payload: Dict[str, Any], max_tokens: Optional[int] = None):
+        """Start a streamed completion of the payload's prompt (llm lock held)"""
+        tokens = self.llm.tokenize(payload["prompt"].encode('utf-8'), add_bos=payload["add_bos"], special=True)
+        stream = self.llm.create_completion(
+            tokens,
+            max_tokens=max_tokens or payload["options"]["max_tokens"],
+            temperature=payload["options"]["temperature"],
+            stop=payload["stop"],
+            stream=True
+        )
+        return len(tokens), stream
+
+    def _run_prefill(self, base_url: str, endpoint: str, payload: Dict[str, Any],
+                     session: ConversationSession, cancel_token: CancellationToken) -> None:
+        """Evaluate the prompt into the session's KV cache, generating a single token"""
+        if not self._ensure_loaded():
+            return
+        start = time.perf_counter()
+        with self._llm_lock:
+            if cancel_token.cancelled:
+                return
+            self._activate(session)
+            prompt_tokens, stream = self._completion(payload, max_tokens=1)
+            for _ in stream:
+                pass
+        logger.debug(f"Prefilled {prompt_tokens} prompt tokens in {time.perf_counter() - start:.2f}s")
+
+    def _stream_ai_response(self, user_input: str,
+                            cancel_token: Optional[CancellationToken] = None,
+                            priority: Priority = Priority.CHAT,
+                            session_id: str = DEFAULT_SESSION) -> Generator[str, None, AIResponse]:
+        """Stream tokens from the in-process model"""
+        session = self.sessions.get(session_id)
+        metrics = self._start_metrics()
+        slot = None
+        try:
+            already_loaded = self.llm is not None
+            if not self._ensure_loaded():
+                return AIResponse(
+                    success=False,
+                    content="The local model could not be loaded. Please check the model path.",
+                    error=f"Model load failed: {self.load_error}"
+                )
+            if not already_loaded:
+                metrics.load_time = self.load_time
+
+            context_window = self._prepare_context_window(session, user_input)
+            endpoint, payload = self._build_request(context_window, user_input, session)
+
+            # Repeated prompts are answered from the response cache
+            cache_key = self._response_cache_key(context_window, payload["options"])
+            cached = self._lookup_cached_response(cache_key, session)
+            if cached is not None:
+                self._note_token(metrics)
+                yield cached
+                return AIResponse(success=True, content=cached, metrics=self._finish_metrics(metrics, cached=True))
+
+            # Foreground requests go ahead of queued background work
+            slot = self._acquire_slot(self.base_url, priority, cancel_token)
+            if slot is None:
+                return self._cancelled_response(user_input, session)
+
+            deadline = time.monotonic() + self.retry_policy.deadline
+            tokens = []
+            think = self._think_filter()
+            events = queue.Queue()
+            stopped = threading.Event()
+
+            def generate() -> None:
+                """Run the completion under the llm lock, posting tokens to the queue (worker thread)"""
+                truncated = False
+                try:
+                    with self._llm_lock:
+                        self._activate(session)
+                        metrics.prompt_tokens, stream = self._completion(payload)
+                        while stream is not None:
+                            for chunk in stream:
+                                if stopped.is_set() or (cancel_token and cancel_token.cancelled):
+                                    break
+                                if time.monotonic() > deadline:
+                                    logger.warning(f"Response truncated at the {self.retry_policy.deadline}s "
+                                                   f"request deadline")
+                                    truncated = True
+                                    break
+                                choice = chunk['choices'][0]
+                                metrics.generated_tokens += 1
+                                if metrics.generated_tokens == 1:
+                                    metrics.prompt_eval_time = time.perf_counter() - metrics.started
+                                token = think.feed(choice.get('text', ''))
+                                if token:
+                                    self._note_token(metrics)
+                                    events.put(('token', token))
+                                if think.capped:
+                                    break
+                                if choice.get('finish_reason') == 'length':
+                                    truncated = True
+                            stream.close()
+                            stream = None
+                            if think.capped and not truncated and not stopped.is_set() and \
+                                    not (cancel_token and cancel_token.cancelled):
+                                metrics.reasoning_capped = True
+                                logger.info(f"Reasoning capped at {think.reasoning_tokens} tokens, "
+                                            f"requesting the answer")
+                                _, stream = self._completion(self._continuation_request(payload, think.force_answer()))
+                except Exception as e:
+                    events.put(('error', e))
+                    return
+                finally:
+                    # The model is free once the worker stops, however long the consumer takes to read
+                    slot.release()
+                events.put(('done', truncated))
+
+            # A slow or abandoned consumer must not keep other sessions and prefills off the model
+            worker = threading.Thread(target=generate, daemon=True, name="LlamaCppGenerate")
+            worker.start()
+            try:
+                while True:
+                    kind, value = events.get()
+                    if kind != 'token':
+                        break
+                    tokens.append(value)
+                    yield value
+            finally:
+                stopped.set()
+                worker.join()
+            if kind == 'error':
+                raise value
+            truncated = value
+            if cancel_token and cancel_token.cancelled:
+                return self._cancelled_response(user_input, session)
+            token = think.flush()
+            if token:
+                self._note_token(metrics)
+                tokens.append(token)
+                yield token
+            metrics.reasoning_tokens = think.reasoning_tokens
+            eval_time = time.perf_counter() - metrics.started - metrics.prompt_eval_time
+            if metrics.generated_tokens > 1 and eval_time > 0:
+                metrics.tokens_per_second = (metrics.generated_tokens - 1) / eval_time
+            ai_message = ''.join(tokens)
+            if not ai_message.strip():
+                logger.warning(f"Empty response from model: {self.model_name}")
+                return AIResponse(success=False, content="", error="Empty response from model")
+
+            session.history.append({"role": "assistant", "content": ai_message})
+            self._schedule_compaction(session)
+
+            # Only cache complete answers
+            if cache_key and ai_message and not truncated:
+                self.response_cache.put(cache_key, ai_message)
+
+            return AIResponse(success=True, content=ai_message, metrics=self._finish_metrics(metrics))
+
+        except Exception as e:
+            if cancel_token and cancel_token.cancelled:
+                return self._cancelled_response(user_input, session)
+            logger.error(f"In-process generation failed: {e}")
+            return AIResponse(
+                success=False,
+                content="Sorry, I encountered an unexpected error. Please try again.",
+                error=f"Unexpected error: {str(e)}"
+            )
+        finally:
+            if slot:
+                slot.release()
+
+    def generate_response(self, user_input: str,
+                          cancel_token: Optional[CancellationToken] = None,
+                          priority: Priority = Priority.CHAT,
+                          session_id: str = DEFAULT_SESSION) -> str:
+        """
+        Generate a response with the in-process model.
+        
+        Args:
+            user_input: The user's message
+            cancel_token: Optional token to abort the generation
+            priority: Scheduling class of the request
+            session_id: Conversation the message belongs to
+            
+        Returns:
+            str: The AI response or error message
+        """
+        ai_response = super().generate_response(user_input, cancel_token, priority, session_id)
+        
+        if ai_response.success:
+            return ai_response.content
+        elif ai_response.error == CANCELLED_ERROR:
+            return f"{CANCELLED_ERROR}."
+        else:
+            error_msg = ai_response.error or "Unknown error occurred"
+            return f"Sorry, I encountered an error: {error_msg}"
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import platform
+import logging
+import statistics
+from typing import Dict, Any, List, Optional, Tuple
+
+from core.utils.http_transport import get_transport
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FILE = 'model_profile.json'
+
+# Short, fixed prompts so results are comparable across machines and runs
+CALIBRATION_PROMPTS = (
+    "Explain in two sentences what a desktop assistant does.",
+    "List three tips for staying focused while working.",
+    "Write a short, friendly reminder to drink water.",
+)
+
+
+class ModelCalibrator:
+    """Measures the local Ollama models and writes a ranked latency profile."""
+
+    def __init__(self, base_url: str, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the calibrator.
+
+        Args:
+            base_url: Ollama endpoint to calibrate
+            config: Dictionary containing calibration configuration
+        """
+        config = config or {}
+        self.base_url = base_url
+        self.num_predict = config.get('num_predict', 64)
+        # Reply length used to turn TTFT and throughput into an expected latency
+        self.reference_tokens = config.get('reference_tokens', 150)
+        self.timeout = config.get('timeout', 300)
+        self.keep_alive = config.get('keep_alive', '5m')
+
+    def list_models(self) -> List[Dict[str, Any]]:
+        """Return the models Ollama has installed (name and size in bytes)"""
+        response = get_transport().get(f"{self.base_url}/api/tags", timeout=10)
+        response.raise_for_status()
+        return [{'name': model['name'], 'size': model.get('size', 0)}
+                for model in response.json().get('models', [])]
+
+    def _generate(self, model: str, prompt: str, num_predict: int) -> Dict[str, Any]:
+        """Run one streamed generation and time it"""
+        start = time.perf_counter()
+        ttft = None
+        done = {}
+        with get_transport().post(
+            f"{self.base_url}/api/generate",
+            json={
+                "model": model,
+                "prompt": prompt,
+                "stream": True,
+                "keep_alive": self.keep_alive,
+                "options": {"temperature": 0, "seed": 42, "num_predict": num_predict}
+            },
+            stream=True,
+            timeout=self.timeout
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if ttft is None and chunk.get('response'):
+                    ttft = time.perf_counter() - start
+                if chunk.get('done'):
+                    done = chunk
+
+        eval_count = done.get('eval_count', 0)
+        eval_seconds = done.get('eval_duration', 0) / 1e9
+        return {
+            'ttft': ttft if ttft is not None else time.perf_counter() - start,
+            'tokens_per_second': eval_count / eval_seconds if eval_seconds > 0 else 0.0,
+            'load_time': done.get('load_duration', 0) / 1e9,
+        }
+
+    def measure(self, model: str) -> Dict[str, Any]:
+        """
+        Benchmark one model with the standard prompt set.
+
+        The model is loaded by a warm-up request first, so TTFT reflects a
+        resident model.
+
+        Args:
+            model: Model name
+
+        Returns:
+            Dict[str, Any]: TTFT percentiles, throughput and expected latency
+        """
+        warmup = self._generate(model, "Hi", 1)
+        runs = [self._generate(model, prompt, self.num_predict) for prompt in CALIBRATION_PROMPTS]
+
+        ttfts = sorted(run['ttft'] for run in runs)
+        throughputs = [run['tokens_per_second'] for run in runs if run['tokens_per_second'] > 0]
+        tokens_per_second = sum(throughputs) / len(throughputs) if throughputs else 0.0
+        ttft_p50 = statistics.median(ttfts)
+        expected = (ttft_p50 + self.reference_tokens / tokens_per_second
+                    if tokens_per_second else float('inf'))
+        return {
+            'ttft_p50': round(ttft_p50, 3),
+            'ttft_max': round(ttfts[-1], 3),
+            'tokens_per_second': round(tokens_per_second, 2),
+            'load_time': round(warmup['load_time'], 3),
+            'expected_latency': round(expected, 3),
+        }
+
+    def run(self, models: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Calibrate the installed models, fastest first.
+
+        Args:
+            models: Model names to calibrate; all installed models by default
+
+        Returns:
+            Dict[str, Any]: The ranked profile
+        """
+        installed = self.list_models()
+        if models:
+            installed = [model for model in installed if model['name'] in models]
+
+        results = []
+        for model in installed:
+            logger.info(f"Calibrating {model['name']}...")
+            try:
+                result = self.measure(model['name'])
+            except Exception as e:
+                logger.error(f"Calibration of {model['name']} failed: {e}")
+                continue
+            if not result['tokens_per_second']:
+                logger.warning(f"Calibration of {model['name']} measured no output tokens; skipping it")
+                continue
+            result.update(model)
+            results.append(result)
+            logger.info(f"{model['name']}: TTFT {result['ttft_p50']:.2f}s, "
+                        f"{result['tokens_per_second']:.1f} tok/s")
+
+        results.sort(key=lambda result: result['expected_latency'])
+        return {
+            'created': time.time(),
+            'base_url': self.base_url,
+            'host': {'platform': platform.platform(), 'cpu_count': os.cpu_count()},
+            'reference_tokens': self.reference_tokens,
+            'models': results,
+        }
+
+
+def save_profile(profile: Dict[str, Any], cache_dir: str) -> str:
+    """Write a calibration profile to the cache directory and return its path"""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, PROFILE_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2, allow_nan=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_profile(cache_dir: str) -> Optional[Dict[str, Any]]:
+    """Read the calibration profile, or None if calibration has not been run"""
+    path = os.path.join(cache_dir, PROFILE_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable calibration profile {path}: {e}")
+        return None
+
+
+def select_models(profile: Dict[str, Any], target_latency: float) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Pick primary and fallback models from a calibration profile.
+
+    The primary is the largest model whose expected latency meets the target
+    (or the fastest model if none does); the fallback is the fastest other model.
+
+    Args:
+        profile: Profile written by ModelCalibrator
+        target_latency: Acceptable seconds for a reference-length reply
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: Primary and fallback model names
+    """
+    ranked = profile.get('models', [])
+    if not ranked:
+        return None, None
+
+    within = [model for model in ranked if model['expected_latency'] <= target_latency]
+    primary = max(within, key=lambda model: model.get('size', 0)) if within else ranked[0]
+    fallback = next((model for model in ranked if model is not primary), None)
+    return primary['name'], fallback['name'] if fallback else None
@@ -0,0 +1,218 @@
+import re
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple, Union
+
+from core.utils.http_transport import get_transport
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_expiry(value: str) -> Optional[float]:
+    """Parse Ollama's RFC 3339 `expires_at` (nanosecond precision) into a timestamp"""
+    if not value:
+        return None
+    # Python only accepts up to microseconds
+    value = re.sub(r'(\.\d{6})\d+', r'\1', value).replace('Z', '+00:00')
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+def _keep_alive_seconds(keep_alive: Union[str, int, float, None]) -> Optional[float]:
+    """
+    Convert an Ollama keep_alive ("30m", "1h30m", 300, -1) to seconds.
+
+    Returns:
+        Optional[float]: Seconds the model stays loaded, or None if it stays
+            loaded indefinitely (a negative keep_alive)
+    """
+    if isinstance(keep_alive, (int, float)):
+        seconds = float(keep_alive)
+    else:
+        text = str(keep_alive or '').strip()
+        parts = re.findall(r'(-?\d+(?:\.\d+)?)(ms|s|m|h)?', text)
+        if not text or not parts or ''.join(number + unit for number, unit in parts) != text:
+            return 300.0  # Ollama's default of 5m
+        units = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600, '': 1}
+        seconds = sum(float(number) * units[unit] for number, unit in parts)
+    return None if seconds < 0 else seconds
+
+
+def _canonical_name(model: str) -> str:
+    """Model name as /api/ps reports it, with Ollama's implicit :latest tag"""
+    if ':' not in model.rsplit('/', 1)[-1]:
+        return f"{model}:latest"
+    return model
+
+
+class ModelResidencyManager:
+    """Keeps configured Ollama models loaded so requests don't pay the cold-load cost."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the residency manager.
+
+        Args:
+            config: Dictionary containing model management configuration
+        """
+        config = config or {}
+        self.refresh_interval = config.get('residency_refresh_interval', 60)
+        self.rewarm_margin = config.get('residency_rewarm_margin', 120)
+        self.idle_timeout = config.get('residency_idle_timeout', 1800)
+        self.warm_timeout = config.get('residency_warm_timeout', 300)
+
+        # (base_url, model) -> keep_alive, in registration (priority) order
+        self._models: Dict[Tuple[str, str], str] = {}
+        # (base_url, canonical model name) -> expiry timestamp reported by /api/ps
+        self._loaded: Dict[Tuple[str, str], Optional[float]] = {}
+        self._warming = set()
+        self._last_activity = time.time()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def register(self, base_url: str, model: str, keep_alive: str) -> None:
+        """Register a model to keep resident"""
+        with self._lock:
+            self._models.setdefault((base_url, model), keep_alive)
+
+    def note_activity(self) -> None:
+        """Record that the assistant is in use, keeping models warm"""
+        self._last_activity = time.time()
+
+    def start(self) -> None:
+        """Warm all registered models and keep them resident in the background"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._monitor, daemon=True, name="ModelResidency")
+        self._thread.start()
+        logger.info("Model residency manager started")
+
+    def stop(self) -> None:
+        """Stop the background monitor"""
+        self._stop_event.set()
+
+    def is_loaded(self, base_url: str, model: str) -> bool:
+        """Return True if the model was resident at the last refresh"""
+        with self._lock:
+            expiry = self._expiry(base_url, model)
+        return expiry is None or expiry > time.time()
+
+    def _expiry(self, base_url: str, model: str) -> Optional[float]:
+        """Expiry of a model at the last refresh; 0 if it was not loaded (call with the lock held)"""
+        return self._loaded.get((base_url, _canonical_name(model)), 0)
+
+    def ensure_warm_async(self, base_url: str, model: str) -> None:
+        """Start loading a model in the background if it is not already resident"""
+        self.note_activity()
+        if not self.is_loaded(base_url, model):
+            threading.Thread(target=self.warm, args=(base_url, model), daemon=True).start()
+
+    def warm(self, base_url: str, model: str) -> bool:
+        """
+        Load a model into memory with its keep_alive.
+
+        Args:
+            base_url: Ollama endpoint
+            model: Model name
+
+        Returns:
+            bool: True if the model is now loaded
+        """
+        key = (base_url, model)
+        with self._lock:
+            if key in self._warming:
+                return False
+            self._warming.add(key)
+            keep_alive = self._models.get(key, "5m")
+
+        start = time.time()
+        try:
+            # An empty prompt only loads the model
+            response = get_transport().post(
+                f"{base_url}/api/generate",
+                json={"model": model, "keep_alive": keep_alive, "stream": False},
+                timeout=self.warm_timeout
+            )
+            response.raise_for_status()
+            # Expected expiry until a refresh reports the one Ollama set
+            lifetime = _keep_alive_seconds(keep_alive)
+            with self._lock:
+                self._loaded[(base_url, _canonical_name(model))] = None if lifetime is None else time.time() + lifetime
+            logger.info(f"Warmed model {model} in {time.time() - start:.1f}s (keep_alive={keep_alive})")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to warm model {model}: {e}")
+            return False
+        finally:
+            with self._lock:
+                self._warming.discard(key)
+
+    def refresh(self) -> Dict[Tuple[str, str], Optional[float]]:
+        """Query each endpoint's running models and update the loaded set"""
+        endpoints = {base_url for base_url, _ in list(self._models)}
+        loaded = {}
+        for base_url in endpoints:
+            try:
+                response = get_transport().get(f"{base_url}/api/ps", timeout=5)
+                response.raise_for_status()
+                for entry in response.json().get('models', []):
+                    name = entry.get('name') or entry.get('model')
+                    if not name:
+                        continue
+                    loaded[(base_url, _canonical_name(name))] = _parse_expiry(entry.get('expires_at', ''))
+            except Exception as e:
+                logger.debug(f"Failed to list running models at {base_url}: {e}")
+        with self._lock:
+            self._loaded = loaded
+        return loaded
+
+    def get_status(self) -> Dict[str, Any]:
+        """Return each registered model's residency state"""
+        now = time.time()
+        with self._lock:
+            status = {}
+            for base_url, model in self._models:
+                expiry = self._expiry(base_url, model)
+                status[model] = {
+                    'endpoint': base_url,
+                    'loaded': expiry is None or expiry > now,
+                    'expires_in': None if not expiry else max(0.0, expiry - now),
+                }
+        return status
+
+    def _monitor(self) -> None:
+        """Warm models at startup, then re-warm before they expire while the assistant is in use"""
+        while not self._stop_event.is_set():
+            self.refresh()
+            now = time.time()
+            active = now - self._last_activity <= self.idle_timeout
+            with self._lock:
+                candidates = list(self._models)
+            for base_url, model in candidates:
+                if self._stop_event.is_set():
+                    break
+                with self._lock:
+                    expiry = self._expiry(base_url, model)
+                expiring = expiry is not None and expiry - now <= self.rewarm_margin
+                if active and expiring:
+                    self.warm(base_url, model)
+            self._stop_event.wait(self.refresh_interval)
+
+
+_residency_manager: Optional[ModelResidencyManager] = None
+_residency_lock = threading.Lock()
+
+
+def get_residency_manager(config: Optional[Dict[str, Any]] = None) -> ModelResidencyManager:
+    """Return the process-wide residency manager, creating it on first use."""
+    global _residency_manager
+    with _residency_lock:
+        if _residency_manager is None:
+            _residency_manager = ModelResidencyManager(config)
+        return _residency_manager
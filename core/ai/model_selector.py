@@ -1,6 +1,20 @@
-from typing import Dict, Any
+import time
+import queue
+import threading
+from typing import Dict, Any, Generator, List, Optional, Tuple
+from .base_ai_manager import AIResponse
+from .streaming import collect_stream
+from core.utils.cancellation import CancellationToken, CANCELLED_ERROR
 from .ollama_manager import OllamaManager
 from .gemma_manager import GemmaManager
+from .llamacpp_manager import LlamaCppManager
+from .model_residency import get_residency_manager
+from .model_calibration import load_profile, select_models
+from .query_router import QueryRouter, RouteDecision, STRONG
+from .response_cache import DEFAULT_CACHE_DIR
+from .request_scheduler import Priority
+from .session_store import DEFAULT_SESSION
+from .endpoint_pool import endpoint_urls
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,6 +22,9 @@ logger = logging.getLogger(__name__)
 class ModelSelector:
     """
     Manages model selection and fallback mechanisms for AI responses.
+    
+    Offers the conversation interface of a single AI manager, so the UI,
+    console and API server use it as their assistant.
     """
     def __init__(self, config: Dict[str, Any], reminder_callback):
         """
@@ -21,13 +38,33 @@ class ModelSelector:
         self.config = config
         self.primary_model = None
         self.fallback_model = None
+        
+        # Hedged execution: start the fallback if the primary is slow to respond
+        selection_config = config.get('model_selection', {})
+        self.hedging_enabled = selection_config.get('hedging', False)
+        self.first_token_budget = selection_config.get('first_token_budget', 6.0)
+        
+        # A calibration profile (--calibrate) picks models by latency instead of by name
+        self.auto_select = selection_config.get('auto_select', True)
+        self.target_latency = selection_config.get('target_latency', 5.0)
+        self.calibrated_models = self._select_calibrated_models() if self.auto_select else {}
         self._initialize_models(reminder_callback)
+        
+        # Route each prompt to the fast or the strong model by its estimated difficulty
+        cache_dir = self.config.get('model_management', {}).get('cache_dir') or DEFAULT_CACHE_DIR
+        router_config = selection_config.get('router', {})
+        self.router = QueryRouter(router_config, cache_dir)
+        self.fast_role = self._fast_model_role(router_config.get('fast_model', 'auto'))
+        
+        # Keep the primary and fallback models loaded in the background
+        if self.config.get('model_management', {}).get('preload_models', False):
+            get_residency_manager().start()
     
     def _initialize_models(self, reminder_callback) -> None:
         """Initialize primary and fallback AI models."""
         try:
             # Initialize primary model
-            primary_config = self.config.get('primary', {})
+            primary_config = self._model_config('primary')
             provider = primary_config.get('provider', 'gemma')
             
             if provider == 'gemma':
@@ -36,12 +73,15 @@ class ModelSelector:
             elif provider == 'ollama':
                 self.primary_model = OllamaManager(primary_config, reminder_callback=reminder_callback)
                 logger.info(f"Initialized primary model: {self.primary_model.model_name}")
+            elif provider == 'llamacpp':
+                self.primary_model = LlamaCppManager(primary_config, reminder_callback=reminder_callback)
+                logger.info(f"Initialized primary model: {self.primary_model.model_name} (in-process)")
             else:
                 logger.error(f"Unsupported provider for primary model: {provider}")
                 
             # Initialize fallback model if configured
             if 'fallback' in self.config:
-                fallback_config = self.config.get('fallback', {})
+                fallback_config = self._model_config('fallback')
                 fallback_provider = fallback_config.get('provider', 'ollama')
                 
                 if fallback_provider == 'ollama':
@@ -50,12 +90,91 @@ class ModelSelector:
                 elif fallback_provider == 'gemma':
                     self.fallback_model = GemmaManager(fallback_config, reminder_callback=reminder_callback)
                     logger.info(f"Initialized fallback model: {self.fallback_model.model_name}")
+                elif fallback_provider == 'llamacpp':
+                    self.fallback_model = LlamaCppManager(fallback_config, reminder_callback=reminder_callback)
+                    logger.info(f"Initialized fallback model: {self.fallback_model.model_name} (in-process)")
                 else:
                     logger.error(f"Unsupported provider for fallback model: {fallback_provider}")
                     
         except Exception as e:
             logger.error(f"Error initializing models: {e}")
     
+    def _select_calibrated_models(self) -> Dict[str, Any]:
+        """
+        Choose primary and fallback models from the calibration profile.
+        
+        Returns:
+            Dict[str, Any]: Model name per role and the profiled base_url, or
+                an empty dict if calibration has not been run
+        """
+        cache_dir = self.config.get('model_management', {}).get('cache_dir') or DEFAULT_CACHE_DIR
+        profile = load_profile(cache_dir)
+        if not profile:
+            return {}
+        
+        primary, fallback = select_models(profile, self.target_latency)
+        if not primary:
+            return {}
+        logger.info(f"Calibration profile selects {primary} (fallback {fallback}) "
+                    f"for a {self.target_latency}s target latency")
+        return {'base_url': profile.get('base_url'), 'primary': primary, 'fallback': fallback}
+    
+    def _model_config(self, role: str) -> Dict[str, Any]:
+        """Per-model config with the shared model_management settings attached"""
+        model_config = self._role_config(role)
+        
+        # Without a configured summary model, the fallback writes summaries when the same Ollama serves it
+        management = model_config['model_management']
+        compaction = management.get('compaction', {})
+        summarizer = self._role_config('fallback') if 'fallback' in self.config else None
+        if summarizer and summarizer.get('model') and not compaction.get('model') and \
+                'llamacpp' not in (model_config.get('provider'), summarizer.get('provider')) and \
+                endpoint_urls(summarizer.get('base_url'))[0] == endpoint_urls(model_config.get('base_url'))[0]:
+            model_config['model_management'] = dict(management, compaction=dict(compaction,
+                                                                                model=summarizer['model']))
+        return model_config
+    
+    def _role_config(self, role: str) -> Dict[str, Any]:
+        """A role's model config with model_management attached and the calibrated model applied"""
+        model_config = dict(self.config.get(role, {}))
+        model_config.setdefault('model_management', self.config.get('model_management', {}))
+        
+        # Profiled models only apply to the Ollama endpoint they were measured on
+        calibrated = self.calibrated_models.get(role)
+        if calibrated and model_config.get('provider') != 'llamacpp' and \
+                endpoint_urls(model_config.get('base_url'))[0] == self.calibrated_models['base_url']:
+            model_config['model'] = calibrated
+        return model_config
+    
+    def _fast_model_role(self, setting: str) -> str:
+        """
+        Decide whether the primary or the fallback is the fast model.
+        
+        Args:
+            setting: 'primary', 'fallback' or 'auto'; 'auto' picks the smaller
+                model when the calibration profile knows both sizes and the
+                primary otherwise
+            
+        Returns:
+            str: 'primary' or 'fallback'
+        """
+        if setting in ('primary', 'fallback'):
+            return setting
+        if self.primary_model and self.fallback_model:
+            cache_dir = self.config.get('model_management', {}).get('cache_dir') or DEFAULT_CACHE_DIR
+            profile = load_profile(cache_dir) or {}
+            sizes = {model['name']: model.get('size', 0) for model in profile.get('models', [])}
+            primary_size = sizes.get(self.primary_model.model_name)
+            fallback_size = sizes.get(self.fallback_model.model_name)
+            if primary_size and fallback_size and fallback_size < primary_size:
+                return 'fallback'
+        return 'primary'
+    
+    def prepare_for_use(self) -> None:
+        """Start loading the primary model ahead of an expected request"""
+        if self.primary_model:
+            self.primary_model.prepare_for_use()
+    
     def get_primary_model(self):
         """Returns the primary AI model."""
         return self.primary_model
@@ -69,41 +188,330 @@ class ModelSelector:
         """
         return self.fallback_model
     
-    def generate_response(self, user_input: str) -> str:
+    def _default_model(self):
+        """The model answering when no routing applies"""
+        return self.primary_model or self.fallback_model
+    
+    @property
+    def model_name(self) -> str:
+        """Name of the default model"""
+        model = self._default_model()
+        return model.model_name if model else ""
+    
+    @property
+    def sessions(self):
+        """Session store of the default model"""
+        model = self._default_model()
+        return model.sessions if model else None
+    
+    @property
+    def prefill_enabled(self) -> bool:
+        """Whether any model prefills prompts while the user types"""
+        return any(model.prefill_enabled for model in (self.primary_model, self.fallback_model) if model)
+    
+    @property
+    def prefill_debounce_ms(self) -> int:
+        """Typing pause before prefilling"""
+        model = self._default_model()
+        return model.prefill_debounce_ms if model else 800
+    
+    def prefill_async(self, partial_input: str, session_id: str = DEFAULT_SESSION) -> bool:
+        """
+        Prefill, in the background, the model the text typed so far would be routed to.
+        
+        Args:
+            partial_input: Current contents of the input box
+            session_id: Conversation the input belongs to
+            
+        Returns:
+            bool: True if a prefill was started or queued
+        """
+        models, _ = self._ordered_models(partial_input, session_id)
+        return bool(models) and models[0].prefill_async(partial_input, session_id)
+    
+    def run_automation_command(self, user_input: str) -> Optional[str]:
+        """Run the input as an automation command, once, on the default model"""
+        model = self._default_model()
+        return model.run_automation_command(user_input) if model else None
+    
+    def clear_conversation(self, session_id: str = DEFAULT_SESSION) -> None:
+        """Clear a session's conversation history on every model"""
+        for model in (self.primary_model, self.fallback_model):
+            if model:
+                model.clear_conversation(session_id)
+    
+    def end_session(self, session_id: str) -> None:
+        """Discard a session's state on every model"""
+        for model in (self.primary_model, self.fallback_model):
+            if model:
+                model.end_session(session_id)
+    
+    def get_session_stats(self) -> Dict[str, Any]:
+        """Return each model's live sessions and eviction counters"""
+        return {role: model.get_session_stats()
+                for role, model in (('primary', self.primary_model), ('fallback', self.fallback_model)) if model}
+    
+    def get_routing_stats(self) -> Dict[str, Any]:
+        """Return request counts and mean latencies per route"""
+        return self.router.get_stats()
+
+    def generate_response(self, user_input: str,
+                          cancel_token: Optional[CancellationToken] = None,
+                          priority: Priority = Priority.CHAT,
+                          session_id: str = DEFAULT_SESSION) -> str:
         """
         Generate a response using the appropriate model with fallback logic.
         
         Args:
             user_input: The user's message
+            cancel_token: Optional token to abort the generation
+            priority: Scheduling class of the request
+            session_id: Conversation the message belongs to
             
         Returns:
             str: The AI response
         """
+        result = collect_stream(self.generate_response_stream(user_input, cancel_token, priority=priority,
+                                                              session_id=session_id))
+        
+        if result.success:
+            return result.content
+        if result.error == CANCELLED_ERROR:
+            return f"{CANCELLED_ERROR}."
+        return result.content or "Sorry, I'm unable to generate a response at the moment."
+
+    def generate_response_stream(self, user_input: str,
+                                 cancel_token: Optional[CancellationToken] = None,
+                                 automation: bool = True,
+                                 priority: Priority = Priority.CHAT,
+                                 session_id: str = DEFAULT_SESSION) -> Generator[str, None, AIResponse]:
+        """
+        Stream a response from the primary model with fallback.
+        
+        With the router enabled, prompts it judges hard go to the strong model
+        first and the fast model becomes the fallback. With hedging enabled, the fallback is started in parallel when the
+        primary misses its first-token budget and the first model to produce
+        output wins. Otherwise the fallback only runs if the primary fails
+        before producing any output.
+        
+        Args:
+            user_input: The user's message
+            cancel_token: Optional token to abort the generation
+            automation: Whether to handle automation commands; callers that
+                already ran run_automation_command pass False
+            priority: Scheduling class of the request
+            session_id: Conversation the message belongs to; each model keeps
+                its own history for it, and every completed turn is added to
+                all of them
+            
+        Returns:
+            AIResponse: Final response object, delivered as the generator's
+            return value
+        """
         if not user_input:
-            return "I didn't receive any input."
+            return AIResponse(success=False, content="I didn't receive any input.", error="Empty input")
         
-        # Try primary model first
-        if self.primary_model:
-            try:
-                logger.debug(f"Generating response with primary model: {self.primary_model.model_name}")
-                response = self.primary_model.generate_response(user_input)
-                
-                # If response is valid, return it
-                if response and not response.startswith("Sorry, I encountered an error"):
-                    return response
-                
-                logger.warning("Primary model failed to generate response, trying fallback")
-            except Exception as e:
-                logger.error(f"Error with primary model: {e}")
+        if not self._default_model():
+            return AIResponse(
+                success=False,
+                content="Sorry, I'm unable to generate a response at the moment.",
+                error="No models available"
+            )
+        
+        # Automation commands run once, never on both models
+        automation_response = self.run_automation_command(user_input) if automation else None
+        if automation_response:
+            yield automation_response
+            return AIResponse(success=True, content=automation_response)
         
-        # Try fallback model if available
-        if self.fallback_model:
+        models, decision = self._ordered_models(user_input, session_id)
+        
+        # A hedge would let the fast model win the race on exactly the prompts routed away from it
+        if self.hedging_enabled and len(models) > 1 and (decision is None or decision.route != STRONG):
+            stream = self._hedged_stream(models, user_input, cancel_token, priority, session_id)
+        else:
+            stream = self._failover_stream(models, user_input, cancel_token, priority, session_id)
+        if decision is None:
+            return (yield from stream)
+        return (yield from self._recorded_stream(stream, decision, models[0]))
+    
+    def _ordered_models(self, user_input: str, session_id: str) -> Tuple[List[Any], Optional[RouteDecision]]:
+        """Models in the order to try them for a prompt, with the routing decision if one was made"""
+        models = [model for model in (self.primary_model, self.fallback_model) if model]
+        decision = None
+        if self.router.enabled and len(models) > 1:
+            decision = self.router.route(user_input, self._conversation_depth(models[0], session_id))
+            fast_first = self.fast_role == 'primary'
+            if (decision.route == STRONG) == fast_first:
+                models.reverse()
+        return models, decision
+    
+    @staticmethod
+    def _conversation_depth(model, session_id: str) -> int:
+        """Number of earlier exchanges in a session"""
+        session = model.sessions.peek(session_id)
+        return len(session.history) // 2 if session else 0
+    
+    def _recorded_stream(self, stream: Generator[str, None, AIResponse], decision: RouteDecision,
+                         first_model) -> Generator[str, None, AIResponse]:
+        """Pass a routed stream through and record its latency and outcome"""
+        start = time.perf_counter()
+        ttft = None
+        try:
+            while True:
+                try:
+                    token = next(stream)
+                except StopIteration as stop:
+                    result = stop.value
+                    break
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                yield token
+        finally:
+            stream.close()
+        
+        if result.error != CANCELLED_ERROR:
+            metrics = result.metrics
+            self.router.record(
+                decision,
+                model=metrics.model if metrics else first_model.model_name,
+                success=result.success,
+                total_time=time.perf_counter() - start,
+                ttft=ttft,
+                generated_tokens=metrics.generated_tokens if metrics else 0
+            )
+        return result
+
+    def _failover_stream(self, models, user_input: str,
+                         cancel_token: Optional[CancellationToken],
+                         priority: Priority = Priority.CHAT,
+                         session_id: str = DEFAULT_SESSION) -> Generator[str, None, AIResponse]:
+        """Try each model in turn until one succeeds or produces output"""
+        result = None
+        for model in models:
+            streamed = False
             try:
-                logger.debug(f"Generating response with fallback model: {self.fallback_model.model_name}")
-                response = self.fallback_model.generate_response(user_input)
-                return response
+                logger.debug(f"Streaming response with model: {model.model_name}")
+                stream = model.generate_response_stream(user_input, cancel_token, automation=False,
+                                                        priority=priority, session_id=session_id)
+                while True:
+                    try:
+                        token = next(stream)
+                    except StopIteration as stop:
+                        result = stop.value
+                        break
+                    streamed = True
+                    yield token
             except Exception as e:
-                logger.error(f"Error with fallback model: {e}")
+                logger.error(f"Error streaming from {model.model_name}: {e}")
+                result = AIResponse(success=False, content="", error=str(e))
+            
+            # Output already shown to the user cannot be retracted
+            if result.success or streamed or result.error == CANCELLED_ERROR:
+                self._share_turn(model, user_input, result, session_id)
+                return result
+            logger.warning(f"Model {model.model_name} failed to stream a response, trying fallback")
+        
+        return result
+
+    def _hedged_stream(self, models, user_input: str,
+                       cancel_token: Optional[CancellationToken],
+                       priority: Priority = Priority.CHAT,
+                       session_id: str = DEFAULT_SESSION) -> Generator[str, None, AIResponse]:
+        """Race the fallback against a slow primary; the first model to produce output wins"""
+        events = queue.Queue()
+        tokens = []
+        unregisters = []
+        
+        def launch():
+            index = len(tokens)
+            child_token = CancellationToken()
+            if cancel_token:
+                unregisters.append(cancel_token.register(child_token.cancel))
+            tokens.append(child_token)
+            threading.Thread(
+                target=self._run_candidate,
+                args=(models[index], user_input, child_token, index, events, priority, session_id),
+                daemon=True
+            ).start()
+        
+        def cancel_others(winner):
+            for index, child_token in enumerate(tokens):
+                if index != winner:
+                    child_token.cancel()
         
-        # If all models fail
-        return "Sorry, I'm unable to generate a response at the moment."
\ No newline at end of file
+        launch()
+        deadline = time.monotonic() + self.first_token_budget
+        winner = None
+        failures = {}
+        finished = False
+        try:
+            while True:
+                timeout = None
+                if winner is None and len(tokens) < len(models):
+                    timeout = max(0.0, deadline - time.monotonic())
+                try:
+                    kind, index, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    logger.warning(f"{models[0].model_name} missed its {self.first_token_budget}s "
+                                   f"first-token budget, hedging with {models[len(tokens)].model_name}")
+                    launch()
+                    continue
+                
+                if winner is not None and index != winner:
+                    continue  # Late output from a cancelled model
+                
+                if kind == 'token':
+                    if winner is None:
+                        winner = index
+                        cancel_others(winner)
+                        logger.debug(f"Hedged request won by {models[index].model_name}")
+                    yield value
+                    continue
+                
+                # A model finished: the winner's result (or an outright success) is final
+                if index == winner or value.success or value.error == CANCELLED_ERROR:
+                    cancel_others(index)
+                    finished = True
+                    self._share_turn(models[index], user_input, value, session_id)
+                    return value
+                
+                # Failed before producing output: fail over without waiting for the budget
+                logger.warning(f"Model {models[index].model_name} failed before responding: {value.error}")
+                failures[index] = value
+                if len(tokens) < len(models):
+                    launch()
+                elif len(failures) == len(tokens):
+                    finished = True
+                    return failures[0]
+        finally:
+            if not finished:
+                # The consumer stopped early; abort every model still running
+                cancel_others(None)
+            # Every attempt is finished or cancelled; the parent token may live on
+            for unregister in unregisters:
+                unregister()
+
+    def _share_turn(self, answered_by, user_input: str, result: AIResponse, session_id: str) -> None:
+        """Copy a completed exchange into the other models' histories of the session"""
+        if not (result.success and result.content):
+            return
+        for model in (self.primary_model, self.fallback_model):
+            if model and model is not answered_by:
+                model.record_turn(user_input, result.content, session_id)
+
+    @staticmethod
+    def _run_candidate(model, user_input: str, cancel_token: CancellationToken,
+                       index: int, events: queue.Queue, priority: Priority = Priority.CHAT,
+                       session_id: str = DEFAULT_SESSION) -> None:
+        """Stream one model's response into the shared event queue"""
+        try:
+            result = collect_stream(
+                model.generate_response_stream(user_input, cancel_token, automation=False,
+                                               priority=priority, session_id=session_id),
+                on_token=lambda token: events.put(('token', index, token))
+            )
+        except Exception as e:
+            logger.error(f"Error streaming from {model.model_name}: {e}")
+            result = AIResponse(success=False, content="", error=str(e))
+        events.put(('done', index, result))
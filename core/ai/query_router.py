@@ -0,0 +1,229 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional
+
+from .response_cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+OUTCOMES_FILE = 'router_outcomes.jsonl'
+
+FAST = 'fast'
+STRONG = 'strong'
+
+# Openings that usually need multi-step reasoning
+_REASONING_PATTERN = re.compile(
+    r"\b(why|explain|compare|analy[sz]e|evaluate|prove|derive|calculate|solve|debug|refactor|"
+    r"design|plan|summari[sz]e|step[- ]by[- ]step|pros and cons|trade-?offs?|difference between|"
+    r"how (?:does|do|would|could|should|can)|what would happen)\b",
+    re.IGNORECASE
+)
+# Lookups answerable in a sentence
+_FACTUAL_PATTERN = re.compile(
+    r"^\s*(what(?:'s| is| are| was)|who|when|where|which|define|spell|translate|convert)\b",
+    re.IGNORECASE
+)
+_CHITCHAT_PATTERN = re.compile(
+    r"^\s*(hi|hello|hey|thanks|thank you|good (?:morning|afternoon|evening|night)|"
+    r"how are you|ok(?:ay)?|cool|nice|bye|goodbye)\b",
+    re.IGNORECASE
+)
+_CODE_PATTERN = re.compile(
+    r"```|`[^`]+`|\b(?:def|class)\s+\w+\s*[:(]|^\s*(?:import\s+[\w.]+|from\s+[\w.]+\s+import)\b|"
+    r"\bfunction\s*\w*\s*\(|"
+    r"\b(?:const|let|var)\s+\w+\s*=|\bSELECT\b.+\bFROM\b|[{};]\s*$|=>|==|!=",
+    re.MULTILINE
+)
+_MATH_PATTERN = re.compile(r"\d+\s*[-+*/^%]\s*\d+")
+
+# Score contributions; a prompt scoring at or above the threshold goes to the strong model
+DEFAULT_WEIGHTS = {
+    'words': 0.02,        # Per word of the prompt, capped at max_words
+    'reasoning': 1.0,
+    'code': 1.0,
+    'math': 0.5,
+    'factual': -0.5,
+    'chitchat': -1.0,
+    'depth': 0.1,         # Per earlier exchange in the conversation, capped at max_depth
+}
+
+
+@dataclass
+class QueryFeatures:
+    """Cheap features of a prompt used to estimate how hard it is."""
+    words: int
+    reasoning: bool
+    code: bool
+    math: bool
+    factual: bool
+    chitchat: bool
+    depth: int
+
+
+@dataclass
+class RouteDecision:
+    """Which model class a prompt was sent to and why."""
+    route: str
+    score: float
+    features: QueryFeatures
+
+
+class QueryRouter:
+    """Sends easy prompts to the fast model and hard ones to the strong model."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, cache_dir: Optional[str] = None):
+        """
+        Initialize the router.
+
+        Args:
+            config: Dictionary containing router configuration
+            cache_dir: Directory the outcome log is written to
+        """
+        config = config or {}
+        self.enabled = config.get('enabled', False)
+        self.threshold = config.get('threshold', 1.0)
+        self.max_words = config.get('max_words', 60)
+        self.max_depth = config.get('max_depth', 10)
+        self.weights = dict(DEFAULT_WEIGHTS, **config.get('weights', {}))
+        self.record_outcomes = config.get('record_outcomes', True)
+        self.max_logged_outcomes = config.get('max_logged_outcomes', 5000)
+        self.path = os.path.join(cache_dir or DEFAULT_CACHE_DIR, OUTCOMES_FILE)
+
+        self._lock = threading.Lock()
+        self._logged: Optional[int] = None
+        self.stats = {route: {'requests': 0, 'failures': 0, 'total_time': 0.0, 'ttft': 0.0, 'ttft_count': 0}
+                      for route in (FAST, STRONG)}
+
+    @staticmethod
+    def extract_features(user_input: str, depth: int = 0) -> QueryFeatures:
+        """
+        Compute the routing features of a prompt.
+
+        Args:
+            user_input: The user's message
+            depth: Number of earlier exchanges in the conversation
+
+        Returns:
+            QueryFeatures: Features of the prompt
+        """
+        return QueryFeatures(
+            words=len(user_input.split()),
+            reasoning=bool(_REASONING_PATTERN.search(user_input)),
+            code=bool(_CODE_PATTERN.search(user_input)),
+            math=bool(_MATH_PATTERN.search(user_input)),
+            factual=bool(_FACTUAL_PATTERN.match(user_input)),
+            chitchat=bool(_CHITCHAT_PATTERN.match(user_input)),
+            depth=depth
+        )
+
+    def score(self, features: QueryFeatures) -> float:
+        """Weighted difficulty estimate of a prompt; higher is harder"""
+        weights = self.weights
+        score = weights['words'] * min(features.words, self.max_words)
+        score += weights['depth'] * min(features.depth, self.max_depth)
+        for name in ('reasoning', 'code', 'math', 'factual', 'chitchat'):
+            if getattr(features, name):
+                score += weights[name]
+        return score
+
+    def route(self, user_input: str, depth: int = 0) -> RouteDecision:
+        """
+        Decide which model class should answer a prompt.
+
+        Args:
+            user_input: The user's message
+            depth: Number of earlier exchanges in the conversation
+
+        Returns:
+            RouteDecision: The chosen route with its score and features
+        """
+        features = self.extract_features(user_input, depth)
+        score = self.score(features)
+        route = STRONG if score >= self.threshold else FAST
+        logger.debug(f"Routed prompt to {route} model (score {score:.2f}, threshold {self.threshold})")
+        return RouteDecision(route=route, score=round(score, 3), features=features)
+
+    def record(self, decision: RouteDecision, model: str, success: bool,
+               total_time: float, ttft: Optional[float] = None, generated_tokens: int = 0) -> None:
+        """
+        Record how a routed request went, for tuning the weights and threshold.
+
+        Args:
+            decision: The routing decision for the request
+            model: Model that produced the answer
+            success: Whether the request succeeded
+            total_time: Seconds until the response finished
+            ttft: Seconds until the first token, if one arrived
+            generated_tokens: Number of tokens generated
+        """
+        with self._lock:
+            stats = self.stats[decision.route]
+            stats['requests'] += 1
+            stats['total_time'] += total_time
+            if ttft is not None:
+                stats['ttft'] += ttft
+                stats['ttft_count'] += 1
+            if not success:
+                stats['failures'] += 1
+        if not self.record_outcomes:
+            return
+
+        entry = {
+            'time': time.time(),
+            'route': decision.route,
+            'score': decision.score,
+            'features': asdict(decision.features),
+            'model': model,
+            'success': success,
+            'total_time': round(total_time, 3),
+            'ttft': round(ttft, 3) if ttft is not None else None,
+            'generated_tokens': generated_tokens,
+        }
+        try:
+            with self._lock:
+                self._append(entry)
+        except OSError as e:
+            logger.warning(f"Could not record routing outcome: {e}")
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        """Append to the outcome log, keeping the newest entries once it is full (lock held)"""
+        if self._logged is None:
+            self._logged = len(self._read_lines())
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+        self._logged += 1
+
+        if self._logged > self.max_logged_outcomes:
+            kept = self._read_lines()[-(self.max_logged_outcomes // 2):]
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(kept)
+            os.replace(tmp_path, self.path)
+            self._logged = len(kept)
+
+    def _read_lines(self) -> List[str]:
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return f.readlines()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return request counts, failure counts and mean latencies per route"""
+        with self._lock:
+            stats = {}
+            for route, values in self.stats.items():
+                requests = values['requests']
+                stats[route] = {
+                    'requests': requests,
+                    'failures': values['failures'],
+                    'mean_total_time': round(values['total_time'] / requests, 3) if requests else 0.0,
+                    'mean_ttft': round(values['ttft'] / values['ttft_count'], 3) if values['ttft_count'] else 0.0,
+                }
+        stats['threshold'] = self.threshold
+        return stats
@@ -0,0 +1,254 @@
+import time
+import logging
+import itertools
+import threading
+from enum import IntEnum
+from dataclasses import dataclass
+from typing import Dict, Any, Hashable, List, Optional
+
+from core.utils.cancellation import CancellationToken
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Request classes, most urgent first."""
+    VOICE = 0
+    CHAT = 1
+    BACKGROUND = 2
+
+
+@dataclass
+class _Ticket:
+    priority: Priority
+    seq: int
+    enqueued: float
+    cancel_token: Optional[CancellationToken] = None
+    preempted: bool = False
+
+
+class _Backend:
+    """Queue and active requests for one backend."""
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.waiting: List[_Ticket] = []
+        self.active: List[_Ticket] = []
+
+    def next_ticket(self) -> Optional[_Ticket]:
+        """Highest priority waiting ticket, first come first served within a class"""
+        if not self.waiting:
+            return None
+        return min(self.waiting, key=lambda ticket: (ticket.priority, ticket.seq))
+
+
+class Slot:
+    """A granted concurrency slot; release it when the request finishes."""
+
+    def __init__(self, scheduler: 'RequestScheduler', backend: Hashable, ticket: _Ticket):
+        self._scheduler = scheduler
+        self._backend = backend
+        self._ticket = ticket
+        self._released = False
+
+    def release(self) -> None:
+        """Return the slot to the scheduler (idempotent)"""
+        if not self._released:
+            self._released = True
+            self._scheduler._release(self._backend, self._ticket)
+
+    def __enter__(self) -> 'Slot':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.release()
+
+
+class RequestScheduler:
+    """
+    Grants model backend slots by priority class, preempting background work.
+
+    Slots are counted per (base_url, model) backend, but every model on an
+    endpoint shares its compute, so foreground requests preempt and hold off
+    background work on all models of their endpoint.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            config: Dictionary containing scheduler configuration
+        """
+        config = config or {}
+        self.parallel_slots = config.get('parallel_slots', 1)
+        self.model_slots = config.get('model_slots', {})
+        self.preempt_background = config.get('preempt_background', True)
+
+        self._cond = threading.Condition()
+        self._backends: Dict[Hashable, _Backend] = {}
+        self._seq = itertools.count()
+        self._stats = {
+            priority.name.lower(): {'granted': 0, 'wait_time': 0.0, 'max_wait': 0.0,
+                                    'max_depth': 0, 'cancelled': 0, 'preempted': 0}
+            for priority in Priority
+        }
+
+    def _backend(self, backend: Hashable) -> _Backend:
+        state = self._backends.get(backend)
+        if state is None:
+            # Ollama's parallel slots are per loaded model
+            model = backend[-1] if isinstance(backend, tuple) else backend
+            state = _Backend(self.model_slots.get(model, self.parallel_slots))
+            self._backends[backend] = state
+        return state
+
+    def acquire(self, backend: Hashable, priority: Priority = Priority.CHAT,
+                cancel_token: Optional[CancellationToken] = None) -> Optional[Slot]:
+        """
+        Wait for a slot on a backend.
+
+        Background holders of the same backend are cancelled through their
+        token when foreground requests are waiting for a slot; background
+        holders of other models on the same endpoint are cancelled as soon as
+        a foreground request arrives, and background requests there wait
+        until the endpoint has no foreground work.
+
+        Args:
+            backend: Backend key, e.g. (base_url, model)
+            priority: Request class
+            cancel_token: Token that abandons the wait; background requests
+                are preempted through it
+
+        Returns:
+            Optional[Slot]: The granted slot, or None if cancelled while waiting
+        """
+        stats = self._stats[priority.name.lower()]
+        unregister = cancel_token.register(self._notify) if cancel_token else None
+        try:
+            with self._cond:
+                state = self._backend(backend)
+                ticket = _Ticket(priority, next(self._seq), time.monotonic(), cancel_token)
+                state.waiting.append(ticket)
+                depth = sum(1 for waiting in state.waiting if waiting.priority == priority)
+                stats['max_depth'] = max(stats['max_depth'], depth)
+
+                while True:
+                    if cancel_token and cancel_token.cancelled:
+                        state.waiting.remove(ticket)
+                        stats['cancelled'] += 1
+                        self._cond.notify_all()
+                        return None
+                    if priority < Priority.BACKGROUND:
+                        self._preempt(backend, state)
+                    if (len(state.active) < state.slots and state.next_ticket() is ticket
+                            and not self._held_off(backend, ticket)):
+                        break
+                    self._cond.wait()
+
+                state.waiting.remove(ticket)
+                state.active.append(ticket)
+                waited = time.monotonic() - ticket.enqueued
+                stats['granted'] += 1
+                stats['wait_time'] += waited
+                stats['max_wait'] = max(stats['max_wait'], waited)
+                # Another slot may still be free for the next ticket in line
+                self._cond.notify_all()
+        finally:
+            if unregister:
+                unregister()
+
+        if waited > 0.05:
+            logger.debug(f"{priority.name} request waited {waited:.2f}s for {backend}")
+        return Slot(self, backend, ticket)
+
+    def _endpoint_neighbours(self, backend: Hashable) -> List[_Backend]:
+        """Backends of the other models on the same endpoint (lock held)"""
+        if not isinstance(backend, tuple):
+            return []
+        return [state for key, state in self._backends.items()
+                if isinstance(key, tuple) and key[0] == backend[0] and key != backend]
+
+    def _held_off(self, backend: Hashable, ticket: _Ticket) -> bool:
+        """Whether a background ticket must wait for foreground work on another model of its endpoint (lock held)"""
+        if ticket.priority < Priority.BACKGROUND or not self.preempt_background:
+            return False
+        return any(other.priority < Priority.BACKGROUND
+                   for state in self._endpoint_neighbours(backend)
+                   for other in state.active + state.waiting)
+
+    def _preempt(self, backend: Hashable, state: _Backend) -> None:
+        """Cancel background holders so waiting foreground requests get their slots (lock held)"""
+        if not self.preempt_background:
+            return
+        foreground_waiting = sum(1 for ticket in state.waiting if ticket.priority < Priority.BACKGROUND)
+        free_or_freeing = (state.slots - len(state.active)) + sum(1 for ticket in state.active if ticket.preempted)
+        for ticket in reversed(state.active):
+            if free_or_freeing >= foreground_waiting:
+                break
+            if self._cancel_background(ticket):
+                free_or_freeing += 1
+        # Other models on the endpoint compete for the same compute whatever their slot counts
+        for neighbour in self._endpoint_neighbours(backend):
+            for ticket in neighbour.active:
+                self._cancel_background(ticket)
+
+    def _cancel_background(self, ticket: _Ticket) -> bool:
+        """Preempt an active background ticket; returns whether it was (lock held)"""
+        if ticket.priority != Priority.BACKGROUND or ticket.preempted or not ticket.cancel_token:
+            return False
+        ticket.preempted = True
+        self._stats['background']['preempted'] += 1
+        logger.info("Preempting background request for a foreground request")
+        # Cancellation callbacks may block on I/O; run them off the lock
+        threading.Thread(target=ticket.cancel_token.cancel, daemon=True).start()
+        return True
+
+    def _release(self, backend: Hashable, ticket: _Ticket) -> None:
+        with self._cond:
+            state = self._backend(backend)
+            if ticket in state.active:
+                state.active.remove(ticket)
+            self._cond.notify_all()
+
+    def _notify(self) -> None:
+        with self._cond:
+            self._cond.notify_all()
+
+    def outstanding(self, endpoint: str) -> int:
+        """Active and queued requests for every model on an endpoint"""
+        with self._cond:
+            return sum(len(state.active) + len(state.waiting)
+                       for backend, state in self._backends.items()
+                       if isinstance(backend, tuple) and backend[0] == endpoint)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return per-class counters and each backend's current queue depth"""
+        with self._cond:
+            classes = {}
+            for name, stats in self._stats.items():
+                classes[name] = dict(stats)
+                classes[name]['avg_wait'] = stats['wait_time'] / stats['granted'] if stats['granted'] else 0.0
+            backends = {
+                str(backend): {
+                    'slots': state.slots,
+                    'active': len(state.active),
+                    'queued': {priority.name.lower(): sum(1 for t in state.waiting if t.priority == priority)
+                               for priority in Priority},
+                }
+                for backend, state in self._backends.items()
+            }
+        return {'classes': classes, 'backends': backends}
+
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(config: Optional[Dict[str, Any]] = None) -> RequestScheduler:
+    """Return the process-wide request scheduler, creating it on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler(config)
+        return _scheduler
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'cache')
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + disk) cache of model responses keyed by request content."""
+
+    def __init__(self, config: Dict[str, Any], cache_dir: Optional[str] = None):
+        """
+        Initialize the response cache.
+
+        Args:
+            config: Dictionary containing response cache configuration
+            cache_dir: Base cache directory; responses go in a subdirectory
+        """
+        self.enabled = config.get('enabled', True)
+        self.max_memory_entries = config.get('max_memory_entries', 256)
+        self.max_disk_entries = config.get('max_disk_entries', 2000)
+        self.ttl_seconds = config.get('ttl_seconds', 86400)
+        self.max_temperature = config.get('max_temperature', 0.2)
+        self.directory = os.path.join(cache_dir or DEFAULT_CACHE_DIR, 'responses')
+
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._disk_count: Optional[int] = None
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'bypassed': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, context_window: List[Dict[str, str]],
+                 options: Dict[str, Any]) -> str:
+        """
+        Build a cache key from everything that determines a model's output.
+
+        Args:
+            model: Model name
+            system_prompt: System prompt text (hashed separately)
+            context_window: Messages sent to the model
+            options: Generation options
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        material = {
+            'model': model,
+            'system': hashlib.sha256(system_prompt.encode('utf-8')).hexdigest(),
+            'messages': [[msg.get('role', ''), msg.get('content', '')] for msg in context_window],
+            'options': options,
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def should_bypass(self, temperature: float) -> bool:
+        """Return True if responses at this temperature should not be cached"""
+        bypass = not self.enabled or temperature > self.max_temperature
+        if bypass and self.enabled:
+            with self._lock:
+                self.stats['bypassed'] += 1
+        return bypass
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a cached response, promoting disk hits into memory"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry['created'] <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return entry['content']
+            if entry:
+                del self._memory[key]
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry and now - entry['created'] <= self.ttl_seconds:
+                self._remember(key, entry)
+                self.stats['disk_hits'] += 1
+                return entry['content']
+            self.stats['misses'] += 1
+        if entry:
+            self._delete_disk(key)
+        return None
+
+    def put(self, key: str, content: str) -> None:
+        """Store a response in both tiers"""
+        entry = {'created': time.time(), 'content': content}
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        """Insert into the memory tier, evicting least recently used entries (lock held)"""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Failed to read cached response {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            is_new = not os.path.exists(path)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            if is_new:
+                self._evict_disk()
+        except Exception as e:
+            logger.error(f"Failed to persist cached response: {e}")
+
+    def _delete_disk(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+            with self._lock:
+                if self._disk_count:
+                    self._disk_count -= 1
+        except OSError:
+            pass
+
+    def _evict_disk(self) -> None:
+        """Keep the disk tier under max_disk_entries, removing the oldest files first"""
+        with self._lock:
+            if self._disk_count is not None:
+                self._disk_count += 1
+                if self._disk_count <= self.max_disk_entries:
+                    return
+
+        entries = []
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if item.name.endswith('.json'):
+                    entries.append((item.stat().st_mtime, item.path))
+        entries.sort()
+
+        excess = max(0, len(entries) - self.max_disk_entries)
+        for _, path in entries[:excess]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_count = len(entries) - excess
+            self.stats['evictions'] += excess
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the memory tier size"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        """Remove all cached responses from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._disk_count = 0
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith('.json'):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
+
+
+_caches: Dict[str, ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(config: Dict[str, Any], cache_dir: Optional[str] = None) -> ResponseCache:
+    """
+    Return the shared cache for a directory so all managers see the same entries.
+
+    Args:
+        config: Dictionary containing response cache configuration
+        cache_dir: Base cache directory
+
+    Returns:
+        ResponseCache: Shared cache instance
+    """
+    directory = os.path.abspath(cache_dir or DEFAULT_CACHE_DIR)
+    with _caches_lock:
+        if directory not in _caches:
+            _caches[directory] = ResponseCache(config, directory)
+        return _caches[directory]
@@ -0,0 +1,155 @@
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Session used by callers that do not name one (the desktop window)
+DEFAULT_SESSION = 'default'
+
+
+@dataclass
+class ConversationSession:
+    """Conversation state for one client of a model manager."""
+    session_id: str
+    history: List[Dict[str, str]] = field(default_factory=list)
+    summary: str = ""
+    # Encoded context from the provider's previous turn and the messages it covers
+    prompt_context: Optional[List[int]] = None
+    prompt_context_messages: List[Dict[str, str]] = field(default_factory=list)
+    # Saved KV cache of an in-process model, restored when the session is next used
+    kv_state: Any = None
+    # Request last prefilled for this session, so an unchanged prompt is not sent again
+    last_prefill: Optional[str] = None
+    # Background summarizer for this session's history (a HistoryCompactor)
+    compactor: Any = None
+    last_active: float = field(default_factory=time.monotonic)
+
+    def invalidate_context(self) -> None:
+        """Forget the saved context so the next turn sends the full prompt"""
+        self.prompt_context = None
+        self.prompt_context_messages = []
+        self.kv_state = None
+
+    def clear(self) -> None:
+        """Reset the conversation, discarding pending summaries"""
+        self.history = []
+        self.summary = ""
+        self.invalidate_context()
+        if self.compactor:
+            self.compactor.reset()
+
+
+class SessionStore:
+    """Bounded set of conversation sessions with LRU and idle eviction."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None,
+                 factory: Optional[Callable[[str], ConversationSession]] = None):
+        """
+        Initialize the session store.
+
+        Args:
+            config: Dictionary containing session configuration
+            factory: Creates a session for an id; defaults to an empty session
+        """
+        config = config or {}
+        self.max_sessions = max(1, config.get('max_sessions', 32))
+        self.idle_timeout = config.get('idle_timeout', 3600)
+        self._factory = factory or ConversationSession
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        # One-off sessions (batch prompts), outside the limit and eviction
+        self._transient: Dict[str, ConversationSession] = {}
+        self._lock = threading.Lock()
+        self.stats = {'created': 0, 'evicted_lru': 0, 'evicted_idle': 0}
+
+    def get(self, session_id: str = DEFAULT_SESSION) -> ConversationSession:
+        """
+        Return a session, creating it if needed, and mark it as recently used.
+
+        Args:
+            session_id: Client-chosen session identifier
+
+        Returns:
+            ConversationSession: The session's state
+        """
+        with self._lock:
+            session = self._transient.get(session_id)
+            if session is not None:
+                return session
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._factory(session_id)
+                self._sessions[session_id] = session
+                self.stats['created'] += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_active = time.monotonic()
+            evicted = self._evict()
+        for old in evicted:
+            old.clear()
+        return session
+
+    def peek(self, session_id: str = DEFAULT_SESSION) -> Optional[ConversationSession]:
+        """Return a session if it exists, without creating or touching it"""
+        with self._lock:
+            return self._transient.get(session_id) or self._sessions.get(session_id)
+
+    def create_transient(self) -> ConversationSession:
+        """
+        Create a one-off session that never counts towards max_sessions.
+
+        It is not evicted, so the caller must drop() it when done.
+
+        Returns:
+            ConversationSession: The new, empty session
+        """
+        session = self._factory(f"transient-{uuid.uuid4().hex}")
+        with self._lock:
+            self._transient[session.session_id] = session
+        return session
+
+    def drop(self, session_id: str) -> bool:
+        """Remove a session; returns True if it existed"""
+        with self._lock:
+            session = self._transient.pop(session_id, None) or self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.clear()
+        return True
+
+    def _evict(self) -> List[ConversationSession]:
+        """Remove idle and least recently used sessions (lock held); the default session is kept"""
+        evicted = []
+        if self.idle_timeout:
+            cutoff = time.monotonic() - self.idle_timeout
+            for session_id, session in list(self._sessions.items()):
+                if session_id != DEFAULT_SESSION and session.last_active < cutoff:
+                    evicted.append(self._sessions.pop(session_id))
+                    self.stats['evicted_idle'] += 1
+        for session_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            if session_id != DEFAULT_SESSION:
+                evicted.append(self._sessions.pop(session_id))
+                self.stats['evicted_lru'] += 1
+        for session in evicted:
+            logger.debug(f"Evicted conversation session {session.session_id}")
+        return evicted
+
+    def session_ids(self) -> List[str]:
+        """Return the live session ids, least recently used first"""
+        with self._lock:
+            return list(self._sessions)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the number of live sessions and eviction counters"""
+        with self._lock:
+            return dict(self.stats, active=len(self._sessions), transient=len(self._transient))
@@ -0,0 +1,171 @@
+import json
+import logging
+from typing import Any, Callable, Dict, Generator, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StreamError(Exception):
+    """Raised when Ollama reports an error in the middle of a streamed response."""
+
+
+def iter_ndjson(response) -> Iterator[Dict[str, Any]]:
+    """
+    Parse an Ollama NDJSON streaming response into chunk dictionaries.
+
+    Args:
+        response: A `requests` response opened with ``stream=True``
+
+    Yields:
+        Dict[str, Any]: One decoded chunk per non-empty line
+    """
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            continue
+        chunk = json.loads(line)
+        if 'error' in chunk:
+            raise StreamError(chunk['error'])
+        yield chunk
+
+
+def _partial_tag_length(text: str, tag: str) -> int:
+    """Length of the longest suffix of text that could be the start of tag"""
+    for length in range(min(len(text), len(tag) - 1), 0, -1):
+        if text.endswith(tag[:length]):
+            return length
+    return 0
+
+
+class ThinkFilter:
+    """
+    Separates <think> reasoning from answer text as tokens stream in.
+
+    Tags may be split across tokens, so text that could be the start of a tag
+    is held back until the next token decides it. Whitespace before the
+    answer (usually the newlines after </think>) is dropped.
+    """
+
+    OPEN_TAG = '<think>'
+    CLOSE_TAG = '</think>'
+
+    def __init__(self, max_reasoning_tokens: Optional[int] = None):
+        """
+        Initialize the filter.
+
+        Args:
+            max_reasoning_tokens: Reasoning tokens after which `capped` is set;
+                None or 0 for no limit
+        """
+        self.max_reasoning_tokens = max_reasoning_tokens
+        self.in_reasoning = False
+        self.reasoning_tokens = 0
+        self.reasoning: List[str] = []
+        self._pending = ""
+        self._answer_started = False
+
+    @property
+    def capped(self) -> bool:
+        """True once the current reasoning segment has used up its budget"""
+        return (self.in_reasoning and bool(self.max_reasoning_tokens)
+                and self.reasoning_tokens >= self.max_reasoning_tokens)
+
+    def feed(self, token: str) -> str:
+        """
+        Process one streamed token.
+
+        Args:
+            token: Raw text from the model
+
+        Returns:
+            str: Answer text that can be passed on now (may be empty)
+        """
+        if not token:
+            return ""
+        touched_reasoning = self.in_reasoning
+        self._pending += token
+        answer = []
+        while self._pending:
+            tag = self.CLOSE_TAG if self.in_reasoning else self.OPEN_TAG
+            index = self._pending.find(tag)
+            if index < 0:
+                # Hold back what could be the start of the tag
+                cut = len(self._pending) - _partial_tag_length(self._pending, tag)
+                self._route(self._pending[:cut], answer)
+                self._pending = self._pending[cut:]
+                break
+            self._route(self._pending[:index], answer)
+            self._pending = self._pending[index + len(tag):]
+            self.in_reasoning = not self.in_reasoning
+            touched_reasoning = True
+
+        if touched_reasoning:
+            self.reasoning_tokens += 1
+        return ''.join(answer)
+
+    def _route(self, text: str, answer: List[str]) -> None:
+        if not text:
+            return
+        if self.in_reasoning:
+            self.reasoning.append(text)
+            return
+        if not self._answer_started:
+            text = text.lstrip()
+            if not text:
+                return
+            self._answer_started = True
+        answer.append(text)
+
+    def flush(self) -> str:
+        """Return answer text still held back at the end of the stream"""
+        pending, self._pending = self._pending, ""
+        if self.in_reasoning:
+            # An unterminated reasoning segment is not part of the answer
+            self.reasoning.append(pending)
+            return ""
+        answer = []
+        self._route(pending, answer)
+        return ''.join(answer)
+
+    def force_answer(self) -> str:
+        """
+        End the reasoning segment early so the answer can be requested directly.
+
+        Returns:
+            str: The reasoning produced so far
+        """
+        if self.in_reasoning:
+            self.reasoning.append(self._pending)
+            self._pending = ""
+            self.in_reasoning = False
+        self.max_reasoning_tokens = None
+        return ''.join(self.reasoning)
+
+
+def strip_reasoning(text: str) -> str:
+    """Remove <think> segments from a complete response"""
+    think = ThinkFilter()
+    return (think.feed(text) + think.flush()).strip()
+
+
+def collect_stream(stream: Generator[str, None, Any],
+                   on_token: Optional[Callable[[str], None]] = None) -> Any:
+    """
+    Drain a token generator and return its final value.
+
+    Streaming generators in the AI layer yield content tokens and return the
+    final AIResponse, which plain iteration would discard.
+
+    Args:
+        stream: Generator yielding tokens and returning a result
+        on_token: Optional callback invoked for every token
+
+    Returns:
+        The generator's return value
+    """
+    while True:
+        try:
+            token = next(stream)
+        except StopIteration as stop:
+            return stop.value
+        if on_token:
+            on_token(token)
@@ -0,0 +1,145 @@
+import math
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Fields summarized by the rolling histogram
+METRIC_FIELDS = ('ttft', 'total_time', 'prompt_tokens', 'generated_tokens',
+                 'tokens_per_second', 'load_time', 'prompt_eval_time', 'retries', 'reasoning_tokens')
+
+_NS_PER_SECOND = 1e9
+
+
+@dataclass
+class GenerationMetrics:
+    """Timing and token counts for one generation."""
+    model: str
+    ttft: Optional[float] = None
+    total_time: float = 0.0
+    prompt_tokens: int = 0
+    generated_tokens: int = 0
+    tokens_per_second: float = 0.0
+    load_time: float = 0.0
+    prompt_eval_time: float = 0.0
+    retries: int = 0
+    # Tokens spent inside <think> segments, included in generated_tokens
+    reasoning_tokens: int = 0
+    reasoning_capped: bool = False
+    cached: bool = False
+    # perf_counter() value when the request started
+    started: float = field(default=0.0, repr=False)
+
+    def update_from_ollama(self, chunk: Dict[str, Any]) -> None:
+        """Read the timing fields Ollama attaches to the final chunk of a response"""
+        self.prompt_tokens = chunk.get('prompt_eval_count', self.prompt_tokens)
+        self.generated_tokens = chunk.get('eval_count', self.generated_tokens)
+        self.load_time = chunk.get('load_duration', 0) / _NS_PER_SECOND
+        self.prompt_eval_time = chunk.get('prompt_eval_duration', 0) / _NS_PER_SECOND
+        eval_duration = chunk.get('eval_duration', 0)
+        if eval_duration:
+            self.tokens_per_second = self.generated_tokens / (eval_duration / _NS_PER_SECOND)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop('started')
+        return data
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a sorted list"""
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class TelemetryRecorder:
+    """Rolling in-process window of generation metrics."""
+
+    def __init__(self, window: int = 500):
+        """
+        Initialize the recorder.
+
+        Args:
+            window: Number of most recent generations kept
+        """
+        self._records = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, metrics: GenerationMetrics) -> None:
+        """Add a generation's metrics to the window and log them"""
+        with self._lock:
+            self._records.append(metrics)
+        ttft = f"{metrics.ttft:.2f}s" if metrics.ttft is not None else "n/a"
+        logger.info(f"Generation metrics [{metrics.model}]: ttft={ttft} total={metrics.total_time:.2f}s "
+                    f"prompt_tokens={metrics.prompt_tokens} generated_tokens={metrics.generated_tokens} "
+                    f"tokens/s={metrics.tokens_per_second:.1f} load={metrics.load_time:.2f}s "
+                    f"retries={metrics.retries} reasoning_tokens={metrics.reasoning_tokens}"
+                    f"{' (capped)' if metrics.reasoning_capped else ''}")
+
+    def recent(self, model: Optional[str] = None) -> List[GenerationMetrics]:
+        """Return the recorded metrics, optionally for one model"""
+        with self._lock:
+            records = list(self._records)
+        return [m for m in records if model is None or m.model == model]
+
+    def summary(self, model: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize each metric over the window.
+
+        Args:
+            model: Restrict the summary to one model
+
+        Returns:
+            Dict[str, Dict[str, float]]: count, mean, p50, p95 and p99 per metric
+        """
+        records = self.recent(model)
+        summary = {}
+        for field in METRIC_FIELDS:
+            values = sorted(getattr(m, field) for m in records if getattr(m, field) is not None)
+            if not values:
+                continue
+            summary[field] = {
+                'count': len(values),
+                'mean': sum(values) / len(values),
+                'p50': _percentile(values, 0.50),
+                'p95': _percentile(values, 0.95),
+                'p99': _percentile(values, 0.99),
+            }
+        return summary
+
+    def histogram(self, field: str, buckets: List[float], model: Optional[str] = None) -> Dict[str, int]:
+        """
+        Count recorded values of a metric into buckets.
+
+        Args:
+            field: Metric name, e.g. 'ttft'
+            buckets: Ascending upper bounds
+            model: Restrict the histogram to one model
+
+        Returns:
+            Dict[str, int]: Count per bucket label ('<=1.0', ..., '>5.0')
+        """
+        counts = {f"<={bound}": 0 for bound in buckets}
+        counts[f">{buckets[-1]}"] = 0
+        for metrics in self.recent(model):
+            value = getattr(metrics, field, None)
+            if value is None:
+                continue
+            for bound in buckets:
+                if value <= bound:
+                    counts[f"<={bound}"] += 1
+                    break
+            else:
+                counts[f">{buckets[-1]}"] += 1
+        return counts
+
+
+_telemetry = TelemetryRecorder()
+
+
+def get_telemetry() -> TelemetryRecorder:
+    """Return the process-wide telemetry recorder."""
+    return _telemetry
@@ -0,0 +1,506 @@
+import io
+import hmac
+import json
+import secrets
+import uuid
+import wave
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, AsyncIterator, Optional, Set, Tuple
+
+from aiohttp import web, WSMsgType
+
+from core.ai.base_ai_manager import AIResponse
+from core.ai.request_scheduler import Priority
+from core.ai.streaming import collect_stream
+from core.utils.cancellation import CancellationToken
+
+logger = logging.getLogger(__name__)
+
+MAX_SESSION_ID_LENGTH = 128
+# How often a request that writes nothing until it finishes checks that its client is still connected
+DISCONNECT_CHECK_INTERVAL = 0.25
+
+
+class ServerBusy(Exception):
+    """Raised when every generation slot is taken and the wait queue is full."""
+
+
+class RequestError(Exception):
+    """A client error, reported with an HTTP status."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _response_body(response: AIResponse, session_id: str) -> Dict[str, Any]:
+    """Final result of a generation as sent to clients"""
+    return {
+        'success': response.success,
+        'content': response.content,
+        'error': response.error,
+        'session_id': session_id,
+        'metrics': response.metrics.to_dict() if response.metrics else None,
+    }
+
+
+def _session_id(value: Any) -> str:
+    """Validate a client-supplied session id, or create one for a new conversation"""
+    if value is None:
+        return uuid.uuid4().hex
+    if not isinstance(value, str) or not value or len(value) > MAX_SESSION_ID_LENGTH:
+        raise RequestError(f"session_id must be a string of 1-{MAX_SESSION_ID_LENGTH} characters")
+    return value
+
+
+class AssistantServer:
+    """
+    Local HTTP and WebSocket API over one warm assistant.
+
+    Generations run on worker threads behind a bounded number of slots, and
+    each client conversation keeps its own session on the model manager.
+    """
+
+    def __init__(self, config: Dict[str, Any], assistant, stt=None, automation=None):
+        """
+        Initialize the server (call run() to start serving).
+
+        Args:
+            config: Dictionary containing server configuration
+            assistant: Model manager that answers prompts
+            stt: Optional STTEngine for /api/transcribe
+            automation: Optional AutomationServices for the reminder endpoints
+        """
+        self.host = config.get('host', '127.0.0.1')
+        self.port = config.get('port', 8765)
+        self.max_concurrency = max(1, config.get('max_concurrency', 4))
+        self.max_queue = config.get('max_queue', 16)
+        self.max_body_size = config.get('max_body_size', 10 * 1024 * 1024)
+        self.auth_token = config.get('auth_token')
+        if self.auth_token in (None, ''):
+            self.auth_token = None
+        elif not isinstance(self.auth_token, str):
+            # The config loader turns values like "1234" or "yes" into numbers and booleans
+            raise ValueError("server.auth_token must not be a plain number or boolean; "
+                             "choose a token with letters in it")
+        # Browsers send an Origin header; only these pages may call the API or open a WebSocket
+        self.allowed_origins = set(config.get('allowed_origins', []))
+
+        self.assistant = assistant
+        self.stt = stt
+        self.automation = automation
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency + 2,
+                                            thread_name_prefix="APIWorker")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sockets: Set[Any] = set()
+        self._waiting = 0
+        self._active = 0
+        self.stats = {'requests': 0, 'rejected': 0, 'cancelled': 0}
+
+    # -- Admission ---------------------------------------------------------
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        """Hold one generation slot, queueing up to max_queue waiters"""
+        if self._slots.locked() and self._waiting >= self.max_queue:
+            self.stats['rejected'] += 1
+            raise ServerBusy()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self._active += 1
+        self.stats['requests'] += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._slots.release()
+
+    async def _call(self, function, *args):
+        """Run a blocking call on the worker pool"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def _generate(self, prompt: str, session_id: str, cancel_token: CancellationToken,
+                        automation: bool = True) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a generation from a worker thread.
+
+        Yields ('token', text) for each token, then ('done', AIResponse).
+        If the consumer stops early the generation is cancelled, and the slot
+        is held until the worker thread has finished with the model.
+        """
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+
+        def put(kind: str, value: Any) -> None:
+            loop.call_soon_threadsafe(events.put_nowait, (kind, value))
+
+        def run() -> None:
+            try:
+                result = collect_stream(
+                    self.assistant.generate_response_stream(
+                        prompt, cancel_token, automation=automation,
+                        priority=Priority.CHAT, session_id=session_id
+                    ),
+                    on_token=lambda token: put('token', token)
+                )
+            except Exception as e:
+                logger.error(f"API generation failed: {e}")
+                result = AIResponse(success=False, content="", error=str(e))
+            put('done', result)
+
+        async with self._slot():
+            worker = asyncio.wrap_future(self._executor.submit(run))
+            finished = False
+            try:
+                while True:
+                    kind, value = await events.get()
+                    if kind == 'done':
+                        finished = True
+                    yield kind, value
+                    if finished:
+                        return
+            finally:
+                if not finished:
+                    cancel_token.cancel()
+                # Leaving the slot before the thread is done would let more generations run than max_concurrency
+                cancelled = False
+                while not worker.done():
+                    try:
+                        await asyncio.shield(worker)
+                    except asyncio.CancelledError:
+                        cancelled = True
+                if cancelled:
+                    raise asyncio.CancelledError()
+
+    # -- HTTP --------------------------------------------------------------
+
+    def _create_app(self):
+        @web.middleware
+        async def errors(request, handler):
+            # Browsers attach an Origin to cross-site requests; only the allowed pages may call the API
+            origin = request.headers.get('Origin')
+            if origin and origin not in self.allowed_origins:
+                logger.warning(f"Rejected {request.method} {request.path} from origin {origin}")
+                return web.json_response({'error': 'Origin not allowed'}, status=403)
+            if self.auth_token and not self._authorized(request):
+                return web.json_response({'error': 'Unauthorized'}, status=401)
+            try:
+                return await handler(request)
+            except RequestError as e:
+                return web.json_response({'error': str(e)}, status=e.status)
+            except ServerBusy:
+                return web.json_response({'error': 'Server busy'}, status=503, headers={'Retry-After': '1'})
+
+        app = web.Application(middlewares=[errors], client_max_size=self.max_body_size)
+        app.add_routes([
+            web.get('/api/health', self.handle_health),
+            web.post('/api/generate', self.handle_generate),
+            web.post('/api/command', self.handle_command),
+            web.get('/api/reminders', self.handle_list_reminders),
+            web.post('/api/reminders', self.handle_add_reminder),
+            web.delete('/api/reminders', self.handle_clear_reminders),
+            web.post('/api/transcribe', self.handle_transcribe),
+            web.delete('/api/sessions/{session_id}', self.handle_end_session),
+            web.get('/ws', self.handle_websocket),
+        ])
+        app.on_startup.append(self._on_startup)
+        app.on_shutdown.append(self._on_shutdown)
+        return app
+
+    def _authorized(self, request) -> bool:
+        header = request.headers.get('Authorization', '')
+        token = header[7:] if header.startswith('Bearer ') else request.query.get('token', '')
+        return hmac.compare_digest(token.encode('utf-8'), self.auth_token.encode('utf-8'))
+
+    @staticmethod
+    async def _json_body(request) -> Dict[str, Any]:
+        # Other types can be sent cross-site without a CORS preflight
+        if request.content_type != 'application/json':
+            raise RequestError("Content-Type must be application/json", status=415)
+        try:
+            body = await request.json()
+        except ValueError:
+            raise RequestError("Request body must be JSON")
+        if not isinstance(body, dict):
+            raise RequestError("Request body must be a JSON object")
+        return body
+
+    async def handle_health(self, request):
+        return web.json_response({
+            'status': 'ok',
+            'model': self.assistant.model_name,
+            'active': self._active,
+            'queued': self._waiting,
+            'max_concurrency': self.max_concurrency,
+            'sessions': self.assistant.get_session_stats(),
+            'transcription': self.stt is not None,
+            'stats': self.stats,
+        })
+
+    async def handle_generate(self, request):
+        """
+        Answer a prompt: {"prompt", "session_id"?, "stream"?, "automation"?}.
+
+        Streams newline-delimited JSON ({"token": ...} lines, then the result
+        with "done": true) unless "stream" is false. Without a session_id a
+        new conversation is started; its id is returned with the result.
+        """
+        body = await self._json_body(request)
+        prompt = body.get('prompt')
+        if not isinstance(prompt, str) or not prompt.strip():
+            raise RequestError("prompt is required")
+        session_id = _session_id(body.get('session_id') or request.headers.get('X-Session-Id'))
+        automation = bool(body.get('automation', True))
+
+        cancel_token = CancellationToken()
+        events = self._generate(prompt, session_id, cancel_token, automation)
+        try:
+            if not body.get('stream', True):
+                while True:
+                    kind, value = await self._next_event(events, request)
+                    if kind == 'done':
+                        return web.json_response(_response_body(value, session_id))
+
+            # The first event is awaited before headers go out, so a full queue is still a 503
+            kind, value = await events.__anext__()
+            response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson',
+                                                   'X-Session-Id': session_id})
+            await response.prepare(request)
+            while kind == 'token':
+                await response.write((json.dumps({'token': value}) + '\n').encode('utf-8'))
+                kind, value = await events.__anext__()
+            await response.write((json.dumps(dict(_response_body(value, session_id), done=True))
+                                  + '\n').encode('utf-8'))
+            await response.write_eof()
+            return response
+        except (asyncio.CancelledError, ConnectionResetError):
+            # The client went away: stop the model instead of finishing an unread answer
+            cancel_token.cancel()
+            self.stats['cancelled'] += 1
+            raise
+        finally:
+            # Releases the generation slot
+            await events.aclose()
+
+    @staticmethod
+    async def _next_event(events: AsyncIterator[Tuple[str, Any]], request) -> Tuple[str, Any]:
+        """
+        Wait for the next generation event while watching the client's connection.
+
+        Raises:
+            ConnectionResetError: The client disconnected first; the
+                generation has been stopped
+        """
+        pending = asyncio.ensure_future(events.__anext__())
+        while True:
+            done, _ = await asyncio.wait({pending}, timeout=DISCONNECT_CHECK_INTERVAL)
+            if done:
+                return pending.result()
+            transport = request.transport
+            if transport is None or transport.is_closing():
+                pending.cancel()
+                try:
+                    await pending
+                except asyncio.CancelledError:
+                    pass
+                raise ConnectionResetError("Client disconnected")
+
+    async def _run_command(self, command: Any) -> Dict[str, Any]:
+        if not isinstance(command, str) or not command.strip():
+            raise RequestError("command is required")
+        async with self._slot():
+            result = await self._call(self.assistant.run_automation_command, command)
+        return {'handled': result is not None, 'result': result}
+
+    async def handle_command(self, request):
+        """Run an automation command: {"command"}; "handled" is false for anything else"""
+        body = await self._json_body(request)
+        return web.json_response(await self._run_command(body.get('command')))
+
+    async def _reminder(self):
+        reminder = self.automation.get('reminder') if self.automation else None
+        if reminder is None:
+            raise RequestError("Reminders are not available", status=503)
+        return reminder
+
+    async def handle_list_reminders(self, request):
+        reminder = await self._reminder()
+        return web.json_response({'reminders': reminder.get_reminders()})
+
+    async def handle_add_reminder(self, request):
+        """Add a reminder: {"message", "when": "YYYY-MM-DD HH:MM:SS"} or {"message", "in_minutes"}"""
+        body = await self._json_body(request)
+        message = body.get('message')
+        if not isinstance(message, str) or not message.strip():
+            raise RequestError("message is required")
+        try:
+            if 'in_minutes' in body:
+                when = datetime.now() + timedelta(minutes=float(body['in_minutes']))
+            else:
+                when = datetime.strptime(str(body.get('when')), "%Y-%m-%d %H:%M:%S")
+        except (TypeError, ValueError):
+            raise RequestError("when must be 'YYYY-MM-DD HH:MM:SS' or in_minutes a number")
+        reminder = await self._reminder()
+        return web.json_response({'result': await self._call(reminder.add_reminder, message, when)})
+
+    async def handle_clear_reminders(self, request):
+        reminder = await self._reminder()
+        return web.json_response({'result': await self._call(reminder.clear_reminders)})
+
+    def _pcm_audio(self, data: bytes) -> bytes:
+        """Return the 16-bit mono PCM frames of a WAV file, or raw PCM as sent"""
+        if not data.startswith(b'RIFF'):
+            return data
+        try:
+            with wave.open(io.BytesIO(data)) as wav:
+                if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+                    raise RequestError("Audio must be 16-bit mono")
+                if wav.getframerate() != self.stt.sample_rate:
+                    raise RequestError(f"Audio must be sampled at {self.stt.sample_rate} Hz")
+                return wav.readframes(wav.getnframes())
+        except wave.Error as e:
+            raise RequestError(f"Invalid WAV file: {e}")
+
+    async def handle_transcribe(self, request):
+        """Transcribe a WAV file or raw 16-bit mono PCM at the STT sample rate"""
+        if self.stt is None:
+            raise RequestError("Transcription is not available", status=503)
+        audio = self._pcm_audio(await request.read())
+        if not audio:
+            raise RequestError("Audio body is required")
+        async with self._slot():
+            text = await self._call(self.stt.transcribe, audio)
+        return web.json_response({'text': text})
+
+    async def handle_end_session(self, request):
+        self.assistant.end_session(request.match_info['session_id'])
+        return web.json_response({'ended': True})
+
+    # -- WebSocket ---------------------------------------------------------
+
+    async def handle_websocket(self, request):
+        """
+        Bidirectional API for long-lived clients.
+
+        Messages are JSON objects with a "type":
+            generate {id, prompt, session_id?} -> token {id, content}..., done {id, ...}
+            cancel {id}                        -> stops a running generation
+            command {id, command}              -> result {id, handled, result}
+            clear {session_id?}                -> clears the conversation
+        Fired reminders are pushed as reminder {message}. The connection has
+        its own session, ended when it closes.
+        """
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        connection_session = uuid.uuid4().hex
+        running: Dict[Any, Tuple[asyncio.Task, CancellationToken]] = {}
+        self._sockets.add(ws)
+
+        async def generate(message_id, prompt: str, session_id: str, cancel_token: CancellationToken):
+            try:
+                async for kind, value in self._generate(prompt, session_id, cancel_token):
+                    if kind == 'token':
+                        await ws.send_json({'type': 'token', 'id': message_id, 'content': value})
+                    else:
+                        await ws.send_json(dict(_response_body(value, session_id), type='done', id=message_id))
+            except ServerBusy:
+                await ws.send_json({'type': 'error', 'id': message_id, 'error': 'Server busy'})
+            except ConnectionResetError:
+                cancel_token.cancel()
+            finally:
+                running.pop(message_id, None)
+
+        async def command(message_id, text: Any):
+            try:
+                await ws.send_json(dict(await self._run_command(text), type='result', id=message_id))
+            except (RequestError, ServerBusy) as e:
+                await ws.send_json({'type': 'error', 'id': message_id, 'error': str(e) or 'Server busy'})
+
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    message = json.loads(msg.data)
+                    kind = message.get('type')
+                    message_id = message.get('id')
+                    session_id = _session_id(message.get('session_id') or connection_session)
+                except (ValueError, AttributeError, RequestError) as e:
+                    await ws.send_json({'type': 'error', 'error': f"Invalid message: {e}"})
+                    continue
+
+                if kind == 'generate':
+                    prompt = message.get('prompt')
+                    if not isinstance(prompt, str) or not prompt.strip():
+                        await ws.send_json({'type': 'error', 'id': message_id, 'error': 'prompt is required'})
+                    elif message_id in running:
+                        await ws.send_json({'type': 'error', 'id': message_id, 'error': 'id already in use'})
+                    else:
+                        cancel_token = CancellationToken()
+                        task = asyncio.ensure_future(generate(message_id, prompt, session_id, cancel_token))
+                        running[message_id] = (task, cancel_token)
+                elif kind == 'cancel':
+                    if message_id in running:
+                        running[message_id][1].cancel()
+                        self.stats['cancelled'] += 1
+                elif kind == 'command':
+                    asyncio.ensure_future(command(message_id, message.get('command')))
+                elif kind == 'clear':
+                    self.assistant.clear_conversation(session_id)
+                    await ws.send_json({'type': 'cleared', 'id': message_id, 'session_id': session_id})
+                else:
+                    await ws.send_json({'type': 'error', 'id': message_id, 'error': f"Unknown type: {kind}"})
+        finally:
+            self._sockets.discard(ws)
+            for task, cancel_token in list(running.values()):
+                cancel_token.cancel()
+                task.cancel()
+            self.assistant.end_session(connection_session)
+        return ws
+
+    def _on_reminder(self, message: str) -> None:
+        """Push fired reminders to every connected WebSocket client (reminder thread)"""
+        if self._loop and not self._loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._broadcast({'type': 'reminder', 'message': message}), self._loop)
+
+    async def _broadcast(self, payload: Dict[str, Any]) -> None:
+        for ws in list(self._sockets):
+            try:
+                await ws.send_json(payload)
+            except Exception as e:
+                logger.debug(f"Failed to push to WebSocket client: {e}")
+
+    # -- Lifecycle ---------------------------------------------------------
+
+    async def _on_startup(self, app) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        if self.automation:
+            self.automation.add_reminder_callback(self._on_reminder)
+
+    async def _on_shutdown(self, app) -> None:
+        for ws in list(self._sockets):
+            await ws.close(message=b'Server shutting down')
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self) -> None:
+        """Serve until interrupted (Ctrl+C)"""
+        if not self.auth_token:
+            # Any local process could otherwise drive the assistant
+            self.auth_token = secrets.token_urlsafe(32)
+            # Shown once on the console, never written to the log file
+            logger.warning("No server.auth_token configured; generated a token for this run "
+                           "(set AURIX_API_TOKEN to choose one)")
+            print(f"API token: {self.auth_token}", flush=True)
+        logger.info(f"API server listening on http://{self.host}:{self.port} "
+                    f"({self.max_concurrency} concurrent generations)")
+        web.run_app(self._create_app(), host=self.host, port=self.port, print=None)
@@ -0,0 +1,235 @@
+import sys
+import time
+import logging
+import threading
+import importlib.util
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Built at startup: reminders saved in earlier sessions must fire without
+# the user touching the reminder commands
+EAGER_COMPONENTS = ('reminder',)
+
+# Third-party modules each component needs, checked without importing them
+COMPONENT_DEPENDENCIES = {
+    'app_launcher': ('winreg', 'psutil'),
+    'reminder': (),
+    'system_ctrl': ('comtypes', 'pycaw', 'screen_brightness_control'),
+    'web_actions': ('bs4', 'dotenv'),
+}
+
+
+def _installed(module: str) -> bool:
+    """Whether a module can be imported, without importing it"""
+    if module in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _build_app_launcher():
+    from core.automation.app_launcher import AppLauncher
+    return AppLauncher()
+
+
+def _build_system_ctrl():
+    from core.automation.system_ctrl import SystemController
+    return SystemController()
+
+
+class LazyComponent:
+    """Stand-in for an automation component that builds it on first use."""
+
+    def __init__(self, services: 'AutomationServices', name: str):
+        self._services = services
+        self._name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        instance = self._services.get(self._name)
+        if instance is None:
+            raise AttributeError(f"{self._name} is not available")
+        return getattr(instance, attr)
+
+    def __bool__(self) -> bool:
+        # Truth-testing is how callers check availability before use
+        return self._services.get(self._name) is not None
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the component has been built, checked without building it"""
+        return self._services.is_loaded(self._name)
+
+    def __repr__(self) -> str:
+        return f"<LazyComponent {self._name} ({self._services.get_states()[self._name]})>"
+
+
+class AutomationServices:
+    """Process-wide automation components, each built once and shared by all managers and the UI."""
+
+    def __init__(self):
+        self.config: Dict[str, Any] = {}
+        self._factories: Dict[str, Callable[[], Any]] = {
+            'app_launcher': _build_app_launcher,
+            'reminder': self._build_reminder,
+            'system_ctrl': _build_system_ctrl,
+            'web_actions': self._build_web_actions,
+        }
+        self._instances: Dict[str, Any] = {}
+        self._init_costs: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._locks = {name: threading.Lock() for name in self._factories}
+        self._proxies = {name: LazyComponent(self, name) for name in self._factories}
+        self._reminder_callbacks: List[Callable[[str], None]] = []
+
+    def configure(self, config: Optional[Dict[str, Any]]) -> None:
+        """Set the automation configuration; applies to components built afterwards"""
+        self.config = config or {}
+
+    def _build_reminder(self):
+        from core.automation.reminder import Reminder
+        return Reminder(self._dispatch_reminder)
+
+    def _build_web_actions(self):
+        from core.automation.web_actions import WebActions
+        return WebActions(self.config.get('web', {}))
+
+    def add_reminder_callback(self, callback: Optional[Callable[[str], None]]) -> None:
+        """Register a function to call when a reminder fires"""
+        if callback and callback not in self._reminder_callbacks:
+            self._reminder_callbacks.append(callback)
+
+    def _dispatch_reminder(self, message: str) -> None:
+        for callback in list(self._reminder_callbacks):
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error(f"Reminder callback failed: {e}")
+
+    def get(self, name: str) -> Optional[Any]:
+        """
+        Return a component, building it on first use.
+
+        Args:
+            name: Component name, e.g. 'app_launcher'
+
+        Returns:
+            Optional[Any]: The component, or None if it failed to initialize
+        """
+        if name in self._instances:
+            return self._instances[name]
+        with self._locks[name]:
+            if name in self._instances:
+                return self._instances[name]
+            start = time.perf_counter()
+            try:
+                instance = self._factories[name]()
+                logger.info(f"Initialized {name} in {(time.perf_counter() - start) * 1000:.0f}ms")
+            except Exception as e:
+                logger.error(f"Failed to initialize {name}: {e}")
+                self._errors[name] = str(e)
+                instance = None
+            self._init_costs[name] = time.perf_counter() - start
+            self._instances[name] = instance
+            return instance
+
+    def is_loaded(self, name: str) -> bool:
+        """Return True if a component was built successfully, without building it"""
+        return self._instances.get(name) is not None
+
+    @property
+    def app_launcher(self) -> LazyComponent:
+        return self._proxies['app_launcher']
+
+    @property
+    def reminder(self) -> LazyComponent:
+        return self._proxies['reminder']
+
+    @property
+    def system_ctrl(self) -> LazyComponent:
+        return self._proxies['system_ctrl']
+
+    @property
+    def web_actions(self) -> LazyComponent:
+        return self._proxies['web_actions']
+
+    def start(self) -> None:
+        """Build the components that must run from startup"""
+        for name in EAGER_COMPONENTS:
+            self.get(name)
+
+    def initialize_all(self) -> None:
+        """Build every component that has not been built yet"""
+        for name in self._factories:
+            self.get(name)
+
+    def prewarm(self, names: Optional[Iterable[str]] = None) -> threading.Thread:
+        """
+        Build components on a background thread so first use is instant.
+
+        Args:
+            names: Components to build; all of them by default
+
+        Returns:
+            threading.Thread: The pre-warm thread
+        """
+        names = list(names or self._factories)
+
+        def run():
+            for name in names:
+                self.get(name)
+            logger.debug(f"Pre-warmed automation components: {', '.join(names)}")
+
+        thread = threading.Thread(target=run, daemon=True, name="AutomationPrewarm")
+        thread.start()
+        return thread
+
+    def get_init_costs(self) -> Dict[str, float]:
+        """Return the seconds each built component took to initialize"""
+        return dict(self._init_costs)
+
+    def get_states(self) -> Dict[str, str]:
+        """Return 'ready', 'failed' or 'not_loaded' for each component"""
+        states = {}
+        for name in self._factories:
+            if name not in self._instances:
+                states[name] = 'not_loaded'
+            else:
+                states[name] = 'ready' if self._instances[name] is not None else 'failed'
+        return states
+
+    def get_status(self) -> Dict[str, bool]:
+        """
+        Return whether each component is available, without building any.
+
+        Components not built yet are reported available when their
+        dependencies are installed.
+        """
+        status = {}
+        for name, state in self.get_states().items():
+            if state == 'not_loaded':
+                status[name] = all(_installed(module) for module in COMPONENT_DEPENDENCIES.get(name, ()))
+            else:
+                status[name] = state == 'ready'
+        return status
+
+    def shutdown(self) -> None:
+        """Persist state held by the components"""
+        if self.is_loaded('reminder'):
+            self._instances['reminder'].save_reminders()
+        logger.debug("Automation services shut down")
+
+
+_services: Optional[AutomationServices] = None
+_services_lock = threading.Lock()
+
+
+def get_automation_services() -> AutomationServices:
+    """Return the process-wide automation services, creating the container on first use."""
+    global _services
+    with _services_lock:
+        if _services is None:
+            _services = AutomationServices()
+        return _services
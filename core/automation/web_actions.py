@@ -4,21 +4,31 @@ from bs4 import BeautifulSoup
 from urllib.parse import quote_plus
 import re
 import logging
-from typing import List, Dict
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
+from core.utils.http_transport import get_transport
+from core.utils.retry_policy import RetryPolicy
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 class WebActions:
-    def __init__(self):
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.ddg_search_url = "https://duckduckgo.com/html/"
         self.google_search_url = "https://www.google.com/search"
         self.serpapi_key = os.getenv("SERPAPI_API_KEY")
+        # Web lookups get one quick retry and must finish within the deadline
+        retry_config = dict(config.get('retry', {}))
+        retry_config.setdefault('max_attempts', 2)
+        retry_config.setdefault('deadline', 20)
+        retry_config.setdefault('timeout_growth', 0)
+        self.retry_policy = RetryPolicy(retry_config)
+        self.timeout = config.get('timeout', 10)
         if not self.serpapi_key:
             logger.warning("SERPAPI_API_KEY not found in environment variables. SerpAPI will not be used.")
 
@@ -47,11 +57,18 @@ class WebActions:
             logger.error("Both search engines failed to return results")
             return []
 
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """GET a page, retrying transient failures within the retry deadline"""
+        def attempt(timeout):
+            response = get_transport().get(url, headers=self.headers, timeout=timeout, **kwargs)
+            response.raise_for_status()
+            return response
+        return self.retry_policy.call(attempt, timeout=self.timeout)
+
     def _search_duckduckgo(self, query, num_results=5):
         try:
             params = {'q': query}
-            response = requests.get(self.ddg_search_url, params=params, headers=self.headers, timeout=10)
-            response.raise_for_status()
+            response = self._get(self.ddg_search_url, params=params)
 
             soup = BeautifulSoup(response.text, 'html.parser')
             results = []
@@ -86,8 +103,7 @@ class WebActions:
     def _search_google(self, query, num_results=5):
         try:
             params = {'q': query, 'num': num_results}
-            response = requests.get(self.google_search_url, params=params, headers=self.headers, timeout=10)
-            response.raise_for_status()
+            response = self._get(self.google_search_url, params=params)
 
             soup = BeautifulSoup(response.text, 'html.parser')
             results = []
@@ -162,8 +178,7 @@ class WebActions:
         Scrape the content of a webpage and return the text.
         """
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
+            response = self._get(url)  # Raises HTTPError for bad responses (4xx or 5xx)
             soup = BeautifulSoup(response.text, 'html.parser')
             
             # Extract all text from the webpage
@@ -0,0 +1,66 @@
+import logging
+import threading
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+CANCELLED_ERROR = "Generation cancelled"
+
+
+class CancellationToken:
+    """Thread-safe flag used to abort an in-flight request from another thread."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """True once cancel() has been called"""
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Cancel the token and run every registered abort callback"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+            self._callbacks.clear()
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug(f"Cancellation callback failed: {e}")
+
+    def register(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Register a callback to run on cancellation.
+
+        The callback runs immediately if the token is already cancelled.
+
+        Args:
+            callback: Function that aborts the guarded operation
+
+        Returns:
+            Callable[[], None]: Function that unregisters the callback
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+
+                def unregister():
+                    with self._lock:
+                        if callback in self._callbacks:
+                            self._callbacks.remove(callback)
+
+                return unregister
+
+        callback()
+        return lambda: None
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep for up to `timeout` seconds, returning True early if cancelled"""
+        return self._event.wait(timeout)
@@ -53,14 +53,18 @@ class ConfigValidator:
             logger.error("Primary AI model configuration is missing")
             return False
         
-        required_fields = ['provider', 'base_url', 'model']
+        # In-process models are loaded from a file rather than served from an endpoint
+        if primary.get('provider') == 'llamacpp':
+            required_fields = ['provider', 'model_path']
+        else:
+            required_fields = ['provider', 'base_url', 'model']
         for field in required_fields:
             if not primary.get(field):
                 logger.error(f"Missing required AI config field: {field}")
                 return False
         
         # Validate provider
-        valid_providers = ['gemma', 'ollama']
+        valid_providers = ['gemma', 'ollama', 'llamacpp']
         if primary.get('provider') not in valid_providers:
             logger.error(f"Invalid AI provider: {primary.get('provider')}")
             return False
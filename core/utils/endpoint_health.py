@@ -0,0 +1,249 @@
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+from core.utils.http_transport import get_transport
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for a single endpoint."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 3, recovery_timeout: float = 15.0):
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds the circuit stays open before a trial request
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state; an open circuit turns half-open once the recovery timeout passes"""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_started = None
+        return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Decide whether a request may be sent.
+
+        A half-open circuit lets a single trial request through; its outcome
+        closes or re-opens the circuit.
+
+        Returns:
+            bool: True if the request should be attempted
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.OPEN:
+                return False
+            now = time.monotonic()
+            # A trial that never reported back must not block recovery forever
+            if self._trial_started is None or now - self._trial_started >= self.recovery_timeout:
+                self._trial_started = now
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Close the circuit"""
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Circuit closed after successful request")
+            self._state = self.CLOSED
+            self.failures = 0
+            self._trial_started = None
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit at the threshold or after a failed trial"""
+        with self._lock:
+            state = self._current_state()
+            self.failures += 1
+            if state == self.HALF_OPEN or (state == self.CLOSED and self.failures >= self.failure_threshold):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_started = None
+                logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+
+
+class EndpointHealthMonitor:
+    """Tracks the health of each model endpoint and probes it in the background."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the health monitor.
+
+        Args:
+            config: Dictionary containing health check configuration
+        """
+        config = config or {}
+        self.background_probe = config.get('background_probe', True)
+        self.probe_interval = config.get('probe_interval', 30)
+        self.probe_timeout = config.get('probe_timeout', 2.0)
+        self.cache_ttl = config.get('cache_ttl', 10)
+        self.failure_threshold = config.get('failure_threshold', 3)
+        self.recovery_timeout = config.get('recovery_timeout', 15)
+
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # base_url -> (monotonic time of last probe, healthy)
+        self._last_probe: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def watch(self, base_url: str) -> None:
+        """Start tracking an endpoint"""
+        self.breaker(base_url)
+        if self.background_probe:
+            self.start()
+
+    def breaker(self, base_url: str) -> CircuitBreaker:
+        """Get or create the circuit breaker for an endpoint"""
+        with self._lock:
+            breaker = self._breakers.get(base_url)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.recovery_timeout)
+                self._breakers[base_url] = breaker
+            return breaker
+
+    def allow_request(self, base_url: str) -> bool:
+        """Return False if requests to the endpoint should fail fast"""
+        allowed = self.breaker(base_url).allow_request()
+        if not allowed:
+            logger.debug(f"Circuit open for {base_url}, failing fast")
+        return allowed
+
+    def is_available(self, base_url: str) -> bool:
+        """Return True unless the endpoint's circuit is open"""
+        return self.breaker(base_url).state != CircuitBreaker.OPEN
+
+    def record_success(self, base_url: str) -> None:
+        """Record a successful request to the endpoint"""
+        self.breaker(base_url).record_success()
+        with self._lock:
+            self._last_probe[base_url] = (time.monotonic(), True)
+
+    def record_failure(self, base_url: str) -> None:
+        """Record a failed request to the endpoint"""
+        self.breaker(base_url).record_failure()
+        with self._lock:
+            self._last_probe[base_url] = (time.monotonic(), False)
+
+    def probe(self, base_url: str) -> bool:
+        """
+        Check whether the endpoint is up and update its circuit.
+
+        Args:
+            base_url: Endpoint to probe
+
+        Returns:
+            bool: True if the endpoint responded
+        """
+        try:
+            response = get_transport().get(f"{base_url}/", timeout=self.probe_timeout)
+            healthy = response.status_code == 200
+        except Exception as e:
+            logger.debug(f"Health probe to {base_url} failed: {e}")
+            healthy = False
+
+        if healthy:
+            self.record_success(base_url)
+        else:
+            self.record_failure(base_url)
+        return healthy
+
+    def check(self, base_url: str) -> bool:
+        """
+        Return the endpoint's health, probing only if the cached state is stale.
+
+        Args:
+            base_url: Endpoint to check
+
+        Returns:
+            bool: True if the endpoint is healthy
+        """
+        with self._lock:
+            last = self._last_probe.get(base_url)
+        if last and time.monotonic() - last[0] <= self.cache_ttl:
+            return last[1]
+        if not self.allow_request(base_url):
+            return False
+        return self.probe(base_url)
+
+    def start(self) -> None:
+        """Start the background prober"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._monitor, daemon=True, name="EndpointHealth")
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background prober"""
+        self._stop_event.set()
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """Return each endpoint's circuit state and last known health"""
+        with self._lock:
+            endpoints = dict(self._breakers)
+            probes = dict(self._last_probe)
+        now = time.monotonic()
+        status = {}
+        for base_url, breaker in endpoints.items():
+            last = probes.get(base_url)
+            status[base_url] = {
+                'state': breaker.state,
+                'failures': breaker.failures,
+                'healthy': last[1] if last else None,
+                'checked_ago': now - last[0] if last else None,
+            }
+        return status
+
+    def _monitor(self) -> None:
+        """Probe stale endpoints; an open circuit is probed as soon as it turns half-open"""
+        while not self._stop_event.wait(min(self.probe_interval, self.recovery_timeout)):
+            with self._lock:
+                endpoints = list(self._breakers.items())
+                probes = dict(self._last_probe)
+            now = time.monotonic()
+            for base_url, breaker in endpoints:
+                last = probes.get(base_url)
+                stale = last is None or now - last[0] >= self.probe_interval
+                recovering = breaker.state == CircuitBreaker.HALF_OPEN
+                if (stale or recovering) and breaker.allow_request():
+                    self.probe(base_url)
+
+
+_health_monitor: Optional[EndpointHealthMonitor] = None
+_health_lock = threading.Lock()
+
+
+def get_health_monitor(config: Optional[Dict[str, Any]] = None) -> EndpointHealthMonitor:
+    """Return the process-wide endpoint health monitor, creating it on first use."""
+    global _health_monitor
+    with _health_lock:
+        if _health_monitor is None:
+            _health_monitor = EndpointHealthMonitor(config)
+        return _health_monitor
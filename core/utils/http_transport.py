@@ -0,0 +1,280 @@
+import time
+import socket
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from core.utils.cancellation import CancellationToken
+
+logger = logging.getLogger(__name__)
+
+# Per-request state of the calling thread: connection setup time and the
+# cancellation token guarding the request
+_connect_timing = threading.local()
+
+
+def _record_connect(duration: float) -> None:
+    _connect_timing.total = getattr(_connect_timing, 'total', 0.0) + duration
+    _connect_timing.count = getattr(_connect_timing, 'count', 0) + 1
+
+
+def _guard_connection(conn) -> None:
+    """Abort the connection's socket if the current request gets cancelled"""
+    cancel_token = getattr(_connect_timing, 'cancel_token', None)
+    if cancel_token is None:
+        return
+
+    def abort():
+        sock = getattr(conn, 'sock', None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    _connect_timing.unregister.append(cancel_token.register(abort))
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_connect(time.perf_counter() - start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_connect(time.perf_counter() - start)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+    def _make_request(self, conn, *args, **kwargs):
+        _guard_connection(conn)
+        return super()._make_request(conn, *args, **kwargs)
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+    def _make_request(self, conn, *args, **kwargs):
+        _guard_connection(conn)
+        return super()._make_request(conn, *args, **kwargs)
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """HTTP adapter whose pools time new TCP/TLS connections."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+
+@dataclass
+class RequestTiming:
+    """Timing breakdown for a single HTTP request."""
+    method: str
+    host: str
+    connect: float = 0.0
+    transfer: float = 0.0
+    reused: bool = True
+    status: Optional[int] = None
+
+
+class HttpTransport:
+    """Process-wide pool of keep-alive HTTP sessions, one per host."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the transport with pool and timeout settings.
+
+        Args:
+            config: Dictionary containing network configuration
+        """
+        config = config or {}
+        self.pool_connections = config.get('pool_connections', 4)
+        self.pool_maxsize = config.get('pool_maxsize', 8)
+        self.connect_timeout = config.get('connect_timeout', 3.05)
+        self.read_timeout = config.get('read_timeout', 30)
+
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+        logger.info(f"HTTP transport initialized: pool_maxsize={self.pool_maxsize}, "
+                    f"connect_timeout={self.connect_timeout}, read_timeout={self.read_timeout}")
+
+    def _session_for(self, host: str) -> requests.Session:
+        """Get or create the pooled session for a host"""
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = _TimedHTTPAdapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize,
+                    max_retries=0
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session
+            return session
+
+    def _resolve_timeout(self, timeout):
+        """Combine a caller's read timeout with the configured connect timeout"""
+        if timeout is None:
+            return (self.connect_timeout, self.read_timeout)
+        if isinstance(timeout, (int, float)):
+            return (self.connect_timeout, timeout)
+        return timeout
+
+    def request(self, method: str, url: str, timeout=None,
+                cancel_token: Optional[CancellationToken] = None, **kwargs) -> requests.Response:
+        """
+        Send a request through the pooled session for the URL's host.
+
+        Streamed responses are timed until they are closed; use them as a
+        context manager so the transfer time is recorded.
+
+        Args:
+            method: HTTP method
+            url: Target URL
+            timeout: Read timeout in seconds or a (connect, read) tuple
+            cancel_token: Token whose cancellation shuts down the socket,
+                aborting the request and any response stream
+            **kwargs: Passed through to `requests.Session.request`
+
+        Returns:
+            requests.Response: The response, with a `timing` attribute
+        """
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        session = self._session_for(host)
+
+        _connect_timing.total = 0.0
+        _connect_timing.count = 0
+        _connect_timing.cancel_token = cancel_token
+        _connect_timing.unregister = []
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=self._resolve_timeout(timeout), **kwargs)
+        except Exception:
+            self._release_guards(_connect_timing.unregister)
+            raise
+        finally:
+            _connect_timing.cancel_token = None
+        unregister = _connect_timing.unregister
+
+        timing = RequestTiming(
+            method=method.upper(),
+            host=host,
+            connect=_connect_timing.total,
+            reused=_connect_timing.count == 0,
+            status=response.status_code
+        )
+        response.timing = timing
+
+        if kwargs.get('stream'):
+            close = response.close
+
+            def close_and_record():
+                close()
+                self._release_guards(unregister)
+                if not getattr(response, '_timing_recorded', False):
+                    response._timing_recorded = True
+                    self._record(timing, start)
+
+            response.close = close_and_record
+        else:
+            self._release_guards(unregister)
+            self._record(timing, start)
+        return response
+
+    @staticmethod
+    def _release_guards(unregister) -> None:
+        """Detach cancellation from connections going back to the pool"""
+        for callback in unregister:
+            callback()
+        unregister.clear()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request through the shared pool"""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Send a POST request through the shared pool"""
+        return self.request('POST', url, **kwargs)
+
+    def _record(self, timing: RequestTiming, start: float) -> None:
+        """Record the transfer time for a completed request"""
+        timing.transfer = max(0.0, time.perf_counter() - start - timing.connect)
+        with self._lock:
+            stats = self._stats.setdefault(timing.host, {
+                'requests': 0, 'new_connections': 0, 'connect_time': 0.0, 'transfer_time': 0.0
+            })
+            stats['requests'] += 1
+            stats['new_connections'] += 0 if timing.reused else 1
+            stats['connect_time'] += timing.connect
+            stats['transfer_time'] += timing.transfer
+        logger.debug(f"{timing.method} {timing.host} status={timing.status} "
+                      f"connect={timing.connect * 1000:.1f}ms transfer={timing.transfer * 1000:.1f}ms "
+                      f"reused={timing.reused}")
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Return per-host request counts and cumulative connect/transfer time"""
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._stats.items()}
+
+    def close(self) -> None:
+        """Close all pooled sessions"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+_transport: Optional[HttpTransport] = None
+_transport_lock = threading.Lock()
+
+
+def configure_transport(config: Optional[Dict[str, Any]] = None) -> HttpTransport:
+    """
+    Replace the process-wide transport with one built from configuration.
+
+    Args:
+        config: Dictionary containing network configuration
+
+    Returns:
+        HttpTransport: The new shared transport
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
+        _transport = HttpTransport(config)
+        return _transport
+
+
+def get_transport() -> HttpTransport:
+    """Return the process-wide transport, creating it with defaults if needed."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport()
+        return _transport
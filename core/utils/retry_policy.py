@@ -0,0 +1,194 @@
+import time
+import random
+import logging
+from typing import Dict, Any, Callable, Iterator, Optional, TypeVar
+
+import requests
+from core.utils.cancellation import CancellationToken
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE = 'retryable'
+FATAL = 'fatal'
+
+# Error text Ollama and its runners use when a model does not fit in memory
+OOM_MARKERS = ('out of memory', 'requires more system memory', 'insufficient memory', 'cudamalloc failed')
+
+T = TypeVar('T')
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Decide whether a failed request is worth retrying.
+
+    Timeouts, dropped connections, 5xx/429 responses and out-of-memory errors
+    are transient. A refused connection means nothing is listening, and other
+    4xx responses will fail the same way again.
+
+    Args:
+        error: The exception raised by the request
+
+    Returns:
+        str: RETRYABLE or FATAL
+    """
+    message = str(error).lower()
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return RETRYABLE if status >= 500 or status == 429 else FATAL
+    # ConnectTimeout is also a ConnectionError; a timeout is always transient
+    if isinstance(error, requests.exceptions.Timeout):
+        return RETRYABLE
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return FATAL if 'refused' in message else RETRYABLE
+    if any(marker in message for marker in OOM_MARKERS):
+        return RETRYABLE
+    return FATAL
+
+
+class RetryState:
+    """Attempt counter and deadline for one logical request."""
+
+    def __init__(self, policy: 'RetryPolicy', cancel_token: Optional[CancellationToken] = None):
+        self.policy = policy
+        self.cancel_token = cancel_token
+        self.attempt = 0
+        self._deadline = time.monotonic() + policy.deadline
+
+    def __iter__(self) -> Iterator[int]:
+        """Yield attempt numbers; the caller stops by breaking or when should_retry() is False"""
+        while True:
+            yield self.attempt
+            self.attempt += 1
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline"""
+        return max(0.0, self._deadline - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, base_timeout: float) -> float:
+        """Read timeout for the current attempt, growing per retry but never past the deadline"""
+        grown = base_timeout * (1 + self.attempt * self.policy.timeout_growth)
+        return max(0.1, min(grown, self.remaining()))
+
+    def should_retry(self, error: Exception) -> bool:
+        """
+        Decide whether to retry after a failure, sleeping for the backoff if so.
+
+        Args:
+            error: The exception raised by the attempt
+
+        Returns:
+            bool: True if another attempt should be made
+        """
+        if self.cancel_token and self.cancel_token.cancelled:
+            return False
+        if classify_error(error) == FATAL:
+            logger.debug(f"Not retrying fatal error: {error}")
+            return False
+        if self.attempt + 1 >= self.policy.max_attempts:
+            return False
+
+        delay = self.policy.backoff(self.attempt)
+        if delay >= self.remaining():
+            logger.warning(f"Retry deadline of {self.policy.deadline}s reached: {error}")
+            return False
+        logger.warning(f"Attempt {self.attempt + 1} failed ({error}), retrying in {delay:.2f}s")
+        if self.cancel_token:
+            return not self.cancel_token.wait(delay)
+        time.sleep(delay)
+        return True
+
+    def can_failover(self) -> bool:
+        """
+        Decide whether to make the next attempt on a different endpoint.
+
+        Unlike should_retry() there is no backoff, and errors that are fatal
+        for one endpoint (nothing listening) do not stop the request.
+
+        Returns:
+            bool: True if another attempt fits in the budget
+        """
+        if self.cancel_token and self.cancel_token.cancelled:
+            return False
+        return self.attempt + 1 < self.policy.max_attempts and not self.expired
+
+
+class RetryPolicy:
+    """Bounded retries with jittered exponential backoff and an overall deadline."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the retry policy.
+
+        Args:
+            config: Dictionary containing retry configuration
+        """
+        config = config or {}
+        self.max_attempts = max(1, config.get('max_attempts', 3))
+        self.deadline = config.get('deadline', 120)
+        self.base_delay = config.get('base_delay', 0.5)
+        self.max_delay = config.get('max_delay', 4.0)
+        self.timeout_growth = config.get('timeout_growth', 0.5)
+
+        # How generation options are reduced on retries
+        degradation = config.get('degradation', {})
+        self.degrade_enabled = degradation.get('enabled', True)
+        self.degrade_num_predict = degradation.get('num_predict', 256)
+        self.degrade_num_ctx = degradation.get('num_ctx')
+        self.degrade_temperature_drop = degradation.get('temperature_drop', 0.2)
+        self.degrade_min_temperature = degradation.get('min_temperature', 0.1)
+
+    def start(self, cancel_token: Optional[CancellationToken] = None) -> RetryState:
+        """Begin a request; the deadline starts now"""
+        return RetryState(self, cancel_token)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before the next attempt"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def degrade_options(self, options: Dict[str, Any], base_temperature: float) -> Dict[str, Any]:
+        """
+        Return generation options reduced for a retry.
+
+        Args:
+            options: Options sent on the first attempt
+            base_temperature: Configured temperature
+
+        Returns:
+            Dict[str, Any]: Degraded copy of the options
+        """
+        if not self.degrade_enabled:
+            return options
+        degraded = dict(options)
+        if self.degrade_num_predict and 'num_predict' in degraded:
+            degraded['num_predict'] = min(degraded['num_predict'], self.degrade_num_predict)
+        if self.degrade_num_ctx and 'num_ctx' in degraded:
+            degraded['num_ctx'] = min(degraded['num_ctx'], self.degrade_num_ctx)
+        if 'temperature' in degraded:
+            degraded['temperature'] = max(self.degrade_min_temperature,
+                                          base_temperature - self.degrade_temperature_drop)
+        return degraded
+
+    def call(self, func: Callable[[float], T], timeout: float,
+             cancel_token: Optional[CancellationToken] = None) -> T:
+        """
+        Run `func(timeout)` until it succeeds, fails fatally or the deadline passes.
+
+        Args:
+            func: Callable taking the attempt's timeout; should raise on failure
+            timeout: Base per-attempt timeout in seconds
+            cancel_token: Optional token that stops further attempts
+
+        Returns:
+            The value returned by the successful attempt
+        """
+        retry = self.start(cancel_token)
+        for _ in retry:
+            try:
+                return func(retry.timeout(timeout))
+            except Exception as e:
+                if not retry.should_retry(e):
+                    raise
@@ -70,6 +70,22 @@ class STTEngine:
             logger.error(f"Error in speech recognition: {e}")
             return ""
 
+    def transcribe(self, audio_data):
+        # Whole clip of 16-bit mono PCM at sample_rate; a fresh recognizer per
+        # clip keeps concurrent callers from sharing decoder state
+        if self.engine_type != 'vosk':
+            return self.recognize(audio_data)
+        if self.model is None:
+            logger.error("Recognizer not initialized")
+            return ""
+        try:
+            recognizer = KaldiRecognizer(self.model, self.sample_rate)
+            recognizer.AcceptWaveform(audio_data)
+            return json.loads(recognizer.FinalResult())['text']
+        except Exception as e:
+            logger.error(f"Error in speech recognition: {e}")
+            return ""
+
     def listen(self):
         if self.audio is None:
             logger.error("Audio not initialized")
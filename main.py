@@ -2,16 +2,21 @@ import os
 import sys
 import logging
 import argparse
+import threading
 from pathlib import Path
 from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QIcon
 from core.ai.model_selector import ModelSelector
-from core.ai.ollama_manager import OllamaManager
+from core.ai.endpoint_pool import endpoint_urls
 from ui.windows.main_window import MainWindow
 from core.utils.config_loader import ConfigLoader
 from core.voice.stt_engine import STTEngine
 from core.utils.logger import setup_logger
+from core.utils.http_transport import configure_transport
+from core.utils.cancellation import CancellationToken
+from core.automation.services import get_automation_services
+from core.ai.model_calibration import ModelCalibrator, save_profile
 from core.voice.tts_engine import TTSEngine
 from core.voice.wake_word import WakeWordDetector
 
@@ -48,6 +53,10 @@ def parse_arguments():
                         help='Run without GUI (command-line only)')
     parser.add_argument('--dark-mode', action='store_true',
                         help='Start in dark mode')
+    parser.add_argument('--calibrate', action='store_true',
+                        help='Benchmark local Ollama models and save a latency profile')
+    parser.add_argument('--serve', action='store_true',
+                        help='Serve the assistant over a local HTTP/WebSocket API instead of the GUI')
     return parser.parse_args()
 
 def validate_input(user_input):
@@ -89,6 +98,9 @@ def process_close_command(user_input, app_launcher):
     for pattern in close_patterns:
         if input_lower.startswith(pattern):
             app_name = input_lower[len(pattern):].strip()
+            # Truth-testing builds the launcher; without one the input goes to the model
+            if app_name and not app_launcher:
+                return None
             if app_name:
                 logger.info(f"Attempting to close application: {app_name}")
                 try:
@@ -119,6 +131,28 @@ def print_banner():
     """
     print(banner)
 
+def run_calibration(config):
+    """Benchmark the local models and write the profile ModelSelector picks from"""
+    ai_config = config['ai']
+    # Profiles are measured on the preferred (first) endpoint
+    base_url = endpoint_urls(ai_config.get('primary', {}).get('base_url'))[0]
+    model_mgmt = ai_config.get('model_management', {})
+    calibrator = ModelCalibrator(base_url, model_mgmt.get('calibration', {}))
+    
+    print(f"\n⏱️  Calibrating models on {base_url} (this can take a few minutes)...")
+    profile = calibrator.run()
+    if not profile['models']:
+        print("❌ No models could be calibrated. Is Ollama running with models pulled?")
+        return 1
+    
+    path = save_profile(profile, model_mgmt['cache_dir'])
+    print(f"\n{'Model':<32}{'TTFT':>8}{'tok/s':>10}{'Latency':>10}")
+    for model in profile['models']:
+        print(f"{model['name']:<32}{model['ttft_p50']:>7.2f}s{model['tokens_per_second']:>10.1f}"
+              f"{model['expected_latency']:>9.1f}s")
+    print(f"\n✅ Profile saved to {path}")
+    return 0
+
 def main():
     """Main application entry point."""
     global tts_engine, main_window
@@ -142,8 +176,22 @@ def main():
     if args.dark_mode:
         config.setdefault('ui', {})['theme'] = 'dark'
     
-    # Initialize AI models
-    ai_model = None
+    # Share one pool of keep-alive connections across all HTTP clients
+    configure_transport(config.get('network', {}))
+    
+    # Automation components read their settings when first built
+    get_automation_services().configure(config.get('automation', {}))
+    
+    # Persistent AI caches live under the system cache directory
+    config['ai'].setdefault('model_management', {}).setdefault(
+        'cache_dir', config.get('system', {}).get('cache_dir', 'data/cache')
+    )
+    
+    if args.calibrate:
+        sys.exit(run_calibration(config))
+    
+    # Initialize AI models; the selector answers with routing, hedging and fallback
+    assistant = None
     try:
         model_selector = ModelSelector(config['ai'], reminder_callback)
         primary_model = model_selector.get_primary_model()
@@ -151,22 +199,20 @@ def main():
         
         if primary_model:
             logger.info(f"🧠 Using primary AI model: {primary_model.model_name}")
-            ai_model = primary_model
-        elif fallback_model:
+        if fallback_model:
             logger.info(f"🔄 Using fallback AI model: {fallback_model.model_name}")
-            ai_model = fallback_model
+        if primary_model or fallback_model:
+            assistant = model_selector
         else:
             logger.error("❌ No AI models available")
     except Exception as e:
         logger.error(f"❌ Failed to initialize AI models: {e}")
-
-    # Initialize Ollama Manager with reminder callback
-    ollama_manager = None
-    try:
-        ollama_manager = OllamaManager(config['ai'], reminder_callback)
-        logger.info("✅ Ollama manager initialized successfully")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize Ollama manager: {e}")
+    
+    # All managers share one set of automation components, built on first use
+    automation = get_automation_services()
+    automation_config = config.get('automation', {})
+    init_costs = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in automation.get_init_costs().items())
+    logger.info(f"⚙️  Automation services: {init_costs or 'none initialized'}")
     
     # Initialize voice components if enabled
     voice_components = None
@@ -191,15 +237,38 @@ def main():
         if not voice_components:
             logger.warning("⚠️  Continuing without voice interaction")
 
-    # Start UI or run in headless mode
-    if not args.headless:
+    # Serve the API, start the UI or run in headless mode
+    if args.serve:
+        if not assistant:
+            logger.error("❌ No AI model available to serve")
+            sys.exit(1)
+        try:
+            from core.api.server import AssistantServer
+        except ImportError as ie:
+            logger.error(f"❌ API server dependencies missing: {ie}")
+            sys.exit(1)
+        
+        try:
+            server = AssistantServer(
+                config.get('server', {}), assistant,
+                stt=voice_components['stt'] if voice_components else None,
+                automation=automation
+            )
+        except ValueError as ve:
+            logger.error(f"❌ Invalid server configuration: {ve}")
+            sys.exit(1)
+        if automation_config.get('prewarm', True):
+            automation.prewarm()
+        server.run()
+        automation.shutdown()
+    elif not args.headless:
         logger.info("🖥️  Starting GUI mode...")
         
         # Setup application
         app = setup_application()
         
         # Create main window
-        main_window = MainWindow(ollama_manager or ai_model, voice_components, config)
+        main_window = MainWindow(assistant, voice_components, config)
         
         # Show window
         main_window.show()
@@ -212,8 +281,15 @@ def main():
         
         logger.info("✅ Aurix GUI started successfully")
         
+        # Build the remaining automation components once the window is up
+        if automation_config.get('prewarm', True):
+            delay_ms = int(automation_config.get('prewarm_delay', 2.0) * 1000)
+            QTimer.singleShot(delay_ms, automation.prewarm)
+        
         # Run application
-        sys.exit(app.exec_())
+        exit_code = app.exec_()
+        automation.shutdown()
+        sys.exit(exit_code)
     else:
         # Headless mode - command line interaction
         logger.info("💻 Running in headless mode")
@@ -222,13 +298,8 @@ def main():
         print("Type 'help' for available commands")
         print("-" * 50)
         
-        # Initialize app launcher for close commands
-        try:
-            from core.automation.app_launcher import AppLauncher
-            app_launcher = AppLauncher()
-        except Exception as e:
-            logger.error(f"Failed to initialize AppLauncher: {e}")
-            app_launcher = None
+        # Close commands use the shared app launcher, built on the first close command
+        app_launcher = automation.app_launcher
         
         while True:
             try:
@@ -250,15 +321,16 @@ def main():
                     print("  • Just type your question to chat with Aurix!")
                     continue
                 elif user_input.lower() == 'clear':
+                    if assistant:
+                        assistant.clear_conversation()
                     print("\n🧹 Conversation cleared!")
                     continue
                 
                 # Check for close application commands
-                if app_launcher:
-                    close_result = process_close_command(user_input, app_launcher)
-                    if close_result:
-                        print(f"\n🤖 Aurix: {close_result}")
-                        continue
+                close_result = process_close_command(user_input, app_launcher)
+                if close_result:
+                    print(f"\n🤖 Aurix: {close_result}")
+                    continue
                 
                 # Validate and process input
                 validated_input = validate_input(user_input)
@@ -267,15 +339,29 @@ def main():
                     continue
                 
                 # Generate response
-                print("🤔 Aurix is thinking...")
+                print("🤔 Aurix is thinking... (Ctrl+C to stop)")
                 
-                if ollama_manager:
-                    response = ollama_manager.generate_response(validated_input)
-                elif ai_model:
-                    response = ai_model.generate_response(validated_input)
-                else:
+                if not assistant:
                     raise ValueError("No AI model available")
                 
+                # Generate on a worker thread so Ctrl+C can abort the request
+                cancel_token = CancellationToken()
+                result = {}
+                worker = threading.Thread(
+                    target=lambda: result.update(response=assistant.generate_response(validated_input, cancel_token)),
+                    daemon=True
+                )
+                worker.start()
+                try:
+                    while worker.is_alive():
+                        worker.join(0.1)
+                except KeyboardInterrupt:
+                    cancel_token.cancel()
+                    worker.join()
+                    print("\n⏹️  Response cancelled")
+                    continue
+                response = result.get('response', "Sorry, I encountered an unexpected error.")
+                
                 print(f"\n🤖 Aurix: {response}")
                 
                 # Use TTS to speak the response
@@ -293,6 +379,8 @@ def main():
                 logger.error(f"Unexpected error: {e}", exc_info=True)
                 print("❌ Sorry, I encountered an unexpected error. Please try again.")
     
+        automation.shutdown()
+    
     logger.info("🛑 Shutting down Aurix AI Desktop Assistant")
 
 if __name__ == "__main__":
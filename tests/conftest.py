@@ -0,0 +1,58 @@
+"""
+Shared fixtures: AI managers run against the benchmark suite's stub Ollama
+server, so the tests need neither models nor network access.
+"""
+import pytest
+
+from benchmarks.stub_ollama import StubOllamaServer, StubProfile
+from core.ai.request_scheduler import get_scheduler
+from core.utils.endpoint_health import get_health_monitor
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _process_singletons():
+    """Configure the process-wide scheduler and health monitor before any manager does"""
+    get_scheduler({'parallel_slots': 4})
+    get_health_monitor({'background_probe': False})
+
+
+@pytest.fixture
+def stub_server():
+    """Factory for started stub servers; all are stopped after the test"""
+    servers = []
+
+    def start(models=('model-a', 'model-b'), **profile):
+        profile = dict({'seed': 1, 'ttft': 0.01, 'tokens_per_second': 2000}, **profile)
+        server = StubOllamaServer(StubProfile(**profile), models=list(models))
+        servers.append(server.start())
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def model_config(tmp_path):
+    """Factory for a model config that keeps runs independent of each other"""
+
+    def build(base_url, model='model-a', provider='ollama', **overrides):
+        config = {
+            'provider': provider,
+            'base_url': base_url,
+            'model': model,
+            'context_length': 2048,
+            'max_tokens': 64,
+            'timeout': 10,
+            'model_management': {
+                'cache_dir': str(tmp_path),
+                'response_cache': {'enabled': False},
+                'compaction': {'enabled': False},
+                'health': {'background_probe': False},
+                'retry': {'base_delay': 0.01, 'max_delay': 0.02},
+            },
+        }
+        config.update(overrides)
+        return config
+
+    return build
@@ -0,0 +1,130 @@
+import json
+import time
+import asyncio
+import threading
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from core.ai.base_ai_manager import AIResponse
+from core.api.server import AssistantServer
+from core.utils.cancellation import CANCELLED_ERROR
+
+
+class SlowAssistant:
+    """Streams one token, then takes a while to wind down even once cancelled"""
+    model_name = 'slow'
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+
+    def generate_response_stream(self, prompt, cancel_token, automation=True, priority=None, session_id=None):
+        yield "tok "
+        if cancel_token.wait(5.0):
+            self.cancelled.set()
+        time.sleep(0.3)
+        self.finished.set()
+        return AIResponse(success=False, content="tok ", error=CANCELLED_ERROR)
+
+
+async def _disconnect_during_generate(server):
+    runner = web.AppRunner(server._create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    try:
+        host, port = runner.addresses[0][:2]
+        body = json.dumps({'prompt': 'hello', 'stream': False}).encode('utf-8')
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b"POST /api/generate HTTP/1.1\r\nHost: test\r\nContent-Type: application/json\r\n"
+                     b"Content-Length: %d\r\n\r\n%s" % (len(body), body))
+        await writer.drain()
+        while server._active == 0:
+            await asyncio.sleep(0.01)
+        writer.close()
+
+        deadline = time.monotonic() + 3.0
+        while server._active and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        return server._active
+    finally:
+        await runner.cleanup()
+
+
+def test_non_streaming_disconnect_stops_the_generation_before_freeing_its_slot():
+    assistant = SlowAssistant()
+    server = AssistantServer({'max_concurrency': 1}, assistant)
+
+    active = asyncio.run(_disconnect_during_generate(server))
+
+    assert active == 0
+    assert assistant.cancelled.is_set()
+    # The slot was held until the worker thread let go of the model
+    assert assistant.finished.is_set()
+    assert server.stats['cancelled'] == 1
+
+
+class CommandAssistant:
+    model_name = 'commands'
+
+    def __init__(self):
+        self.commands = []
+
+    def run_automation_command(self, command):
+        self.commands.append(command)
+        return "done"
+
+
+async def _post_commands(server, requests):
+    runner = web.AppRunner(server._create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    try:
+        host, port = runner.addresses[0][:2]
+        statuses = []
+        async with aiohttp.ClientSession() as client:
+            for headers in requests:
+                async with client.post(f"http://{host}:{port}/api/command", data='{"command": "shutdown"}',
+                                       headers=headers) as response:
+                    statuses.append(response.status)
+        return statuses
+    finally:
+        await runner.cleanup()
+
+
+def test_cross_origin_and_simple_requests_cannot_run_commands():
+    assistant = CommandAssistant()
+    server = AssistantServer({'allowed_origins': ['http://app.example']}, assistant)
+
+    statuses = asyncio.run(_post_commands(server, [
+        {'Content-Type': 'text/plain', 'Origin': 'https://evil.example'},
+        {'Content-Type': 'application/json', 'Origin': 'https://evil.example'},
+        {'Content-Type': 'text/plain'},
+        {'Content-Type': 'application/json', 'Origin': 'http://app.example'},
+    ]))
+
+    assert statuses == [403, 403, 415, 200]
+    assert assistant.commands == ["shutdown"]
+
+
+def test_numeric_or_boolean_token_from_the_config_loader_is_rejected():
+    for token in (1234, True, False):
+        with pytest.raises(ValueError):
+            AssistantServer({'auth_token': token}, CommandAssistant())
+
+
+def test_configured_token_is_required():
+    assistant = CommandAssistant()
+    server = AssistantServer({'auth_token': 's3cret-token'}, assistant)
+
+    statuses = asyncio.run(_post_commands(server, [
+        {'Content-Type': 'application/json'},
+        {'Content-Type': 'application/json', 'Authorization': 'Bearer wrong'},
+        {'Content-Type': 'application/json', 'Authorization': 'Bearer s3cret-token'},
+    ]))
+
+    assert statuses == [401, 401, 200]
+    assert assistant.commands == ["shutdown"]
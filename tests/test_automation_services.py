@@ -0,0 +1,95 @@
+from core.automation.services import AutomationServices
+
+
+class Component:
+    def __init__(self):
+        self.saved = 0
+
+    def save_reminders(self):
+        self.saved += 1
+
+
+def _services(built):
+    services = AutomationServices()
+
+    def factory(name):
+        def build():
+            built.append(name)
+            return Component()
+        return build
+
+    services._factories = {name: factory(name) for name in services._factories}
+    return services
+
+
+def test_components_are_built_on_first_use_only():
+    built = []
+    services = _services(built)
+
+    assert not services.web_actions.loaded
+    assert services.get_states()['web_actions'] == 'not_loaded'
+    assert built == []
+
+    assert services.web_actions
+    assert services.web_actions.loaded
+    services.get('web_actions')
+    assert built == ['web_actions']
+    assert services.get_states()['web_actions'] == 'ready'
+
+
+def test_failed_component_is_reported_and_not_retried():
+    services = AutomationServices()
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise RuntimeError("missing dependency")
+
+    services._factories['system_ctrl'] = broken
+
+    assert not services.system_ctrl
+    assert not services.system_ctrl
+    assert not services.system_ctrl.loaded
+    assert attempts == [1]
+    assert services.get_status()['system_ctrl'] is False
+
+
+def test_shutdown_does_not_build_unused_components():
+    built = []
+    services = _services(built)
+
+    services.shutdown()
+    assert built == []
+
+    services.start()
+    services.shutdown()
+    assert built == ['reminder']
+    assert services.get('reminder').saved == 1
+
+
+def test_managers_share_one_container(stub_server, model_config):
+    from core.ai.gemma_manager import GemmaManager
+    from core.ai.ollama_manager import OllamaManager
+    from core.automation.services import get_automation_services
+
+    server = stub_server()
+    ollama = OllamaManager(model_config(server.base_url), None)
+    gemma = GemmaManager(model_config(server.base_url, provider='gemma'), None)
+
+    assert ollama.automation is gemma.automation is get_automation_services()
+    assert ollama.reminder is gemma.reminder
+
+
+def test_reminders_reach_every_registered_callback_once():
+    services = AutomationServices()
+    received = []
+    first = lambda message: received.append(('first', message))
+    second = lambda message: received.append(('second', message))
+
+    services.add_reminder_callback(first)
+    services.add_reminder_callback(first)
+    services.add_reminder_callback(None)
+    services.add_reminder_callback(second)
+    services._dispatch_reminder("stand up")
+
+    assert received == [('first', "stand up"), ('second', "stand up")]
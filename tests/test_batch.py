@@ -0,0 +1,104 @@
+import time
+import threading
+
+from core.ai.base_ai_manager import AIResponse
+from core.ai.batch import run_batch
+from core.ai.ollama_manager import OllamaManager
+from core.ai.session_store import SessionStore
+from core.utils.cancellation import CancellationToken, CANCELLED_ERROR
+
+
+def _drain(generator):
+    results = []
+    while True:
+        try:
+            results.append(next(generator))
+        except StopIteration as stop:
+            return results, stop.value
+
+
+def test_batch_answers_every_prompt_and_releases_the_callers_token(stub_server, model_config):
+    server = stub_server()
+    manager = OllamaManager(model_config(server.base_url), None)
+    cancel_token = CancellationToken()
+
+    results, stats = _drain(run_batch(manager, [f"prompt {index}" for index in range(5)],
+                                      max_concurrency=2, cancel_token=cancel_token))
+
+    assert sorted(result.index for result in results) == [0, 1, 2, 3, 4]
+    assert all(result.success and result.content for result in results)
+    assert (stats.prompts, stats.succeeded, stats.failed) == (5, 5, 0)
+    assert cancel_token._callbacks == []
+    # Transient sessions are gone and the conversation is untouched
+    assert manager.get_session_stats()['transient'] == 0
+    assert manager.sessions.peek('default') is None
+
+
+def test_batch_stops_launching_prompts_once_cancelled(stub_server, model_config):
+    server = stub_server(ttft=0.2)
+    manager = OllamaManager(model_config(server.base_url), None)
+    cancel_token = CancellationToken()
+
+    batch = run_batch(manager, [f"prompt {index}" for index in range(10)], max_concurrency=1,
+                      cancel_token=cancel_token)
+    first = next(batch)
+    cancel_token.cancel()
+    results, stats = _drain(batch)
+
+    assert first.success
+    assert stats.prompts <= 2
+
+
+class _CountingManager:
+    """Answers after a short delay, tracking how many prompts run at once"""
+    model_name = 'counting'
+
+    def __init__(self, preempt_first=0, fail=()):
+        self.sessions = SessionStore()
+        self.preempt_first = preempt_first
+        self.fail = set(fail)
+        self.running = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def generate_response_stream(self, prompt, cancel_token, automation=True, priority=None, session_id=None):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            preempted = self.preempt_first > 0
+            self.preempt_first -= 1
+        time.sleep(0.02)
+        with self.lock:
+            self.running -= 1
+        if preempted:
+            return AIResponse(success=False, content="", error=CANCELLED_ERROR)
+        if prompt in self.fail:
+            return AIResponse(success=False, content="", error="Empty response from model")
+        yield f"answer to {prompt}"
+        return AIResponse(success=True, content=f"answer to {prompt}")
+
+    def end_session(self, session_id):
+        self.sessions.drop(session_id)
+
+
+def test_batch_keeps_at_most_max_concurrency_prompts_in_flight():
+    manager = _CountingManager()
+
+    results, stats = _drain(run_batch(manager, (f"p{index}" for index in range(8)), max_concurrency=3))
+
+    assert len(results) == 8
+    assert 1 < manager.peak <= 3
+    assert stats.prompts_per_second > 0
+
+
+def test_preempted_prompts_are_requeued_and_failures_counted():
+    manager = _CountingManager(preempt_first=1, fail={"p2"})
+
+    results, stats = _drain(run_batch(manager, ["p0", "p1", "p2"], max_concurrency=1))
+
+    by_index = {result.index: result for result in results}
+    assert by_index[0].success and by_index[0].preemptions == 1
+    assert not by_index[2].success
+    assert (stats.prompts, stats.succeeded, stats.failed) == (3, 2, 1)
+    assert stats.errors == {"Empty response from model": 1}
+    assert manager.sessions.get_stats()['transient'] == 0
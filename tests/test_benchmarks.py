@@ -0,0 +1,43 @@
+from benchmarks.run_benchmarks import _percentiles, run_case
+from core.utils.http_transport import get_transport
+
+
+def _generate(server, **request):
+    body = dict({'model': 'model-a', 'prompt': 'hi', 'stream': False}, **request)
+    return get_transport().post(f"{server.base_url}/api/generate", json=body, timeout=5)
+
+
+def test_stub_honours_num_predict_and_reports_ollama_timings(stub_server):
+    server = stub_server(tokens=10, think_tokens=2)
+
+    body = _generate(server, options={'num_predict': 5}).json()
+
+    assert body['response'] == "<think>thought0 thought1 </think>\n\nword0 "
+    assert body['eval_count'] == 5 and body['done']
+    assert body['eval_duration'] > 0 and 'context' in body
+    stats = server.get_stats()
+    assert (stats['requests'], stats['completed']) == (1, 1)
+
+
+def test_stub_injects_errors_at_the_configured_rate(stub_server):
+    server = stub_server(error_rate=1.0, error_status=503)
+
+    assert _generate(server).status_code == 503
+    assert server.get_stats()['errors_injected'] == 1
+
+
+def test_percentiles_are_reported_in_milliseconds():
+    stats = _percentiles([0.1, 0.2, 0.3, 0.4])
+
+    assert (stats['p50'], stats['p95'], stats['max']) == (200.0, 400.0, 400.0)
+    assert stats['mean'] == 250.0
+    assert _percentiles([]) == {}
+
+
+def test_benchmark_case_reports_every_request(tmp_path):
+    result = run_case('ollama', 'baseline', concurrency=2, requests=4, parallel=2, cache_dir=str(tmp_path))
+
+    assert (result['requests'], result['succeeded'], result['failed']) == (4, 4, 0)
+    assert result['retries']['server_requests'] == 4
+    assert result['latency_ms']['p50'] > 0
+    assert result['tokens_per_second'] > 0
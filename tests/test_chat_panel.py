@@ -0,0 +1,93 @@
+import os
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+from ui.windows.chat_panel import ChatPanel, STREAM_PLACEHOLDER
+
+_app = QApplication.instance() or QApplication([])
+
+
+class _Assistant:
+    prefill_enabled = False
+
+
+def _streaming_panel():
+    panel = ChatPanel(_Assistant())
+    panel.generation = 1
+    return panel
+
+
+def test_tokens_are_appended_to_one_message_between_repaints():
+    panel = _streaming_panel()
+    for token in ("Hello", " there"):
+        panel.display_partial_response(1, token)
+    assert panel.render_timer.isActive()
+    panel.render_streaming_text()
+    anchor = panel.streaming_anchor
+
+    panel.display_partial_response(1, ",\nfriend")
+    panel.render_streaming_text()
+
+    text = panel.chat_display.toPlainText()
+    assert "Aurix \nHello there,\nfriend \n" in text
+    assert STREAM_PLACEHOLDER not in text
+    # The bubble was appended to, not drawn again
+    assert panel.streaming_anchor == anchor
+    assert text.count("Hello there") == 1
+
+
+def test_finished_answer_keeps_the_streamed_message():
+    panel = _streaming_panel()
+    panel.display_partial_response(1, "Hello there")
+    panel.render_streaming_text()
+
+    panel.display_ai_response("Hello there")
+
+    text = panel.chat_display.toPlainText()
+    assert text.count("Hello there") == 1
+    assert panel.message_count == 2
+    assert panel.streaming_anchor is None and not panel.render_timer.isActive()
+
+
+def test_answer_that_differs_from_the_preview_replaces_it():
+    panel = _streaming_panel()
+    panel.display_partial_response(1, "Hello")
+    panel.render_streaming_text()
+    panel.display_partial_response(1, " there")
+
+    panel.display_ai_response("Hello there")
+
+    text = panel.chat_display.toPlainText()
+    assert text.count("Hello") == 2  # Welcome message and the answer
+    assert "Hello there" in text
+    assert panel.message_count == 2
+
+
+def test_stale_generation_tokens_are_ignored():
+    panel = _streaming_panel()
+    panel.display_partial_response(0, "old")
+    assert panel.streaming_text == "" and not panel.render_timer.isActive()
+
+
+class _Worker:
+    cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def test_stop_cancels_the_worker_and_keeps_the_streamed_text():
+    panel = _streaming_panel()
+    panel.worker = worker = _Worker()
+    panel.display_partial_response(1, "Half an answer")
+
+    panel.stop_generation()
+
+    assert worker.cancelled and panel.worker is None
+    assert panel.generation == 2
+    assert "Half an answer" in panel.chat_display.toPlainText()
+    # Tokens the cancelled worker still emits are dropped
+    panel.display_partial_response(1, " more")
+    assert panel.streaming_text == ""
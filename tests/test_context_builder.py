@@ -0,0 +1,53 @@
+from core.ai.context_builder import ContextBuilder
+
+
+def _history(count, length=36):
+    return [{'role': 'user' if index % 2 == 0 else 'assistant', 'content': f"{index:02d}".ljust(length, '.')}
+            for index in range(count)]
+
+
+def test_budget_reserves_the_response_and_the_system_prompt():
+    builder = ContextBuilder({'context_share': 0.85, 'chars_per_token': 4.0, 'message_overhead': 4})
+
+    # The response reservation is the tighter limit here...
+    assert builder.budget(1000, 300, '') == 700 - 1 - 4
+    # ...and the context share here
+    assert builder.budget(1000, 50, '') == 850 - 1 - 4
+    assert builder.budget(1000, 50, 'x' * 400) == 850 - 101 - 4
+
+
+def test_build_keeps_the_newest_messages_that_fit_in_order():
+    builder = ContextBuilder({'context_share': 0.85, 'chars_per_token': 4.0, 'message_overhead': 4})
+    history = _history(20)
+    # Each message costs 10 tokens of content plus 4 of overhead; the budget is 145
+    assert builder.message_tokens(history[0]) == 14
+    assert builder.budget(200, 50, '') == 145
+
+    window = builder.build(history, context_length=200, max_tokens=50, system_prompt='')
+
+    assert window == history[-10:]
+    assert sum(builder.message_tokens(message) for message in window) <= 145
+
+
+def test_build_always_sends_the_latest_message():
+    builder = ContextBuilder({'chars_per_token': 4.0})
+    history = _history(3) + [{'role': 'user', 'content': 'x' * 4000}]
+
+    assert builder.build(history, context_length=200, max_tokens=50, system_prompt='') == history[-1:]
+
+
+def test_build_sends_everything_when_the_history_is_short():
+    builder = ContextBuilder()
+    history = _history(4)
+
+    assert builder.build(history, context_length=4096, max_tokens=256, system_prompt='Be brief.') == history
+
+
+def test_estimates_are_cached_with_a_bounded_size():
+    builder = ContextBuilder({'estimate_cache_size': 2})
+    for text in ('one', 'two', 'three'):
+        builder.estimate(text)
+
+    assert list(builder._estimates) == ['two', 'three']
+    assert builder.estimate('two') == builder.estimate('two')
+    assert list(builder._estimates) == ['three', 'two']
@@ -0,0 +1,74 @@
+import time
+
+from core.utils.endpoint_health import CircuitBreaker, EndpointHealthMonitor
+
+DEAD_URL = 'http://127.0.0.1:9'
+
+
+def test_breaker_opens_at_the_threshold_and_recovers_through_one_trial():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.1)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    time.sleep(0.15)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one trial request is let through while half-open
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow_request()
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.1)
+    breaker.record_failure()
+    time.sleep(0.15)
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_success_resets_the_consecutive_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_monitor_probes_endpoints_and_fails_fast_once_open(stub_server):
+    server = stub_server()
+    monitor = EndpointHealthMonitor({'background_probe': False, 'failure_threshold': 2,
+                                     'recovery_timeout': 10, 'cache_ttl': 0, 'probe_timeout': 0.5})
+
+    assert monitor.check(server.base_url)
+    assert not monitor.check(DEAD_URL)
+    assert not monitor.check(DEAD_URL)
+    assert not monitor.is_available(DEAD_URL)
+    assert not monitor.allow_request(DEAD_URL)
+
+    status = monitor.get_status()
+    assert status[server.base_url]['state'] == CircuitBreaker.CLOSED
+    assert status[server.base_url]['healthy'] is True
+    assert status[DEAD_URL]['state'] == CircuitBreaker.OPEN
+    assert status[DEAD_URL]['failures'] == 2
+
+
+def test_check_reuses_a_fresh_result_instead_of_probing():
+    monitor = EndpointHealthMonitor({'background_probe': False, 'cache_ttl': 60})
+    monitor.record_success(DEAD_URL)
+
+    # A probe would fail; the recent success is returned instead
+    assert monitor.check(DEAD_URL)
+
+    monitor.cache_ttl = 0
+    assert not monitor.check(DEAD_URL)
@@ -0,0 +1,86 @@
+from core.ai.endpoint_pool import DEFAULT_BASE_URL, EndpointPool, endpoint_urls
+from core.ai.request_scheduler import RequestScheduler
+from core.utils.endpoint_health import EndpointHealthMonitor
+
+URL_A = 'http://daemon-a:11434'
+URL_B = 'http://daemon-b:11434'
+URL_C = 'http://daemon-c:11434'
+
+
+def _pool(urls=(URL_A, URL_B, URL_C), **config):
+    health = EndpointHealthMonitor({'background_probe': False, 'failure_threshold': 1, 'recovery_timeout': 60})
+    scheduler = RequestScheduler({'parallel_slots': 8})
+    return EndpointPool(list(urls), health, scheduler, config), health, scheduler
+
+
+def _busy(scheduler, url, count):
+    return [scheduler.acquire((url, 'model-a')) for _ in range(count)]
+
+
+def test_base_url_setting_is_normalized():
+    assert endpoint_urls(None) == [DEFAULT_BASE_URL]
+    assert endpoint_urls('http://daemon-a:11434/') == [URL_A]
+    assert endpoint_urls([URL_A + '/', URL_B]) == [URL_A, URL_B]
+
+
+def test_requests_go_to_the_least_loaded_endpoint():
+    pool, _, scheduler = _pool()
+    _busy(scheduler, URL_A, 2)
+    _busy(scheduler, URL_B, 1)
+
+    assert pool.select() == URL_C
+    _busy(scheduler, URL_C, 3)
+    assert pool.select() == URL_B
+    # Ties go to the endpoint listed first
+    _busy(scheduler, URL_B, 1)
+    assert pool.select() == URL_A
+
+
+def test_sessions_stay_on_their_endpoint_until_it_is_clearly_busier():
+    pool, _, scheduler = _pool(sticky_max_imbalance=2)
+    assert pool.select('chat') == URL_A
+
+    _busy(scheduler, URL_A, 2)
+    assert pool.select('chat') == URL_A
+    assert pool.select() == URL_B
+
+    _busy(scheduler, URL_A, 1)
+    assert pool.select('chat') == URL_B
+    assert pool.select('chat') == URL_B
+    assert pool.get_stats()['rebalanced'] == 1
+
+
+def test_unavailable_endpoints_are_skipped_and_failed_over():
+    pool, health, _ = _pool()
+    assert pool.select('chat') == URL_A
+    health.record_failure(URL_A)
+
+    assert pool.select('chat') == URL_B
+    assert pool.failover(URL_B, 'chat') == URL_C
+    assert pool.select('chat') == URL_C
+
+    health.record_failure(URL_C)
+    assert pool.failover(URL_B, 'chat') is None
+    assert pool.get_stats()['failovers'] == 1
+
+
+def test_all_endpoints_down_returns_the_preferred_one():
+    pool, health, _ = _pool()
+    for url in (URL_A, URL_B, URL_C):
+        health.record_failure(url)
+
+    assert pool.select() == URL_A
+    assert pool.select(exclude=[URL_A]) == URL_B
+
+
+def test_sticky_bindings_are_bounded_and_can_be_forgotten():
+    pool, _, _ = _pool(max_sticky_sessions=2)
+    for session_id in ('one', 'two', 'three'):
+        pool.select(session_id)
+
+    assert list(pool._sticky) == ['two', 'three']
+    pool.forget('two')
+    assert list(pool._sticky) == ['three']
+    stats = pool.get_stats()['endpoints']
+    assert stats[URL_A]['sessions'] == 1
+    assert stats[URL_A]['selected'] == 3
@@ -0,0 +1,70 @@
+import time
+
+from core.ai.history_compactor import HistoryCompactor
+from core.ai.model_selector import ModelSelector
+
+
+def _history(turns):
+    history = []
+    for i in range(turns):
+        history += [{'role': 'user', 'content': f"question {i}"}, {'role': 'assistant', 'content': f"answer {i}"}]
+    return history
+
+
+def _wait_for_summary(compactor, history, summary, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        compacted, new_summary = compactor.apply(history, summary)
+        if new_summary != summary:
+            return compacted, new_summary
+        time.sleep(0.01)
+    return history, summary
+
+
+def test_history_past_the_trigger_is_folded_into_the_summary(stub_server):
+    server = stub_server(models=('small',), tokens=5)
+    compactor = HistoryCompactor({'trigger_messages': 6, 'keep_recent': 2}, server.base_url, 'small', '5m')
+    history = _history(3)
+
+    assert not compactor.schedule(history, "")
+    history += _history(1)
+    assert compactor.schedule(history, "")
+
+    compacted, summary = _wait_for_summary(compactor, history, "")
+
+    assert summary == "word0 word1 word2 word3 word4"
+    assert compacted == history[-2:]
+    (path, request), = server.received_requests()
+    assert (path, request['model']) == ('/api/generate', 'small')
+    assert "User: question 0" in request['prompt']
+
+
+def test_summary_of_a_cleared_conversation_is_dropped(stub_server):
+    server = stub_server(models=('small',), ttft=0.2)
+    compactor = HistoryCompactor({'trigger_messages': 2, 'keep_recent': 0}, server.base_url, 'small', '5m')
+    history = _history(2)
+
+    assert compactor.schedule(history, "")
+    compactor.reset()
+    time.sleep(0.4)
+
+    assert compactor.apply(history, "") == (history, "")
+
+
+def test_fallback_model_writes_summaries_unless_one_is_configured(stub_server, model_config, tmp_path):
+    server = stub_server()
+    primary = model_config(server.base_url, 'model-a')
+    fallback = model_config(server.base_url, 'model-b')
+    config = {
+        'model_management': primary['model_management'],
+        'model_selection': {'auto_select': False},
+        'primary': primary,
+        'fallback': fallback,
+    }
+
+    selector = ModelSelector(config, None)
+    assert selector.primary_model._create_session('s1').compactor.model == 'model-b'
+
+    primary['model_management'] = dict(primary['model_management'], compaction={'model': 'summarizer'})
+    selector = ModelSelector(config, None)
+    assert selector.primary_model._create_session('s1').compactor.model == 'summarizer'
@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+import requests
+
+from core.utils.cancellation import CancellationToken
+from core.utils.http_transport import HttpTransport
+
+
+def test_requests_to_a_host_reuse_one_keep_alive_connection(stub_server):
+    server = stub_server()
+    transport = HttpTransport()
+
+    first = transport.get(f"{server.base_url}/api/tags")
+    second = transport.get(f"{server.base_url}/api/tags")
+
+    assert first.status_code == second.status_code == 200
+    assert not first.timing.reused
+    assert second.timing.reused
+    stats = transport.get_stats()[server.base_url]
+    assert (stats['requests'], stats['new_connections']) == (2, 1)
+    transport.close()
+
+
+def test_timeouts_combine_with_the_connect_timeout():
+    transport = HttpTransport({'connect_timeout': 2, 'read_timeout': 20})
+
+    assert transport._resolve_timeout(None) == (2, 20)
+    assert transport._resolve_timeout(5) == (2, 5)
+    assert transport._resolve_timeout((1, 3)) == (1, 3)
+
+
+def test_cancelling_aborts_a_stream_and_detaches_from_the_connection(stub_server):
+    server = stub_server(tokens=200, tokens_per_second=50)
+    transport = HttpTransport()
+    cancel_token = CancellationToken()
+
+    response = transport.post(f"{server.base_url}/api/generate", json={'model': 'model-a', 'prompt': 'hi'},
+                              stream=True, timeout=5, cancel_token=cancel_token)
+    lines = response.iter_lines()
+    next(lines)
+    threading.Timer(0.1, cancel_token.cancel).start()
+
+    with pytest.raises(requests.exceptions.RequestException):
+        for _ in lines:
+            pass
+    response.close()
+
+    assert cancel_token._callbacks == []
+    # The transfer is still recorded once the stream is closed
+    assert transport.get_stats()[server.base_url]['requests'] == 1
+    transport.close()
+
+
+def test_finished_requests_leave_no_abort_callback_behind(stub_server):
+    server = stub_server()
+    transport = HttpTransport()
+    cancel_token = CancellationToken()
+
+    transport.get(f"{server.base_url}/api/tags", cancel_token=cancel_token)
+
+    assert cancel_token._callbacks == []
+    transport.close()
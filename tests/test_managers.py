@@ -0,0 +1,145 @@
+import time
+import threading
+
+from core.ai.gemma_manager import GemmaManager
+from core.ai.llamacpp_manager import LlamaCppManager
+from core.ai.ollama_manager import OllamaManager
+from core.ai.request_scheduler import Priority, RequestScheduler
+from core.utils.cancellation import CancellationToken
+from core.utils.http_transport import get_transport
+
+
+def _idle_connections(base_url):
+    """Connections of the host's pool that are not checked out"""
+    session = get_transport()._session_for(base_url)
+    pool = session.get_adapter(base_url).poolmanager.connection_from_url(base_url)
+    return pool.pool.qsize(), pool.pool.maxsize
+
+
+def test_failed_attempts_release_their_connection(stub_server, model_config):
+    for manager_class in (OllamaManager, GemmaManager):
+        # Separate endpoints: the failures open each one's circuit
+        server = stub_server(error_rate=1.0, error_status=500)
+        manager = manager_class(model_config(server.base_url), None)
+        cancel_token = CancellationToken()
+
+        response = manager._get_ai_response("hello", cancel_token)
+
+        assert not response.success
+        assert "500" in response.error
+        idle, maxsize = _idle_connections(server.base_url)
+        assert idle == maxsize
+        # No abort callback is left registered on a connection back in the pool
+        assert cancel_token._callbacks == []
+
+
+def test_gemma_continuation_starts_a_new_line(stub_server, model_config):
+    server = stub_server(models=('gemma',))
+    manager = GemmaManager(model_config(server.base_url, model='gemma', provider='gemma'), None)
+
+    assert manager._get_ai_response("first", CancellationToken()).success
+    assert manager._get_ai_response("second", CancellationToken()).success
+
+    _, request = server.received_requests()[-1]
+    assert 'context' in request
+    # The saved context ends with the previous answer, not a newline
+    assert request['prompt'] == "\nUser: second\nAssistant: "
+
+
+class _FakeLlama:
+    """Loaded in-process model that streams five tokens"""
+    tokens = 5
+
+    def tokenize(self, data, add_bos=True, special=False):
+        return list(data)
+
+    def create_completion(self, tokens, max_tokens, temperature, stop, stream):
+        for index in range(min(max_tokens, self.tokens)):
+            yield {'choices': [{'text': f"tok{index} ", 'finish_reason': None}]}
+
+    def save_state(self):
+        return object()
+
+    def load_state(self, state):
+        pass
+
+
+def test_stalled_llamacpp_stream_does_not_hold_the_model(model_config, tmp_path):
+    model_path = tmp_path / "model.gguf"
+    model_path.write_bytes(b"")
+    manager = LlamaCppManager(model_config('', provider='llamacpp', model_path=str(model_path)), None)
+    manager.llm = _FakeLlama()
+    # As shipped: one request at a time per model
+    manager.scheduler = RequestScheduler({'parallel_slots': 1})
+
+    stalled = manager.generate_response_stream("first", session_id='a')
+    assert next(stalled) == "tok0 "
+
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(answer=manager.generate_response("second", session_id='b')),
+                              daemon=True)
+    worker.start()
+    worker.join(2.0)
+    stalled.close()
+
+    assert result.get('answer') == "tok0 tok1 tok2 tok3 tok4 "
+
+
+def test_foreground_request_preempts_a_running_prefill(stub_server, model_config):
+    server = stub_server(ttft=2.0)
+    manager = OllamaManager(model_config(server.base_url), None)
+    manager.scheduler = RequestScheduler({'parallel_slots': 1})
+    backend = (server.base_url, manager.model_name)
+
+    result = {}
+    prefill = threading.Thread(target=lambda: result.update(sent=manager.prefill("what is the")), daemon=True)
+    prefill.start()
+    while not manager.scheduler.get_stats()['classes']['background']['granted']:
+        time.sleep(0.01)
+
+    started = time.monotonic()
+    slot = manager.scheduler.acquire(backend, Priority.CHAT, CancellationToken())
+    waited = time.monotonic() - started
+    slot.release()
+    prefill.join(2.0)
+
+    assert waited < 1.0
+    assert result == {'sent': False}
+
+
+def test_prefill_is_skipped_only_for_the_session_that_sent_it(stub_server, model_config):
+    server = stub_server()
+    manager = OllamaManager(model_config(server.base_url), None)
+
+    assert manager.prefill("what is the", 'a')
+    assert manager.prefill("what is the", 'b')
+    assert not manager.prefill("what is the", 'a')
+
+
+def test_gemma_prefill_leaves_the_saved_context_alone(stub_server, model_config):
+    server = stub_server(models=('gemma',))
+    manager = GemmaManager(model_config(server.base_url, model='gemma', provider='gemma'), None)
+    assert manager._get_ai_response("first", CancellationToken()).success
+    session = manager.sessions.get()
+    saved = session.prompt_context
+    assert saved is not None
+
+    # The typed text does not continue the saved context, so the prefill sends a full prompt
+    session.history.append({'role': 'user', 'content': "unanswered"})
+    assert manager.prefill("second")
+
+    assert session.prompt_context is saved
+
+
+def test_empty_llamacpp_completion_is_a_failure(model_config, tmp_path):
+    model_path = tmp_path / "model.gguf"
+    model_path.write_bytes(b"")
+    manager = LlamaCppManager(model_config('', provider='llamacpp', model_path=str(model_path)), None)
+    manager.llm = _FakeLlama()
+    manager.llm.tokens = 0
+
+    response = manager._get_ai_response("hello", CancellationToken(), session_id='s1')
+
+    assert not response.success
+    assert response.error == "Empty response from model"
+    assert all(message['role'] != 'assistant' for message in manager.sessions.get('s1').history)
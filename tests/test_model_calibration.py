@@ -0,0 +1,79 @@
+import pytest
+
+from core.ai.model_calibration import ModelCalibrator, load_profile, save_profile, select_models
+from core.ai.model_selector import ModelSelector
+
+
+def _profile(*models):
+    return {'base_url': 'http://localhost:11434',
+            'models': [{'name': name, 'size': size, 'expected_latency': latency}
+                       for name, size, latency in models]}
+
+
+def test_largest_model_within_the_target_is_primary():
+    profile = _profile(('tiny', 1, 1.0), ('small', 2, 3.0), ('large', 8, 9.0))
+
+    assert select_models(profile, 5.0) == ('small', 'tiny')
+    assert select_models(profile, 10.0) == ('large', 'tiny')
+    # Nothing meets the target: the fastest model answers, with no faster fallback
+    assert select_models(profile, 0.5) == ('tiny', 'small')
+    assert select_models(_profile(), 5.0) == (None, None)
+
+
+def test_profile_round_trips_and_bad_files_are_ignored(tmp_path):
+    assert load_profile(str(tmp_path)) is None
+    path = save_profile(_profile(('tiny', 1, 1.0)), str(tmp_path))
+    assert load_profile(str(tmp_path))['models'][0]['name'] == 'tiny'
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("{not json")
+    assert load_profile(str(tmp_path)) is None
+
+    with pytest.raises(ValueError):
+        save_profile(_profile(('tiny', 1, float('inf'))), str(tmp_path))
+
+
+def test_calibration_skips_models_that_produce_no_tokens(stub_server, monkeypatch):
+    server = stub_server(models=('model-a', 'model-b'))
+    measured = {'model-a': 0.0, 'model-b': 20.0}
+
+    def measure(self, model):
+        return {'ttft_p50': 0.1, 'tokens_per_second': measured[model],
+                'expected_latency': 0.1 + 100 / measured[model] if measured[model] else float('inf')}
+
+    monkeypatch.setattr(ModelCalibrator, 'measure', measure)
+    profile = ModelCalibrator(server.base_url).run()
+
+    assert [model['name'] for model in profile['models']] == ['model-b']
+
+
+def test_calibration_ranks_measured_models_by_expected_latency(stub_server):
+    server = stub_server(models=('model-a', 'model-b'), tokens=8)
+
+    profile = ModelCalibrator(server.base_url, {'num_predict': 8}).run(['model-b'])
+
+    assert [model['name'] for model in profile['models']] == ['model-b']
+    measured = profile['models'][0]
+    assert measured['tokens_per_second'] > 0
+    assert 0 < measured['ttft_p50'] <= measured['expected_latency']
+    assert profile['base_url'] == server.base_url
+
+
+def test_selector_uses_the_profile_only_on_the_profiled_endpoint(stub_server, model_config, tmp_path):
+    server = stub_server()
+    save_profile(dict(_profile(('model-b', 1, 1.0), ('model-a', 4, 3.0)), base_url=server.base_url), str(tmp_path))
+    primary = model_config(server.base_url, 'configured-a')
+    fallback = model_config(server.base_url, 'configured-b')
+    config = {
+        'model_management': primary['model_management'],
+        'model_selection': {'auto_select': True, 'target_latency': 5.0},
+        'primary': primary,
+        'fallback': fallback,
+    }
+
+    selector = ModelSelector(config, None)
+    assert (selector.primary_model.model_name, selector.fallback_model.model_name) == ('model-a', 'model-b')
+
+    fallback['base_url'] = 'http://127.0.0.1:1'
+    selector = ModelSelector(config, None)
+    assert selector.fallback_model.model_name == 'configured-b'
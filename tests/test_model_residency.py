@@ -0,0 +1,54 @@
+import time
+from types import SimpleNamespace
+
+from core.ai import model_residency
+from core.ai.model_residency import ModelResidencyManager
+
+
+def test_refresh_matches_names_without_a_tag_to_latest(stub_server):
+    server = stub_server(models=('llama3:latest', 'phi3:mini'))
+    server.running = ['llama3:latest']
+    residency = ModelResidencyManager()
+    residency.register(server.base_url, 'llama3', '5m')
+    residency.register(server.base_url, 'phi3:mini', '5m')
+
+    residency.refresh()
+
+    assert residency.is_loaded(server.base_url, 'llama3')
+    assert not residency.is_loaded(server.base_url, 'phi3:mini')
+    status = residency.get_status()
+    assert status['llama3']['loaded'] and status['llama3']['expires_in'] > 200
+    assert not status['phi3:mini']['loaded']
+
+
+def test_warmed_model_is_warmed_again_once_its_keep_alive_expires(stub_server, monkeypatch):
+    server = stub_server(models=('llama3:latest',))
+    residency = ModelResidencyManager()
+    residency.register(server.base_url, 'llama3', '10m')
+
+    assert residency.warm(server.base_url, 'llama3')
+    assert residency.is_loaded(server.base_url, 'llama3')
+    path, body = server.received_requests()[-1]
+    assert (path, body['model'], body['keep_alive']) == ('/api/generate', 'llama3', '10m')
+    residency.ensure_warm_async(server.base_url, 'llama3')
+    time.sleep(0.1)
+    assert len(server.received_requests()) == 1
+
+    later = time.time() + 11 * 60
+    monkeypatch.setattr(model_residency, 'time', SimpleNamespace(time=lambda: later))
+    assert not residency.is_loaded(server.base_url, 'llama3')
+    residency.ensure_warm_async(server.base_url, 'llama3')
+
+    deadline = time.monotonic() + 2.0
+    while len(server.received_requests()) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(server.received_requests()) == 2
+
+
+def test_keep_alive_durations_are_read_as_seconds():
+    assert model_residency._keep_alive_seconds("30m") == 1800
+    assert model_residency._keep_alive_seconds("1h30m") == 5400
+    assert model_residency._keep_alive_seconds(45) == 45
+    assert model_residency._keep_alive_seconds("0") == 0
+    assert model_residency._keep_alive_seconds(-1) is None
+    assert model_residency._keep_alive_seconds("soon") == 300
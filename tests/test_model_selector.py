@@ -0,0 +1,95 @@
+import time
+
+from core.ai.model_selector import ModelSelector
+from core.ai.streaming import collect_stream
+from core.utils.cancellation import CancellationToken
+
+
+def _selector(primary_config, fallback_config, tmp_path, **selection):
+    return ModelSelector({
+        'model_management': primary_config['model_management'],
+        'model_selection': dict({'auto_select': False, 'hedging': False}, **selection),
+        'primary': primary_config,
+        'fallback': fallback_config,
+    }, None)
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_hedge_winner_turn_reaches_the_losing_model(stub_server, model_config, tmp_path):
+    slow = stub_server(ttft=1.0)
+    fast = stub_server()
+    selector = _selector(model_config(slow.base_url, 'model-a'), model_config(fast.base_url, 'model-b'),
+                         tmp_path, hedging=True, first_token_budget=0.05, router={'enabled': False})
+
+    answer = selector.generate_response("hello there", session_id='s1')
+
+    expected = [{'role': 'user', 'content': "hello there"}, {'role': 'assistant', 'content': answer}]
+    assert selector.fallback_model.sessions.get('s1').history == expected
+    # The cancelled primary drops its unanswered turn and keeps the winner's exchange
+    assert _wait_for(lambda: selector.primary_model.sessions.get('s1').history == expected)
+
+
+def test_strong_route_sees_turns_the_fast_model_answered(stub_server, model_config, tmp_path):
+    server = stub_server()
+    selector = _selector(model_config(server.base_url, 'model-a'), model_config(server.base_url, 'model-b'),
+                         tmp_path, router={'enabled': True, 'fast_model': 'primary', 'record_outcomes': False})
+
+    first = selector.generate_response("hi there", session_id='s1')
+    selector.generate_response("Explain why the sky is blue, step by step", session_id='s1')
+
+    (_, fast_request), (_, strong_request) = server.received_requests()
+    assert fast_request['model'] == 'model-a'
+    assert strong_request['model'] == 'model-b'
+    assert strong_request['messages'][1:] == [
+        {'role': 'user', 'content': "hi there"},
+        {'role': 'assistant', 'content': first},
+        {'role': 'user', 'content': "Explain why the sky is blue, step by step"},
+    ]
+
+
+def test_selector_offers_the_assistant_interface(stub_server, model_config, tmp_path):
+    server = stub_server()
+    selector = _selector(model_config(server.base_url, 'model-a'), model_config(server.base_url, 'model-b'),
+                         tmp_path, router={'enabled': False})
+
+    result = collect_stream(selector.generate_response_stream("hello there", automation=False, session_id='s1'))
+
+    assert result.success
+    assert selector.model_name == 'model-a'
+    stats = selector.get_session_stats()
+    assert stats['primary']['active'] == stats['fallback']['active'] == 1
+    selector.clear_conversation('s1')
+    assert selector.primary_model.sessions.get('s1').history == []
+    assert selector.fallback_model.sessions.get('s1').history == []
+
+
+def test_hedged_attempts_leave_no_callbacks_on_the_callers_token(stub_server, model_config, tmp_path):
+    slow = stub_server(ttft=0.3)
+    fast = stub_server()
+    selector = _selector(model_config(slow.base_url, 'model-a'), model_config(fast.base_url, 'model-b'),
+                         tmp_path, hedging=True, first_token_budget=0.05, router={'enabled': False})
+    cancel_token = CancellationToken()
+
+    for index in range(3):
+        selector.generate_response(f"question {index}", cancel_token)
+
+    assert cancel_token._callbacks == []
+
+
+def test_selector_without_models_reports_no_assistant_state(tmp_path):
+    selector = ModelSelector({
+        'model_management': {'cache_dir': str(tmp_path)},
+        'model_selection': {'auto_select': False},
+        'primary': {'provider': 'unknown'},
+    }, None)
+
+    assert selector.model_name == ""
+    assert selector.sessions is None
+    assert not selector.hedging_enabled and not selector.router.enabled
+    assert not collect_stream(selector.generate_response_stream("hello")).success
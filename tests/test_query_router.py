@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from core.ai.query_router import FAST, STRONG, QueryRouter
+
+
+def test_easy_prompts_go_to_the_fast_model(tmp_path):
+    router = QueryRouter({}, str(tmp_path))
+
+    for prompt in ('hi there', 'thanks!', 'What is the capital of France?', 'translate hello to Spanish'):
+        assert router.route(prompt).route == FAST, prompt
+
+
+def test_hard_prompts_go_to_the_strong_model(tmp_path):
+    router = QueryRouter({}, str(tmp_path))
+
+    for prompt in ('Explain why the sky is blue',
+                   'Fix this: `def add(a, b): return a - b`',
+                   'Compare the trade-offs of SQLite and Postgres for a desktop app'):
+        assert router.route(prompt).route == STRONG, prompt
+
+
+def test_features_and_score():
+    features = QueryRouter.extract_features('What is 12 * 7?', depth=3)
+
+    assert (features.words, features.depth) == (5, 3)
+    assert features.math and features.factual
+    assert not (features.reasoning or features.code or features.chitchat)
+    assert QueryRouter().score(features) == pytest.approx(0.02 * 5 + 0.1 * 3 + 0.5 - 0.5)
+
+
+def test_long_conversations_and_prompts_are_capped(tmp_path):
+    router = QueryRouter({'max_words': 10, 'max_depth': 2, 'threshold': 10}, str(tmp_path))
+
+    assert router.route('word ' * 500, depth=100).score == round(0.02 * 10 + 0.1 * 2, 3)
+
+
+def test_weights_and_threshold_are_configurable(tmp_path):
+    router = QueryRouter({'threshold': 0.5, 'weights': {'chitchat': 0.0}}, str(tmp_path))
+
+    assert router.route('hello, how does a compiler work?').route == STRONG
+    assert router.weights['reasoning'] == 1.0
+
+
+def test_outcomes_are_counted_and_logged_with_a_bound(tmp_path):
+    router = QueryRouter({'max_logged_outcomes': 4}, str(tmp_path))
+    fast = router.route('hi')
+    strong = router.route('Explain how TCP congestion control works')
+
+    router.record(fast, 'model-a', True, total_time=0.2, ttft=0.05, generated_tokens=8)
+    router.record(strong, 'model-b', False, total_time=1.0)
+    for _ in range(3):
+        router.record(fast, 'model-a', True, total_time=0.4, ttft=0.15)
+
+    stats = router.get_stats()
+    assert stats[FAST] == {'requests': 4, 'failures': 0, 'mean_total_time': 0.35, 'mean_ttft': 0.125}
+    assert stats[STRONG] == {'requests': 1, 'failures': 1, 'mean_total_time': 1.0, 'mean_ttft': 0.0}
+
+    # Five records against a limit of four keep the newest half
+    with open(router.path, encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f]
+    assert len(entries) == 2
+    assert all(entry['route'] == FAST and entry['model'] == 'model-a' for entry in entries)
+
+
+def test_outcome_log_can_be_disabled(tmp_path):
+    router = QueryRouter({'record_outcomes': False}, str(tmp_path))
+    router.record(router.route('hi'), 'model-a', True, total_time=0.1)
+
+    assert router.get_stats()[FAST]['requests'] == 1
+    assert not (tmp_path / 'router_outcomes.jsonl').exists()
@@ -0,0 +1,128 @@
+import time
+import threading
+
+from core.ai.request_scheduler import Priority, RequestScheduler
+from core.utils.cancellation import CancellationToken
+
+URL = 'http://daemon-a:11434'
+
+
+def test_foreground_preempts_background_on_another_model_of_the_endpoint():
+    scheduler = RequestScheduler({'parallel_slots': 1})
+    compaction_token = CancellationToken()
+    other_endpoint_token = CancellationToken()
+    compaction = scheduler.acquire((URL, 'tinyllama'), Priority.BACKGROUND, compaction_token)
+    scheduler.acquire(('http://daemon-b:11434', 'tinyllama'), Priority.BACKGROUND, other_endpoint_token)
+
+    chat = scheduler.acquire((URL, 'deepseek'), Priority.CHAT)
+
+    assert compaction_token.wait(timeout=1.0)
+    assert not other_endpoint_token.cancelled
+    compaction.release()
+
+    # Background work on the endpoint waits until the foreground request is done
+    granted = threading.Event()
+
+    def background():
+        scheduler.acquire((URL, 'tinyllama'), Priority.BACKGROUND, CancellationToken()).release()
+        granted.set()
+
+    threading.Thread(target=background, daemon=True).start()
+    assert not granted.wait(timeout=0.2)
+    chat.release()
+    assert granted.wait(timeout=1.0)
+
+
+def _wait_for_queued(scheduler, backend, **expected):
+    """Poll get_stats until the backend's queue holds the expected waiters"""
+    for _ in range(200):
+        queued = scheduler.get_stats()['backends'].get(str(backend), {}).get('queued', {})
+        if all(queued.get(name) == count for name, count in expected.items()):
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"queue never reached {expected}")
+
+
+def test_waiters_are_granted_by_class_then_first_come_first_served():
+    scheduler = RequestScheduler({'parallel_slots': 1})
+    backend = (URL, 'deepseek')
+    holder = scheduler.acquire(backend, Priority.CHAT)
+    order = []
+    threads = []
+
+    def waiter(name, priority):
+        scheduler.acquire(backend, priority).release()
+        order.append(name)
+
+    queued = {}
+    for name, priority in [('bg', Priority.BACKGROUND), ('chat-1', Priority.CHAT),
+                           ('chat-2', Priority.CHAT), ('voice', Priority.VOICE)]:
+        thread = threading.Thread(target=waiter, args=(name, priority), daemon=True)
+        thread.start()
+        threads.append(thread)
+        queued[priority.name.lower()] = queued.get(priority.name.lower(), 0) + 1
+        # Enqueue one at a time so the sequence numbers follow the list
+        _wait_for_queued(scheduler, backend, **queued)
+
+    holder.release()
+    for thread in threads:
+        thread.join(timeout=1.0)
+
+    assert order == ['voice', 'chat-1', 'chat-2', 'bg']
+    classes = scheduler.get_stats()['classes']
+    assert {name: stats['max_depth'] for name, stats in classes.items()} == {
+        'voice': 1, 'chat': 2, 'background': 1}
+    assert {name: stats['granted'] for name, stats in classes.items()} == {
+        'voice': 1, 'chat': 3, 'background': 1}
+
+
+def test_parallel_slots_limit_each_backend():
+    scheduler = RequestScheduler({'parallel_slots': 2, 'model_slots': {'tinyllama': 1}})
+    backend = (URL, 'deepseek')
+    first = scheduler.acquire(backend, Priority.CHAT)
+    scheduler.acquire(backend, Priority.CHAT)
+    # Other models keep their own slots
+    scheduler.acquire((URL, 'tinyllama'), Priority.CHAT)
+
+    granted = threading.Event()
+
+    def third():
+        scheduler.acquire(backend, Priority.CHAT)
+        granted.set()
+
+    threading.Thread(target=third, daemon=True).start()
+    assert not granted.wait(timeout=0.2)
+    first.release()
+    assert granted.wait(timeout=1.0)
+
+    backends = scheduler.get_stats()['backends']
+    assert backends[str(backend)]['slots'] == 2
+    assert backends[str((URL, 'tinyllama'))]['slots'] == 1
+
+
+def test_second_acquire_blocks_until_the_first_is_released_and_is_counted():
+    scheduler = RequestScheduler({'parallel_slots': 1})
+    backend = (URL, 'deepseek')
+    first = scheduler.acquire(backend, Priority.CHAT)
+    granted = threading.Event()
+
+    def second():
+        scheduler.acquire(backend, Priority.CHAT).release()
+        granted.set()
+
+    threading.Thread(target=second, daemon=True).start()
+    _wait_for_queued(scheduler, backend, chat=1, voice=0, background=0)
+    assert not granted.wait(timeout=0.2)
+    assert scheduler.get_stats()['backends'][str(backend)]['active'] == 1
+
+    first.release()
+    assert granted.wait(timeout=1.0)
+
+    stats = scheduler.get_stats()
+    chat = stats['classes']['chat']
+    assert chat['granted'] == 2 and chat['max_depth'] == 1
+    # One request waited at least 0.2s, the other not at all
+    assert chat['max_wait'] >= 0.2
+    assert 0.1 <= chat['avg_wait'] <= chat['max_wait']
+    assert stats['backends'][str(backend)]['queued'] == {'voice': 0, 'chat': 0, 'background': 0}
+    assert stats['classes']['voice']['avg_wait'] == 0.0
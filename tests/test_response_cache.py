@@ -0,0 +1,83 @@
+import os
+import time
+
+from core.ai.response_cache import ResponseCache
+
+KEY_A = ResponseCache.make_key('model-a', 'system', [{'role': 'user', 'content': 'a'}], {'temperature': 0.2})
+KEY_B = ResponseCache.make_key('model-a', 'system', [{'role': 'user', 'content': 'b'}], {'temperature': 0.2})
+KEY_C = ResponseCache.make_key('model-a', 'system', [{'role': 'user', 'content': 'c'}], {'temperature': 0.2})
+
+
+def _disk_files(cache):
+    return sorted(name for name in os.listdir(cache.directory) if name.endswith('.json'))
+
+
+def test_key_covers_everything_that_changes_the_answer():
+    window = [{'role': 'user', 'content': 'a'}]
+    assert ResponseCache.make_key('model-a', 'system', window, {'temperature': 0.2}) == KEY_A
+    assert ResponseCache.make_key('model-b', 'system', window, {'temperature': 0.2}) != KEY_A
+    assert ResponseCache.make_key('model-a', 'other', window, {'temperature': 0.2}) != KEY_A
+    assert ResponseCache.make_key('model-a', 'system', window, {'temperature': 0.3}) != KEY_A
+
+
+def test_memory_tier_evicts_the_least_recently_used_entry(tmp_path):
+    cache = ResponseCache({'max_memory_entries': 2}, str(tmp_path))
+    cache.put(KEY_A, 'answer a')
+    cache.put(KEY_B, 'answer b')
+    assert cache.get(KEY_A) == 'answer a'
+
+    cache.put(KEY_C, 'answer c')
+
+    assert list(cache._memory) == [KEY_A, KEY_C]
+    # The evicted entry is still served from disk and promoted back into memory
+    assert cache.get(KEY_B) == 'answer b'
+    assert KEY_B in cache._memory
+    stats = cache.get_stats()
+    assert (stats['memory_hits'], stats['disk_hits'], stats['misses']) == (1, 1, 0)
+    assert stats['memory_entries'] == 2
+
+
+def test_disk_tier_survives_a_restart_and_keeps_its_size_bound(tmp_path):
+    cache = ResponseCache({'max_disk_entries': 2}, str(tmp_path))
+    for age, (key, content) in enumerate(((KEY_A, 'answer a'), (KEY_B, 'answer b'), (KEY_C, 'answer c'))):
+        cache.put(key, content)
+        # Keep the modification times distinct so the oldest file is evicted first
+        stamp = time.time() - 100 + age
+        os.utime(cache._path(key), (stamp, stamp))
+
+    assert _disk_files(cache) == sorted([f"{KEY_B}.json", f"{KEY_C}.json"])
+
+    restarted = ResponseCache({}, str(tmp_path))
+    assert restarted.get(KEY_A) is None
+    assert restarted.get(KEY_C) == 'answer c'
+    assert restarted.get_stats()['disk_hits'] == 1
+
+
+def test_expired_entries_are_dropped_from_both_tiers(tmp_path):
+    cache = ResponseCache({'ttl_seconds': 60}, str(tmp_path))
+    cache.put(KEY_A, 'answer a')
+    cache._memory[KEY_A]['created'] -= 120
+    cache._write_disk(KEY_A, dict(cache._memory[KEY_A]))
+
+    assert cache.get(KEY_A) is None
+    assert KEY_A not in cache._memory
+    assert _disk_files(cache) == []
+    assert cache.get_stats()['misses'] == 1
+
+
+def test_hot_or_disabled_requests_bypass_the_cache(tmp_path):
+    cache = ResponseCache({'max_temperature': 0.5}, str(tmp_path))
+    assert not cache.should_bypass(0.2)
+    assert cache.should_bypass(0.9)
+    assert cache.get_stats()['bypassed'] == 1
+
+    disabled = ResponseCache({'enabled': False}, str(tmp_path))
+    assert disabled.should_bypass(0.0)
+    assert disabled.get_stats()['bypassed'] == 0
+
+
+def test_default_threshold_leaves_sampled_chat_uncached(tmp_path):
+    cache = ResponseCache({}, str(tmp_path))
+    assert not cache.should_bypass(0.0)
+    # The chat models' default temperature
+    assert cache.should_bypass(0.7)
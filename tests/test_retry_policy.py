@@ -0,0 +1,118 @@
+import random
+
+import pytest
+import requests
+
+from core.utils.cancellation import CancellationToken
+from core.utils.retry_policy import FATAL, RETRYABLE, RetryPolicy, classify_error
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(f"{status} error", response=response)
+
+
+def test_errors_are_classified_by_whether_a_retry_can_help():
+    assert classify_error(_http_error(503)) == RETRYABLE
+    assert classify_error(_http_error(429)) == RETRYABLE
+    assert classify_error(_http_error(404)) == FATAL
+    assert classify_error(requests.exceptions.ReadTimeout("read timed out")) == RETRYABLE
+    assert classify_error(requests.exceptions.ConnectTimeout("connect timed out")) == RETRYABLE
+    assert classify_error(requests.exceptions.ConnectionError("Connection reset by peer")) == RETRYABLE
+    assert classify_error(requests.exceptions.ConnectionError("Connection refused")) == FATAL
+    assert classify_error(RuntimeError("model requires more system memory (8 GiB)")) == RETRYABLE
+    assert classify_error(ValueError("bad payload")) == FATAL
+
+
+def test_backoff_is_jittered_and_capped():
+    policy = RetryPolicy({'base_delay': 0.5, 'max_delay': 2.0})
+    random.seed(7)
+    delays = [policy.backoff(attempt) for attempt in range(6) for _ in range(50)]
+
+    assert all(0 <= delay <= 2.0 for delay in delays)
+    assert all(delay <= 0.5 for delay in delays[:50])
+    # Full jitter spreads retries rather than repeating one delay
+    assert len({round(delay, 6) for delay in delays[:50]}) > 40
+
+
+def test_call_retries_transient_errors_until_success():
+    policy = RetryPolicy({'max_attempts': 3, 'base_delay': 0.01, 'max_delay': 0.01, 'timeout_growth': 1.0})
+    timeouts = []
+
+    def flaky(timeout):
+        timeouts.append(timeout)
+        if len(timeouts) < 3:
+            raise requests.exceptions.ReadTimeout("read timed out")
+        return 'ok'
+
+    assert policy.call(flaky, timeout=2.0) == 'ok'
+    # Each retry gets a longer read timeout
+    assert timeouts == [2.0, 4.0, 6.0]
+
+
+def test_call_gives_up_on_fatal_errors_and_exhausted_attempts():
+    policy = RetryPolicy({'max_attempts': 3, 'base_delay': 0.01, 'max_delay': 0.01})
+    attempts = []
+
+    def refused(timeout):
+        attempts.append(timeout)
+        raise requests.exceptions.ConnectionError("Connection refused")
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        policy.call(refused, timeout=1.0)
+    assert len(attempts) == 1
+
+    attempts.clear()
+
+    def overloaded(timeout):
+        attempts.append(timeout)
+        raise _http_error(503)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        policy.call(overloaded, timeout=1.0)
+    assert len(attempts) == 3
+
+
+def test_deadline_stops_retries_and_bounds_the_timeout():
+    policy = RetryPolicy({'max_attempts': 10, 'deadline': 0.2, 'base_delay': 5.0, 'max_delay': 5.0})
+    retry = policy.start()
+
+    assert retry.timeout(30.0) <= 0.2
+    random.seed(1)
+    # The backoff would sleep past the deadline, so the request fails now
+    assert not retry.should_retry(requests.exceptions.ReadTimeout("read timed out"))
+    assert retry.can_failover()
+
+
+def test_cancelled_requests_are_not_retried():
+    cancel_token = CancellationToken()
+    retry = RetryPolicy({'base_delay': 0.01}).start(cancel_token)
+    cancel_token.cancel()
+
+    assert not retry.should_retry(requests.exceptions.ReadTimeout("read timed out"))
+    assert not retry.can_failover()
+
+
+def test_degraded_options_shrink_the_request():
+    policy = RetryPolicy({'degradation': {'num_predict': 128, 'num_ctx': 2048, 'temperature_drop': 0.3,
+                                          'min_temperature': 0.1}})
+    options = {'num_predict': 512, 'num_ctx': 8192, 'temperature': 0.3, 'top_p': 0.9}
+
+    assert policy.degrade_options(options, base_temperature=0.3) == {
+        'num_predict': 128, 'num_ctx': 2048, 'temperature': 0.1, 'top_p': 0.9}
+    assert options['num_predict'] == 512
+    assert RetryPolicy({'degradation': {'enabled': False}}).degrade_options(options, 0.3) is options
+
+
+def test_web_lookups_read_their_retry_policy_from_config():
+    from core.automation.services import AutomationServices
+
+    services = AutomationServices()
+    services.configure({'web': {'timeout': 3, 'retry': {'max_attempts': 4, 'deadline': 8}}})
+    web_actions = services.get('web_actions')
+
+    assert web_actions.timeout == 3
+    assert (web_actions.retry_policy.max_attempts, web_actions.retry_policy.deadline) == (4, 8)
+    # Unset values keep the quick web defaults rather than the LLM ones
+    assert web_actions.retry_policy.timeout_growth == 0
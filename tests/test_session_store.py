@@ -0,0 +1,54 @@
+from core.ai.ollama_manager import OllamaManager
+from core.ai.session_store import DEFAULT_SESSION, SessionStore
+
+
+def test_least_recently_used_session_is_evicted_but_not_the_default():
+    store = SessionStore({'max_sessions': 2, 'idle_timeout': 0})
+    store.get(DEFAULT_SESSION).history.append({'role': 'user', 'content': 'keep me'})
+    evicted = store.get('a')
+    evicted.history.append({'role': 'user', 'content': 'hi'})
+    store.get('b')
+
+    assert store.session_ids() == [DEFAULT_SESSION, 'b']
+    assert store.get_stats()['evicted_lru'] == 1
+    # Evicted state is cleared so a late holder cannot leak it into a new session
+    assert evicted.history == []
+    assert store.get(DEFAULT_SESSION).history == [{'role': 'user', 'content': 'keep me'}]
+
+
+def test_idle_sessions_are_dropped_on_the_next_access():
+    store = SessionStore({'idle_timeout': 60})
+    store.get('idle').last_active -= 120
+    store.get(DEFAULT_SESSION).last_active -= 120
+
+    store.get('fresh')
+
+    assert sorted(store.session_ids()) == [DEFAULT_SESSION, 'fresh']
+    assert store.get_stats()['evicted_idle'] == 1
+
+
+def test_transient_sessions_sit_outside_the_limit():
+    store = SessionStore({'max_sessions': 1})
+    transient = store.create_transient()
+
+    assert store.get(transient.session_id) is transient
+    assert len(store) == 0 and store.get_stats()['transient'] == 1
+    assert store.drop(transient.session_id)
+    assert not store.drop(transient.session_id)
+    assert store.peek(transient.session_id) is None
+
+
+def test_sessions_keep_separate_histories(stub_server, model_config):
+    server = stub_server()
+    manager = OllamaManager(model_config(server.base_url), None)
+
+    manager.generate_response("I am Alice", session_id='alice')
+    manager.generate_response("I am Bob", session_id='bob')
+    manager.generate_response("Who am I?", session_id='alice')
+
+    _, request = server.received_requests()[-1]
+    contents = [message['content'] for message in request['messages'] if message['role'] == 'user']
+    assert contents == ["I am Alice", "Who am I?"]
+    manager.end_session('bob')
+    assert manager.sessions.peek('bob') is None
+    assert manager.get_session_stats()['active'] == 1
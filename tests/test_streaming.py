@@ -0,0 +1,64 @@
+from core.ai.streaming import ThinkFilter, strip_reasoning
+
+
+def _run(tokens, **kwargs):
+    think = ThinkFilter(**kwargs)
+    answer = ''.join(think.feed(token) for token in tokens) + think.flush()
+    return think, answer
+
+
+def test_tags_split_across_tokens_are_recognised():
+    think, answer = _run(['<th', 'ink>plan', ' the reply</th', 'in', 'k>\n\n', 'Hello', ' there'])
+
+    assert answer == 'Hello there'
+    assert ''.join(think.reasoning) == 'plan the reply'
+    assert not think.in_reasoning
+
+
+def test_text_that_only_looks_like_a_tag_is_passed_on():
+    think, answer = _run(['Use <', 'b> or <th', 'ead> here'])
+
+    assert answer == 'Use <b> or <thead> here'
+    assert think.reasoning == []
+
+
+def test_partial_tag_is_held_back_until_decided():
+    think = ThinkFilter()
+
+    assert think.feed('Answer <thi') == 'Answer '
+    assert think.feed('s') == '<this'
+    assert think.flush() == ''
+
+
+def test_unterminated_reasoning_is_not_part_of_the_answer():
+    think, answer = _run(['<think>', 'still thinking', ' when the stream ends'])
+
+    assert answer == ''
+    assert ''.join(think.reasoning) == 'still thinking when the stream ends'
+
+
+def test_reasoning_cap_and_forced_answer():
+    think = ThinkFilter(max_reasoning_tokens=3)
+    think.feed('<think>')
+    think.feed('one')
+    assert not think.capped
+    think.feed(' two')
+    assert think.capped
+
+    assert think.force_answer() == 'one two'
+    assert not think.capped
+    assert think.feed(' Final answer') == 'Final answer'
+
+
+def test_no_cap_by_default():
+    think = ThinkFilter()
+    for _ in range(100):
+        think.feed('<think>' if think.reasoning_tokens == 0 else ' more')
+
+    assert think.reasoning_tokens == 100
+    assert not think.capped
+
+
+def test_strip_reasoning_from_a_complete_response():
+    assert strip_reasoning('<think>weigh options</think>\n\nGo left.') == 'Go left.'
+    assert strip_reasoning('No reasoning here.') == 'No reasoning here.'
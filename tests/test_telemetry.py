@@ -0,0 +1,47 @@
+import pytest
+
+from core.ai.ollama_manager import OllamaManager
+from core.ai.telemetry import GenerationMetrics, TelemetryRecorder, get_telemetry
+from core.utils.cancellation import CancellationToken
+
+
+def test_ollama_timing_fields_are_converted_from_nanoseconds():
+    metrics = GenerationMetrics(model='model-a')
+    metrics.update_from_ollama({'prompt_eval_count': 40, 'eval_count': 100, 'load_duration': 2_000_000_000,
+                                'prompt_eval_duration': 500_000_000, 'eval_duration': 4_000_000_000})
+
+    assert (metrics.prompt_tokens, metrics.generated_tokens) == (40, 100)
+    assert metrics.load_time == pytest.approx(2.0)
+    assert metrics.prompt_eval_time == pytest.approx(0.5)
+    assert metrics.tokens_per_second == pytest.approx(25.0)
+    assert 'started' not in metrics.to_dict()
+
+
+def test_summary_and_histogram_cover_the_rolling_window():
+    recorder = TelemetryRecorder(window=4)
+    for ttft in (5.0, 0.1, 0.2, 0.3, 2.0):
+        recorder.record(GenerationMetrics(model='model-a', ttft=ttft))
+    recorder.record(GenerationMetrics(model='model-b'))
+
+    ttft = recorder.summary('model-a')['ttft']
+    # The oldest generations fell out of the window
+    assert ttft['count'] == 3
+    assert (ttft['p50'], ttft['p99']) == (0.3, 2.0)
+    assert ttft['mean'] == pytest.approx(2.5 / 3)
+    assert recorder.histogram('ttft', [0.25, 1.0]) == {'<=0.25': 1, '<=1.0': 1, '>1.0': 1}
+    assert 'ttft' not in recorder.summary('model-b')
+
+
+def test_generation_records_its_metrics(stub_server, model_config):
+    server = stub_server(tokens=8)
+    manager = OllamaManager(model_config(server.base_url), None)
+
+    response = manager._get_ai_response("hello", CancellationToken())
+
+    metrics = response.metrics
+    assert response.success and not metrics.cached
+    assert metrics.model == 'model-a'
+    assert metrics.generated_tokens == 8
+    assert 0 < metrics.ttft <= metrics.total_time
+    assert metrics.tokens_per_second > 0
+    assert any(record is metrics for record in get_telemetry().recent('model-a'))
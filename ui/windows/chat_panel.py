@@ -1,25 +1,61 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, 
                              QLineEdit, QPushButton, QFrame, QScrollArea, QLabel)
-from PyQt5.QtCore import QThread, pyqtSignal, QObject, Qt, QDateTime
+from PyQt5.QtCore import QThread, pyqtSignal, QObject, Qt, QDateTime, QTimer
 from PyQt5.QtGui import QIcon, QFont, QTextCharFormat, QTextCursor
 from core.utils.helpers import truncate_string
+from core.ai.streaming import collect_stream
+from core.utils.cancellation import CancellationToken, CANCELLED_ERROR
+from core.ai.request_scheduler import Priority
 from ui.windows.voice_panel import VoicePanel
 import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Streamed tokens are drawn at most this often
+STREAM_RENDER_INTERVAL_MS = 50
+# Stands in for the text of a streamed message until its first tokens are drawn
+STREAM_PLACEHOLDER = "\u2026"
+
 class ResponseWorker(QObject):
-    finished = pyqtSignal(str)
+    # Signals carry the generation id so stale workers can be ignored
+    token_received = pyqtSignal(int, str)
+    finished = pyqtSignal(int, str)
 
-    def __init__(self, ollama_manager, user_input):
+    def __init__(self, ollama_manager, user_input, generation, priority=Priority.CHAT):
         super().__init__()
         self.ollama_manager = ollama_manager
         self.user_input = user_input
+        self.generation = generation
+        self.priority = priority
+        self.cancel_token = CancellationToken()
+
+    def cancel(self):
+        """Abort the in-flight request; safe to call from the UI thread"""
+        self.cancel_token.cancel()
 
     def run(self):
-        response = self.ollama_manager.generate_response(self.user_input)
-        self.finished.emit(response)
+        try:
+            if hasattr(self.ollama_manager, 'generate_response_stream'):
+                # Relay tokens to the UI as they arrive
+                result = collect_stream(
+                    self.ollama_manager.generate_response_stream(self.user_input, self.cancel_token,
+                                                                 priority=self.priority),
+                    on_token=lambda token: self.token_received.emit(self.generation, token)
+                )
+                if result.success:
+                    response = result.content
+                elif result.error == CANCELLED_ERROR:
+                    response = ""
+                else:
+                    response = result.content or f"Sorry, I encountered an error: {result.error}"
+            else:
+                response = self.ollama_manager.generate_response(self.user_input, self.cancel_token,
+                                                                 priority=self.priority)
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            response = f"Sorry, I encountered an error: {str(e)}"
+        self.finished.emit(self.generation, response)
 
 class ChatPanel(QWidget):
     def __init__(self, ollama_manager, voice_components=None, parent=None):
@@ -29,6 +65,30 @@ class ChatPanel(QWidget):
         self.parent_window = parent
         self.message_count = 0
         
+        # State of the assistant message currently being streamed
+        self.streaming_text = ""
+        self.streaming_shown = ""
+        self.streaming_anchor = None
+        self.streaming_cursor = None
+        self.render_timer = QTimer(self)
+        self.render_timer.setSingleShot(True)
+        self.render_timer.setInterval(STREAM_RENDER_INTERVAL_MS)
+        self.render_timer.timeout.connect(self.render_streaming_text)
+        
+        # In-flight generation; older generations are ignored when they finish
+        self.generation = 0
+        self.worker = None
+        self.active_threads = set()
+        
+        # Dictated text waiting in the input field; it is scheduled ahead of typed chat
+        self.voice_input_text = None
+        
+        # Prefill the prompt once typing pauses (opt-in, see model_management.prefill)
+        self.prefill_timer = QTimer(self)
+        self.prefill_timer.setSingleShot(True)
+        self.prefill_timer.setInterval(getattr(ollama_manager, 'prefill_debounce_ms', 800))
+        self.prefill_timer.timeout.connect(self.prefill_prompt)
+        
         # Connect to theme changes if parent supports it
         if hasattr(parent, 'theme_changed'):
             parent.theme_changed.connect(self.on_theme_changed)
@@ -67,6 +127,7 @@ class ChatPanel(QWidget):
         self.input_field.setObjectName("messageInput")
         self.input_field.setPlaceholderText("Ask Aurix anything...")
         self.input_field.returnPressed.connect(self.send_message)
+        self.input_field.textEdited.connect(self.on_input_edited)
         self.input_field.setMinimumHeight(45)
         input_layout.addWidget(self.input_field)
         
@@ -83,6 +144,14 @@ class ChatPanel(QWidget):
         self.send_button.setMinimumSize(80, 45)
         input_layout.addWidget(self.send_button)
         
+        # Stop button, shown while a response is being generated
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.setObjectName("stopButton")
+        self.stop_button.clicked.connect(self.stop_generation)
+        self.stop_button.setMinimumSize(80, 45)
+        self.stop_button.hide()
+        input_layout.addWidget(self.stop_button)
+        
         # Clear button
         self.clear_button = QPushButton("Clear")
         self.clear_button.setObjectName("clearButton")
@@ -98,6 +167,7 @@ class ChatPanel(QWidget):
     
     def add_welcome_message(self):
         """Add a welcome message when the chat starts"""
+        self.message_count += 1
         welcome_html = self.create_message_html(
             "Hello! I'm Aurix, your AI desktop assistant. How can I help you today?",
             "Aurix",
@@ -109,7 +179,6 @@ class ChatPanel(QWidget):
     
     def create_message_html(self, message, sender, is_user=True, is_welcome=False):
         """Create formatted HTML for a message"""
-        self.message_count += 1
         timestamp = QDateTime.currentDateTime().toString("hh:mm")
         
         # Color scheme (will be overridden by theme)
@@ -162,6 +231,20 @@ class ChatPanel(QWidget):
         
         return html
     
+    def on_input_edited(self, text):
+        """Make sure the model is loaded as soon as the user starts typing"""
+        if len(text) == 1 and hasattr(self.ollama_manager, 'prepare_for_use'):
+            self.ollama_manager.prepare_for_use()
+        if getattr(self.ollama_manager, 'prefill_enabled', False):
+            self.prefill_timer.start()
+    
+    def prefill_prompt(self):
+        """Warm the model with the prompt being typed so sending only processes the remainder"""
+        # History changes when the in-flight response completes
+        if self.worker is not None:
+            return
+        self.ollama_manager.prefill_async(self.input_field.text().strip())
+    
     def handle_voice_input(self, text):
         """Handle voice input from the integrated voice panel"""
         if text:
@@ -171,6 +254,9 @@ class ChatPanel(QWidget):
             
             # Set the text in the input field
             self.input_field.setText(cleaned_text)
+            self.voice_input_text = cleaned_text
+            if getattr(self.ollama_manager, 'prefill_enabled', False):
+                self.prefill_prompt()
             
             # Optionally auto-send the voice input
             # Uncomment the next line if you want voice input to be sent automatically
@@ -181,13 +267,73 @@ class ChatPanel(QWidget):
         response = re.sub(r"<think>.*?</think>", "", response, flags=re.DOTALL)
         return response.strip()
     
+    def display_partial_response(self, generation, token):
+        """Buffer a streamed token; the in-progress message is redrawn on the render timer"""
+        if generation != self.generation:
+            return
+        self.streaming_text += token
+        if not self.render_timer.isActive():
+            self.render_timer.start()
+    
+    def render_streaming_text(self):
+        """Append the text streamed since the last repaint to the in-progress message"""
+        # Hide reasoning until its closing tag arrives
+        partial = self.process_ai_response(self.streaming_text)
+        partial = re.sub(r"<think>.*", "", partial, flags=re.DOTALL).strip()
+        if not partial or partial == self.streaming_shown:
+            return
+        
+        # First visible output replaces the loading indicator
+        if self.streaming_anchor is None and hasattr(self.parent_window, 'hide_loading'):
+            self.parent_window.hide_loading()
+        
+        if self.streaming_cursor is not None and partial.startswith(self.streaming_shown):
+            new_text = partial[len(self.streaming_shown):]
+        else:
+            # First output, or earlier text changed: start a fresh message bubble
+            self.remove_streaming_message()
+            cursor = self.chat_display.textCursor()
+            cursor.movePosition(QTextCursor.End)
+            self.streaming_anchor = cursor.position()
+            cursor.insertHtml(self.create_message_html(STREAM_PLACEHOLDER, "Aurix", is_user=False))
+            # Selecting the placeholder leaves the cursor in the message text with its format
+            self.streaming_cursor = self.chat_display.document().find(STREAM_PLACEHOLDER, self.streaming_anchor)
+            new_text = partial
+        
+        # Line separators keep the text in one paragraph, like the <br> of finished messages
+        self.streaming_cursor.insertText(new_text.replace('\n', '\u2028'))
+        self.streaming_shown = partial
+        self.scroll_to_bottom()
+    
+    def remove_streaming_message(self):
+        """Remove the in-progress streamed message from the chat display"""
+        self.render_timer.stop()
+        self.streaming_shown = ""
+        self.streaming_cursor = None
+        if self.streaming_anchor is None:
+            return
+        cursor = self.chat_display.textCursor()
+        cursor.setPosition(self.streaming_anchor)
+        cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        self.streaming_anchor = None
+    
     def send_message(self):
         """Send a message and get AI response"""
         user_input = self.input_field.text().strip()
         if not user_input:
             return
+        
+        # A new message supersedes any response still being generated
+        self.stop_generation()
+        self.prefill_timer.stop()
+        
+        # Unedited dictation keeps voice priority
+        priority = Priority.VOICE if user_input == self.voice_input_text else Priority.CHAT
+        self.voice_input_text = None
     
         # Display user message
+        self.message_count += 1
         user_html = self.create_message_html(user_input, "You", is_user=True)
         self.chat_display.insertHtml(user_html)
         self.scroll_to_bottom()
@@ -209,39 +355,82 @@ class ChatPanel(QWidget):
                         self.display_ai_response(response)
                         return
         
-        # Disable input while processing
-        self.set_input_enabled(False)
+        # Input stays enabled so a new message can interrupt this one
+        self.set_generating(True)
     
         # Show loading indicator
         if hasattr(self.parent_window, 'show_loading'):
             self.parent_window.show_loading()
     
         # Create worker thread
+        self.generation += 1
+        self.streaming_text = ""
         self.thread = QThread()
-        self.worker = ResponseWorker(self.ollama_manager, user_input)
+        self.worker = ResponseWorker(self.ollama_manager, user_input, self.generation, priority)
         self.worker.moveToThread(self.thread)
     
         # Connect signals
         self.thread.started.connect(self.worker.run)
-        self.worker.finished.connect(self.display_ai_response)
+        self.worker.token_received.connect(self.display_partial_response)
+        self.worker.finished.connect(self.on_worker_finished)
         self.worker.finished.connect(self.thread.quit)
         self.worker.finished.connect(self.worker.deleteLater)
         self.thread.finished.connect(self.thread.deleteLater)
+        
+        # Keep cancelled threads referenced until they wind down
+        thread = self.thread
+        self.active_threads.add(thread)
+        thread.finished.connect(lambda: self.active_threads.discard(thread))
     
         # Start thread
         self.thread.start()
+    
+    def on_worker_finished(self, generation, response):
+        """Display the result of the current generation"""
+        if generation != self.generation:
+            return
+        self.worker = None
+        self.display_ai_response(response)
+    
+    def stop_generation(self):
+        """Cancel the in-flight response, keeping any text already streamed"""
+        if self.worker is None:
+            return
+        
+        self.worker.cancel()
+        self.worker = None
+        self.generation += 1  # Ignore anything the cancelled worker still emits
+        
+        partial = self.streaming_text
+        if partial:
+            self.display_ai_response(partial)
+        else:
+            self.set_generating(False)
+            if hasattr(self.parent_window, 'hide_loading'):
+                self.parent_window.hide_loading()
 
     def display_ai_response(self, response):
         """Display AI response in the chat"""
         # Process the response
         cleaned_response = self.process_ai_response(response)
         
+        # A streamed preview already showing the whole answer is kept as the final message
+        self.streaming_text = ""
+        preview_complete = bool(cleaned_response) and cleaned_response == self.streaming_shown
+        if preview_complete:
+            self.streaming_anchor = None
+        self.remove_streaming_message()
+        
         # Create and display message
-        assistant_html = self.create_message_html(cleaned_response, "Aurix", is_user=False)
-        self.chat_display.insertHtml(assistant_html)
-        self.scroll_to_bottom()
+        if cleaned_response:
+            self.message_count += 1
+            if not preview_complete:
+                assistant_html = self.create_message_html(cleaned_response, "Aurix", is_user=False)
+                self.chat_display.insertHtml(assistant_html)
+            self.scroll_to_bottom()
         
         # Re-enable input
+        self.set_generating(False)
         self.set_input_enabled(True)
         
         # Focus back to input field
@@ -258,6 +447,10 @@ class ChatPanel(QWidget):
         if hasattr(self, 'voice_panel'):
             self.voice_panel.setEnabled(enabled)
     
+    def set_generating(self, generating):
+        """Show the Stop button while a response is in flight"""
+        self.stop_button.setVisible(generating)
+    
     def scroll_to_bottom(self):
         """Scroll chat display to bottom"""
         scrollbar = self.chat_display.verticalScrollBar()
@@ -403,6 +596,7 @@ class ChatPanel(QWidget):
     
     def clear_chat(self):
         """Clear all messages from chat"""
+        self.stop_generation()
         self.chat_display.clear()
         self.message_count = 0
         self.add_welcome_message()
@@ -5,6 +5,8 @@ from PyQt5.QtCore import Qt, QSize, QTimer, pyqtSignal
 from PyQt5.QtGui import QIcon, QMovie, QFont, QPalette, QColor
 from ui.windows.chat_panel import ChatPanel
 from ui.windows.voice_panel import VoicePanel
+from core.ai.telemetry import get_telemetry
+from core.ai.request_scheduler import get_scheduler
 import logging
 
 logger = logging.getLogger(__name__)
@@ -477,6 +479,10 @@ class MainWindow(QMainWindow):
             theme_action.triggered.connect(self.toggle_theme)
             tray_menu.addAction(theme_action)
             
+            stats_action = QAction("Performance Stats", self)
+            stats_action.triggered.connect(self.show_performance_stats)
+            tray_menu.addAction(stats_action)
+            
             tray_menu.addSeparator()
             
             exit_action = QAction("Exit", self)
@@ -545,6 +551,29 @@ class MainWindow(QMainWindow):
         except Exception as e:
             logger.error(f"Failed to show notification: {e}")
     
+    def show_performance_stats(self):
+        """Show a summary of recent generation latency and throughput"""
+        summary = get_telemetry().summary()
+        if not summary:
+            self.show_notification("Performance Stats", "No generations recorded yet.")
+            return
+        
+        lines = [f"Generations: {summary['total_time']['count']}"]
+        if 'ttft' in summary:
+            ttft = summary['ttft']
+            lines.append(f"First token: p50 {ttft['p50']:.2f}s, p95 {ttft['p95']:.2f}s")
+        total = summary['total_time']
+        lines.append(f"Total time: p50 {total['p50']:.2f}s, p95 {total['p95']:.2f}s")
+        if 'tokens_per_second' in summary:
+            lines.append(f"Throughput: {summary['tokens_per_second']['mean']:.1f} tokens/s")
+        if 'load_time' in summary:
+            lines.append(f"Model load: p95 {summary['load_time']['p95']:.2f}s")
+        queue_stats = get_scheduler().get_stats()['classes']
+        lines.append(f"Queue wait: voice {queue_stats['voice']['avg_wait']:.2f}s, "
+                     f"chat {queue_stats['chat']['avg_wait']:.2f}s, "
+                     f"background preempted {queue_stats['background']['preempted']}x")
+        self.show_notification("Performance Stats", "\n".join(lines))
+    
     def resizeEvent(self, event):
         """Handle window resize event to reposition loading overlay"""
         super().resizeEvent(event)